@@ -1,50 +1,55 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from ta.momentum import RSIIndicator
-from ta.trend import MACD, SMAIndicator
-import json
 import os
+import functools
+import time
+from contextlib import contextmanager
+
+import cache_memori
+import indikator
+import penyedia_data
+import penyimpanan_portofolio
+import proyeksi
+import simulasi_monte_carlo
 
 st.set_page_config(layout="wide", page_title="Analisis Portofolio Saham")
 
 # ======= Fungsi Pembantu =======
 
-def muat_portofolio(filename="portfolio.json"):
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            data = json.load(f)
-            # Migrasi otomatis dari format lama ke format baru
-            if data and isinstance(next(iter(data.values())), (int, float)):
-                data = {ticker: {"lot": lot, "harga_beli": None} for ticker, lot in data.items()}
-                # Simpan format baru
-                with open(filename, "w") as f:
-                    json.dump(data, f, indent=2)
-            return data
-    else:
-        return {}
-
-def simpan_portofolio(data, filename="portfolio.json"):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
-
-def ambil_data_saham(ticker):
-    saham = yf.Ticker(ticker)
-    hist = saham.history(period="1y")
-    info = saham.info
+def muat_portofolio(akun=penyimpanan_portofolio.AKUN_DEFAULT, filename="portfolio.json"):
+    # Ledger SQLite menggantikan penulisan ulang portfolio.json; file lama (termasuk
+    # format {ticker: lot}) diimpor sekali, lihat penyimpanan_portofolio.py.
+    # -> (versi, posisi); dibaca dari cache dalam proses selama tidak ada tulisan baru
+    penyimpanan_portofolio.migrasi_json(filename)
+    return penyimpanan_portofolio.muat(akun)
+
+# Cache bersama semua sesi di proses server: segar 1 jam, lalu data basi masih
+# disajikan hingga 6 jam sambil diperbarui di latar belakang
+CACHE_DATA = cache_memori.cache_proses(
+    "Main01.data_saham",
+    ttl_detik=int(os.environ.get("CACHE_TTL_DETIK", 3600)),
+    maks_entri=int(os.environ.get("CACHE_MAKS_ENTRI", 512)),
+    basi_detik=int(os.environ.get("CACHE_BASI_DETIK", 6 * 3600)),
+)
+
+def _unduh_data_saham(ticker):
+    # Sumber data dipilih lewat PENYEDIA_DATA (yfinance, rekam, replay, sintetis)
+    # Ticker tanpa rekaman (replay) ditampilkan sebagai "Tidak ada data historis", bukan galat halaman
+    penyedia = penyedia_data.dapatkan_penyedia()
+    try:
+        hist = penyedia.riwayat(ticker, period="1y")
+    except penyedia_data.DataTidakTersedia:
+        return pd.DataFrame(), {}
+    try:
+        info = penyedia.info(ticker)
+    except penyedia_data.DataTidakTersedia:
+        info = {}
     return hist, info
 
-def hitung_indikator_teknikal(df):
-    df = df.copy()
-    df['RSI_14'] = RSIIndicator(df['Close'], window=14).rsi()
-    macd = MACD(df['Close'], window_slow=26, window_fast=12, window_sign=9)
-    df['MACD'] = macd.macd()
-    df['MACD_signal'] = macd.macd_signal()
-    df['MA_50'] = SMAIndicator(df['Close'], window=50).sma_indicator()
-    df['MA_200'] = SMAIndicator(df['Close'], window=200).sma_indicator()
-    return df
+def ambil_data_saham(ticker):
+    return CACHE_DATA.ambil(ticker, lambda: _unduh_data_saham(ticker))
 
 def plot_candlestick(df, ticker):
     fig = go.Figure(data=[go.Candlestick(x=df.index,
@@ -76,14 +81,146 @@ def golden_death_cross(ma50, ma200):
 def format_rupiah(x):
     return "Rp {:,.2f}".format(x).replace(",", "X").replace(".", ",").replace("X", ".")
 
+# Hasil analisis per ticker (indikator, status cross, baris ringkasan) dipakai ulang selama
+# data, lot dan harga beli ticker itu tidak berubah; cache dipakai bersama semua sesi
+CACHE_ANALISIS = cache_memori.cache_proses(
+    "Main01.analisis",
+    ttl_detik=int(os.environ.get("CACHE_TTL_DETIK", 3600)),
+    maks_entri=int(os.environ.get("CACHE_MAKS_ENTRI", 512)),
+)
+
+def _analisis_saham(ticker, lot, harga_beli, hist, info, df):
+    # df: riwayat + kolom indikator (lihat indikator.hitung_indikator_banyak)
+    div_yield = info.get('dividendYield', None)
+    harga_terakhir = hist['Close'].iloc[-1]
+    nilai_investasi = lot * 100 * harga_terakhir
+    nilai_beli = lot * 100 * harga_beli if harga_beli else nilai_investasi
+    untung_rugi = nilai_investasi - nilai_beli
+    persen_untung = (untung_rugi / nilai_beli * 100) if nilai_beli != 0 else 0
+    return {
+        'info': info,
+        'indikator': df,
+        'cross': golden_death_cross(df['MA_50'], df['MA_200']),
+        'ringkasan': {
+            "Saham": ticker,
+            "Lot": lot,
+            "Harga Beli (Rp)": harga_beli if harga_beli else harga_terakhir,
+            "Harga Sekarang (Rp)": harga_terakhir,
+            "Nilai Investasi (Rp)": nilai_investasi,
+            "Untung/Rugi (Rp)": untung_rugi,
+            "% Untung/Rugi": persen_untung,
+            "Dividen Yield": div_yield if div_yield else 0
+        },
+    }
+
+def _kunci_analisis(ticker, lot, harga_beli, hist):
+    return (ticker, lot, harga_beli, len(hist), hist.index[-1], float(hist['Close'].iloc[-1]))
+
+def analisis_saham_banyak(portofolio, data_saham):
+    # -> {ticker: hasil analisis, None jika tidak ada data historis}. Indikator semua ticker
+    # yang belum ter-memo dihitung dalam satu panel hitung_indikator_banyak, bukan per ticker
+    kunci = {
+        ticker: _kunci_analisis(ticker, data["lot"], data["harga_beli"], data_saham[ticker][0])
+        for ticker, data in portofolio.items() if not data_saham[ticker][0].empty
+    }
+    belum = {ticker: data_saham[ticker][0] for ticker, k in kunci.items() if not CACHE_ANALISIS.ada(k)}
+    indikator_baru = indikator.hitung_indikator_banyak(belum) if belum else {}
+
+    def muat(ticker):
+        hist, info = data_saham[ticker]
+        df = indikator_baru.get(ticker)
+        if df is None:
+            # Entri sempat digusur di antara pemeriksaan dan pengambilan
+            df = indikator.hitung_indikator_teknikal(hist)
+        data = portofolio[ticker]
+        return _analisis_saham(ticker, data["lot"], data["harga_beli"], hist, info, df)
+
+    return {
+        ticker: CACHE_ANALISIS.ambil(kunci[ticker], lambda t=ticker: muat(t)) if ticker in kunci else None
+        for ticker in portofolio
+    }
+
+# ======= Pengukuran Waktu per Rerun =======
+# Rerun penuh mencatat durasi setiap bagian; rerun fragmen hanya menjalankan (dan mencatat)
+# fragmennya sendiri. Riwayat disimpan per sesi dan ditampilkan di sidebar.
+MAKS_RIWAYAT_WAKTU = 10
+
+def mulai_rerun_penuh():
+    st.session_state['_rerun_aktif'] = {'mulai': time.perf_counter(), 'bagian': {}}
+
+def _simpan_riwayat_waktu(entri):
+    riwayat = st.session_state.setdefault('_riwayat_waktu', [])
+    riwayat.append(entri)
+    del riwayat[:-MAKS_RIWAYAT_WAKTU]
+
+@contextmanager
+def ukur_bagian(nama):
+    mulai = time.perf_counter()
+    try:
+        yield
+    finally:
+        rerun = st.session_state.get('_rerun_aktif')
+        if rerun is not None:
+            rerun['bagian'][nama] = rerun['bagian'].get(nama, 0.0) + time.perf_counter() - mulai
+
+def fragmen_terukur(nama):
+    # st.fragment + pencatatan waktu: saat rerun penuh durasinya dijumlahkan ke bagian `nama`,
+    # saat hanya fragmen ini yang dijalankan ulang dicatat sebagai rerun tersendiri
+    def dekorator(fungsi):
+        @functools.wraps(fungsi)
+        def terukur(*args, **kwargs):
+            mulai = time.perf_counter()
+            try:
+                return fungsi(*args, **kwargs)
+            finally:
+                durasi = time.perf_counter() - mulai
+                rerun = st.session_state.get('_rerun_aktif')
+                if rerun is not None:
+                    rerun['bagian'][nama] = rerun['bagian'].get(nama, 0.0) + durasi
+                else:
+                    _simpan_riwayat_waktu({'Rerun': f"fragmen: {nama}", 'Total (ms)': durasi * 1000,
+                                           nama: durasi * 1000})
+                    st.caption(f"⏱️ Hanya bagian ini yang dijalankan ulang: {durasi * 1000:.0f} ms")
+        return st.fragment(terukur)
+    return dekorator
+
+def selesai_rerun_penuh():
+    rerun = st.session_state.get('_rerun_aktif')
+    if rerun is None:
+        return
+    st.session_state['_rerun_aktif'] = None
+    entri = {'Rerun': "penuh", 'Total (ms)': (time.perf_counter() - rerun['mulai']) * 1000}
+    entri.update({nama: durasi * 1000 for nama, durasi in rerun['bagian'].items()})
+    _simpan_riwayat_waktu(entri)
+    with st.sidebar.expander("⏱️ Waktu per Rerun"):
+        st.dataframe(pd.DataFrame(st.session_state['_riwayat_waktu'][::-1]).round(1), use_container_width=True)
+        st.caption("Baris terbaru di atas. Rerun fragmen tercatat di sini pada rerun penuh berikutnya.")
+
 # ==== Antarmuka Streamlit ====
 
+mulai_rerun_penuh()
 st.title("📈 Aplikasi Analisis Portofolio Saham")
 
-portofolio = muat_portofolio()
-
-# --- Sidebar: Manajemen Portofolio ---
+# --- Sidebar: Pengguna & Portofolio Bernama ---
 st.sidebar.header("Kelola Portofolio")
+pengguna = st.sidebar.text_input("Pengguna", value=penyimpanan_portofolio.PENGGUNA_DEFAULT).strip() \
+    or penyimpanan_portofolio.PENGGUNA_DEFAULT
+nama_portofolio = st.sidebar.selectbox("Portofolio", penyimpanan_portofolio.daftar_portofolio(pengguna) + ["➕ Portofolio baru"])
+try:
+    if nama_portofolio == "➕ Portofolio baru":
+        nama_baru = st.sidebar.text_input("Nama portofolio baru").strip()
+        akun = penyimpanan_portofolio.buat_portofolio(pengguna, nama_baru) if nama_baru \
+            else penyimpanan_portofolio.akun_untuk(pengguna)
+    else:
+        akun = penyimpanan_portofolio.akun_untuk(pengguna, nama_portofolio)
+except ValueError as e:
+    st.sidebar.error(str(e))
+    st.stop()
+
+# Versi yang ditampilkan pada render sebelumnya; penghapusan ditolak jika sudah berubah
+versi_dilihat = st.session_state.get(f"versi_{akun}")
+versi_portofolio, portofolio = muat_portofolio(akun)
+st.session_state[f"versi_{akun}"] = versi_portofolio
 
 with st.sidebar.form("form_portofolio", clear_on_submit=True):
     input_ticker = st.text_input("Tambahkan Kode Saham (contoh: AAPL, BBCA.JK)").upper().strip()
@@ -92,21 +229,10 @@ with st.sidebar.form("form_portofolio", clear_on_submit=True):
     tombol_tambah = st.form_submit_button("Tambah/Perbarui Saham")
     
     if tombol_tambah and input_ticker:
-        if input_ticker in portofolio:
-            # Hitung harga beli rata-rata tertimbang
-            total_lot_sekarang = portofolio[input_ticker]["lot"] + input_lot
-            total_nilai_sebelum = portofolio[input_ticker]["harga_beli"] * portofolio[input_ticker]["lot"] * 100 if portofolio[input_ticker]["harga_beli"] else 0
-            total_nilai_tambah = input_harga * input_lot * 100
-            harga_rata_rata = (total_nilai_sebelum + total_nilai_tambah) / (total_lot_sekarang * 100)
-            
-            portofolio[input_ticker]["lot"] = total_lot_sekarang
-            portofolio[input_ticker]["harga_beli"] = harga_rata_rata
-        else:
-            portofolio[input_ticker] = {
-                "lot": input_lot,
-                "harga_beli": input_harga
-            }
-        simpan_portofolio(portofolio)
+        # Harga beli rata-rata tertimbang dihitung oleh ledger saat transaksi dicatat
+        penyimpanan_portofolio.beli(input_ticker, input_lot, input_harga, akun=akun)
+        versi_portofolio, portofolio = penyimpanan_portofolio.muat(akun)
+        st.session_state[f"versi_{akun}"] = versi_portofolio
         st.sidebar.success(f"Menambahkan/memperbarui {input_lot} lot saham {input_ticker} @ {format_rupiah(input_harga)}")
 
 st.sidebar.write("---")
@@ -120,12 +246,17 @@ for t, data in portofolio.items():
 hapus_ticker = st.sidebar.text_input("Hapus Saham")
 if st.sidebar.button("Hapus Saham"):
     ticker_upper = hapus_ticker.upper()
-    if ticker_upper in portofolio:
-        portofolio.pop(ticker_upper)
-        simpan_portofolio(portofolio)
-        st.sidebar.success(f"Menghapus {ticker_upper} dari portofolio")
+    try:
+        dihapus = penyimpanan_portofolio.tutup_posisi(ticker_upper, akun=akun, versi_diharapkan=versi_dilihat)
+    except penyimpanan_portofolio.KonflikVersi:
+        st.sidebar.error("Portofolio baru saja diubah pengguna lain. Periksa isinya lalu ulangi.")
     else:
-        st.sidebar.error("Saham tidak ditemukan dalam portofolio")
+        if dihapus:
+            versi_portofolio, portofolio = penyimpanan_portofolio.muat(akun)
+            st.session_state[f"versi_{akun}"] = versi_portofolio
+            st.sidebar.success(f"Menghapus {ticker_upper} dari portofolio")
+        else:
+            st.sidebar.error("Saham tidak ditemukan dalam portofolio")
 
 # --- Panel Utama: Analisis Portofolio ---
 
@@ -135,16 +266,20 @@ if not portofolio:
 
 st.header("Analisis Portofolio Saham")
 
-ringkasan = []
-for ticker, data in portofolio.items():
-    lot = data["lot"]
-    harga_beli = data["harga_beli"]
-    
+# Data diambil dari cache proses; indikator & ringkasan per ticker di-memo per versi data,
+# sehingga rerun penuh hanya menghitung ticker yang datanya berubah
+with ukur_bagian("Data & indikator"):
+    data_saham = {ticker: ambil_data_saham(ticker) for ticker in portofolio}
+    analisis_saham = analisis_saham_banyak(portofolio, data_saham)
+
+@fragmen_terukur("Detail saham")
+def tampilkan_saham(ticker, lot, hasil):
+    # Fragmen per ticker: mengganti periode candlestick hanya menggambar ulang ticker ini
     st.subheader(f"{ticker} - {lot} lot")
-    hist, info = ambil_data_saham(ticker)
-    if hist.empty:
+    if hasil is None:
         st.warning(f"Tidak ada data historis untuk {ticker}")
-        continue
+        return
+    info = hasil['info']
 
     # Data fundamental
     per = info.get('trailingPE', None)
@@ -160,10 +295,9 @@ for ticker, data in portofolio.items():
     st.write(f"Dividen Yield: {div_yield*100 if div_yield else '0'}%")
 
     # Indikator teknikal
-    df = hitung_indikator_teknikal(hist)
-    cross = golden_death_cross(df['MA_50'], df['MA_200'])
-    st.write(f"Status Golden/Death Cross: **{cross}**")
-    
+    df = hasil['indikator']
+    st.write(f"Status Golden/Death Cross: **{hasil['cross']}**")
+
     col1, col2 = st.columns(2)
     with col1:
         st.write("**RSI 14 Hari**")
@@ -179,103 +313,117 @@ for ticker, data in portofolio.items():
     fig = plot_candlestick(plot_df, ticker)
     st.plotly_chart(fig, use_container_width=True)
 
-    harga_terakhir = hist['Close'][-1]
-    nilai_investasi = lot * 100 * harga_terakhir
-    nilai_beli = lot * 100 * harga_beli if harga_beli else nilai_investasi
-    untung_rugi = nilai_investasi - nilai_beli
-    persen_untung = (untung_rugi / nilai_beli * 100) if nilai_beli != 0 else 0
-    
-    ringkasan.append({
-        "Saham": ticker,
-        "Lot": lot,
-        "Harga Beli (Rp)": harga_beli if harga_beli else harga_terakhir,
-        "Harga Sekarang (Rp)": harga_terakhir,
-        "Nilai Investasi (Rp)": nilai_investasi,
-        "Untung/Rugi (Rp)": untung_rugi,
-        "% Untung/Rugi": persen_untung,
-        "Dividen Yield": div_yield if div_yield else 0
-    })
+ringkasan = []
+for ticker, data in portofolio.items():
+    tampilkan_saham(ticker, data["lot"], analisis_saham[ticker])
+    if analisis_saham[ticker] is not None:
+        ringkasan.append(analisis_saham[ticker]['ringkasan'])
+
+if not ringkasan:
+    st.info("Belum ada saham dengan data historis untuk diringkas.")
+    selesai_rerun_penuh()
+    st.stop()
 
 # --- Ringkasan Portofolio ---
-st.header("Ringkasan Portofolio")
-ringkasan_df = pd.DataFrame(ringkasan)
-total_nilai = ringkasan_df['Nilai Investasi (Rp)'].sum()
-total_beli = ringkasan_df['Harga Beli (Rp)'].mul(ringkasan_df['Lot'] * 100).sum()
-total_untung = total_nilai - total_beli
-persen_total_untung = (total_untung / total_beli * 100) if total_beli != 0 else 0
-
-ringkasan_df['Persentase Portofolio (%)'] = (ringkasan_df['Nilai Investasi (Rp)'] / total_nilai * 100).round(2)
-
-# Format mata uang
-ringkasan_df['Harga Beli (Rp)'] = ringkasan_df['Harga Beli (Rp)'].apply(format_rupiah)
-ringkasan_df['Harga Sekarang (Rp)'] = ringkasan_df['Harga Sekarang (Rp)'].apply(format_rupiah)
-ringkasan_df['Nilai Investasi (Rp)'] = ringkasan_df['Nilai Investasi (Rp)'].apply(format_rupiah)
-ringkasan_df['Untung/Rugi (Rp)'] = ringkasan_df['Untung/Rugi (Rp)'].apply(format_rupiah)
-ringkasan_df['% Untung/Rugi'] = ringkasan_df['% Untung/Rugi'].apply(lambda x: f"{x:.2f}%")
-
-st.dataframe(ringkasan_df)
-st.write(f"**Total Nilai Portofolio: {format_rupiah(total_nilai)}**")
-st.write(f"**Total Keuntungan/Rugi: {format_rupiah(total_untung)} ({persen_total_untung:.2f}%)**")
+with ukur_bagian("Ringkasan"):
+    st.header("Ringkasan Portofolio")
+    ringkasan_df = pd.DataFrame(ringkasan)
+    total_nilai = ringkasan_df['Nilai Investasi (Rp)'].sum()
+    total_beli = ringkasan_df['Harga Beli (Rp)'].mul(ringkasan_df['Lot'] * 100).sum()
+    total_untung = total_nilai - total_beli
+    persen_total_untung = (total_untung / total_beli * 100) if total_beli != 0 else 0
+
+    ringkasan_df['Persentase Portofolio (%)'] = (ringkasan_df['Nilai Investasi (Rp)'] / total_nilai * 100).round(2)
+    # Salinan numerik untuk bagian proyeksi, sebelum kolom diformat sebagai teks
+    bobot_dividen = ringkasan_df[['Dividen Yield', 'Persentase Portofolio (%)']].copy()
+
+    # Format mata uang
+    ringkasan_df['Harga Beli (Rp)'] = ringkasan_df['Harga Beli (Rp)'].apply(format_rupiah)
+    ringkasan_df['Harga Sekarang (Rp)'] = ringkasan_df['Harga Sekarang (Rp)'].apply(format_rupiah)
+    ringkasan_df['Nilai Investasi (Rp)'] = ringkasan_df['Nilai Investasi (Rp)'].apply(format_rupiah)
+    ringkasan_df['Untung/Rugi (Rp)'] = ringkasan_df['Untung/Rugi (Rp)'].apply(format_rupiah)
+    ringkasan_df['% Untung/Rugi'] = ringkasan_df['% Untung/Rugi'].apply(lambda x: f"{x:.2f}%")
+
+    st.dataframe(ringkasan_df)
+    st.write(f"**Total Nilai Portofolio: {format_rupiah(total_nilai)}**")
+    st.write(f"**Total Keuntungan/Rugi: {format_rupiah(total_untung)} ({persen_total_untung:.2f}%)**")
 
 # --- Modal Baru & Rekomendasi Alokasi ---
-st.header("Tambahan Modal & Rekomendasi Alokasi")
-
-modal = st.number_input("Modal Tambahan (Rp)", min_value=0, step=100000)
-profil_risiko = st.selectbox("Profil Risiko", ["Konservatif", "Moderat", "Agresif"])
+@fragmen_terukur("Rekomendasi")
+def tampilkan_rekomendasi(ringkasan):
+    st.header("Tambahan Modal & Rekomendasi Alokasi")
+
+    modal = st.number_input("Modal Tambahan (Rp)", min_value=0, step=100000)
+    profil_risiko = st.selectbox("Profil Risiko", ["Konservatif", "Moderat", "Agresif"])
+
+    if st.button("Dapatkan Rekomendasi") and modal > 0:
+        # Rekomendasi sederhana: alokasikan ke 3 saham dengan dividend yield tertinggi
+        saham_terurut = sorted(ringkasan, key=lambda x: x['Dividen Yield'], reverse=True)
+        top3 = saham_terurut[:3]
+
+        if profil_risiko == "Konservatif":
+            bobot = [0.6, 0.3, 0.1]
+        elif profil_risiko == "Moderat":
+            bobot = [0.5, 0.3, 0.2]
+        else:
+            bobot = [0.4, 0.3, 0.3]
+
+        st.subheader("3 Saham Rekomendasi Teratas")
+        alokasi = []
+        for i, saham in enumerate(top3):
+            alok = modal * bobot[i]
+            alokasi.append({
+                "Saham": saham['Saham'],
+                "Alokasi (Rp)": alok,
+                "Lot yang bisa dibeli": int(alok // (saham['Harga Sekarang (Rp)'] * 100))
+            })
+            st.write(f"{saham['Saham']} - Alokasi: {format_rupiah(alok)} (~{int(alok // (saham['Harga Sekarang (Rp)'] * 100))} lot)")
+
+        alokasi_df = pd.DataFrame(alokasi)
+        alokasi_df['Alokasi (Rp)'] = alokasi_df['Alokasi (Rp)'].apply(format_rupiah)
+        st.table(alokasi_df)
+
+tampilkan_rekomendasi(ringkasan)
+
+# --- Simulasi Bunga Majemuk & Monte Carlo ---
+@fragmen_terukur("Proyeksi")
+def tampilkan_proyeksi(total_nilai, bobot_dividen, ringkasan, data_saham):
+    st.header("Simulasi Bunga Majemuk & Proyeksi Portofolio")
+
+    tahun = st.slider("Periode Proyeksi (tahun)", 3, 10, 5)
+    cagr = st.number_input("Tingkat Pertumbuhan Tahunan (CAGR %) per tahun", min_value=0.0, max_value=50.0, value=10.0, step=0.1)
+    reinvest_div = st.radio("Reinvestasi Dividen?", ("Ya", "Tidak")) == "Ya"
+
+    # Hitung rata-rata dividend yield portofolio
+    rata_dividen = (bobot_dividen['Dividen Yield'] * bobot_dividen['Persentase Portofolio (%)'] / 100).sum()
+    nilai_proyeksi = proyeksi.pertumbuhan_tahunan(total_nilai, cagr, tahun, rata_dividen, reinvest_div)
+
+    st.line_chart(pd.DataFrame({
+        "Tahun": list(range(1, tahun+1)),
+        "Nilai Portofolio": nilai_proyeksi
+    }).set_index('Tahun'))
+
+    st.header("Simulasi Monte Carlo dari Return Historis")
+    metode_mc = st.selectbox("Metode Simulasi", list(simulasi_monte_carlo.METODE))
+    jalur_mc = st.select_slider("Jumlah Jalur", options=[1000, 10000, 50000, 100000], value=10000)
+
+    if st.button("Jalankan Simulasi Monte Carlo"):
+        nilai_posisi = {s['Saham']: s['Nilai Investasi (Rp)'] for s in ringkasan}
+        try:
+            hasil_mc = simulasi_monte_carlo.simulasikan(
+                {t: hist for t, (hist, _) in data_saham.items()}, nilai_posisi, tahun, jalur_mc, metode_mc
+            )
+        except ValueError as e:
+            st.warning(f"Simulasi tidak dapat dijalankan: {e}")
+        else:
+            pita = hasil_mc['persentil']
+            st.line_chart(pita.set_index(pita.index / 12).rename_axis("Tahun"))
+            ringkasan_mc = simulasi_monte_carlo.ringkasan_akhir(hasil_mc)
+            st.write(f"**Median nilai akhir: {format_rupiah(ringkasan_mc['Median'])}** "
+                     f"(P5 {format_rupiah(pita['P5'].iloc[-1])} – P95 {format_rupiah(pita['P95'].iloc[-1])}), "
+                     f"peluang rugi {ringkasan_mc['Peluang Rugi (%)']:.1f}%")
 
-if st.button("Dapatkan Rekomendasi") and modal > 0:
-    # Rekomendasi sederhana: alokasikan ke 3 saham dengan dividend yield tertinggi
-    saham_terurut = sorted(ringkasan, key=lambda x: x['Dividen Yield'], reverse=True)
-    top3 = saham_terurut[:3]
+tampilkan_proyeksi(total_nilai, bobot_dividen, ringkasan, data_saham)
 
-    if profil_risiko == "Konservatif":
-        bobot = [0.6, 0.3, 0.1]
-    elif profil_risiko == "Moderat":
-        bobot = [0.5, 0.3, 0.2]
-    else:
-        bobot = [0.4, 0.3, 0.3]
-
-    st.subheader("3 Saham Rekomendasi Teratas")
-    alokasi = []
-    for i, saham in enumerate(top3):
-        alok = modal * bobot[i]
-        alokasi.append({
-            "Saham": saham['Saham'],
-            "Alokasi (Rp)": alok,
-            "Lot yang bisa dibeli": int(alok // (saham['Harga Sekarang (Rp)'] * 100))
-        })
-        st.write(f"{saham['Saham']} - Alokasi: {format_rupiah(alok)} (~{int(alok // (saham['Harga Sekarang (Rp)'] * 100))} lot)")
-
-    alokasi_df = pd.DataFrame(alokasi)
-    alokasi_df['Alokasi (Rp)'] = alokasi_df['Alokasi (Rp)'].apply(format_rupiah)
-    st.table(alokasi_df)
-
-# --- Simulasi Bunga Majemuk ---
-st.header("Simulasi Bunga Majemuk & Proyeksi Portofolio")
-
-tahun = st.slider("Periode Proyeksi (tahun)", 3, 10, 5)
-cagr = st.number_input("Tingkat Pertumbuhan Tahunan (CAGR %) per tahun", min_value=0.0, max_value=50.0, value=10.0, step=0.1)
-reinvest_div = st.radio("Reinvestasi Dividen?", ("Ya", "Tidak")) == "Ya"
-
-nilai_awal = total_nilai
-nilai_proyeksi = []
-# Hitung rata-rata dividend yield portofolio
-rata_dividen = (ringkasan_df['Dividen Yield'] * ringkasan_df['Persentase Portofolio (%)'] / 100).sum()
-
-for tahun_ke in range(1, tahun+1):
-    if reinvest_div:
-        nilai_awal *= (1 + (cagr / 100) + rata_dividen)
-    else:
-        nilai_awal *= (1 + (cagr / 100))
-    nilai_proyeksi.append(nilai_awal)
-
-proyeksi_df = pd.DataFrame({
-    "Tahun": list(range(1, tahun+1)),
-    "Nilai Portofolio (Rp)": nilai_proyeksi
-})
-
-proyeksi_df['Nilai Portofolio (Rp)'] = proyeksi_df['Nilai Portofolio (Rp)'].apply(format_rupiah)
-st.line_chart(pd.DataFrame({
-    "Tahun": list(range(1, tahun+1)),
-    "Nilai Portofolio": nilai_proyeksi
-}).set_index('Tahun'))
+# --- Laporan Waktu Rerun ---
+selesai_rerun_penuh()
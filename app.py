@@ -1,7 +1,6 @@
 import streamlit as st
 st.set_page_config(page_title="Analisis Saham", layout="wide")
 
-import yfinance as yf
 def format_rupiah(x):
     try:
         return f"Rp{x:,.0f}".replace(",", ".")
@@ -9,23 +8,47 @@ def format_rupiah(x):
         return "Rp0"
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 
 from datetime import datetime, timedelta
-import requests
-from bs4 import BeautifulSoup
 
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import MinMaxScaler
-
-# Inisialisasi session state
-if 'portofolio' not in st.session_state:
-    st.session_state.portofolio = {}
+import cache_saham
+import penentu_harga
+import prakiraan_rf
+import prakiraan_lstm
+import penyimpanan_portofolio
+
+# ======= PORTOFOLIO PENGGUNA =======
+# Disimpan di ledger SQLite bersama (lihat penyimpanan_portofolio.py), bukan session_state,
+# sehingga tidak hilang saat server restart dan bisa dibuka dari main.py / Main01.py.
+# Kunci portofolio = simbol di ledger (mis. "BBCA.JK", atau "AAPL" dari main.py) sehingga harga
+# diambil dengan simbol yang sama; akhiran .JK hanya disembunyikan saat ditampilkan.
+def muat_portofolio(akun):
+    _, posisi = penyimpanan_portofolio.muat(akun)
+    return {
+        ticker: {
+            'jumlah': data['lot'] * 100,
+            'harga_beli': data['harga_beli'] or 0
+        }
+        for ticker, data in posisi.items()
+    }
 
 # ======= FORM INPUT PORTOFOLIO =======
 st.sidebar.header("📝 Input Saham Anda")
 
+pengguna = st.sidebar.text_input("Pengguna", penyimpanan_portofolio.PENGGUNA_DEFAULT).strip() \
+    or penyimpanan_portofolio.PENGGUNA_DEFAULT
+nama_portofolio = st.sidebar.selectbox("Portofolio", penyimpanan_portofolio.daftar_portofolio(pengguna) + ["➕ Portofolio baru"])
+try:
+    if nama_portofolio == "➕ Portofolio baru":
+        nama_baru = st.sidebar.text_input("Nama portofolio baru").strip()
+        akun = penyimpanan_portofolio.buat_portofolio(pengguna, nama_baru) if nama_baru \
+            else penyimpanan_portofolio.akun_untuk(pengguna)
+    else:
+        akun = penyimpanan_portofolio.akun_untuk(pengguna, nama_portofolio)
+except ValueError as e:
+    st.sidebar.error(str(e))
+    st.stop()
+
 with st.sidebar.form("input_saham_form"):
     kode = st.text_input("Kode Saham (misal: UNVR)", "")
     jumlah = st.number_input("Jumlah Lot", min_value=1, value=1)
@@ -34,11 +57,13 @@ with st.sidebar.form("input_saham_form"):
 
 if submit and kode:
     total_saham = jumlah * 100
-    st.session_state.portofolio[kode.upper()] = {
-        'jumlah': total_saham,
-        'harga_beli': harga_beli
-    }
-    st.success(f"{total_saham} lembar saham {kode.upper()} berhasil ditambahkan.")
+    ticker = penyimpanan_portofolio.ticker_idx(kode)
+    kode = penyimpanan_portofolio.kode_idx(ticker)
+    try:
+        penyimpanan_portofolio.beli(ticker, jumlah, harga_beli, akun=akun)
+        st.success(f"{total_saham} lembar saham {kode} berhasil ditambahkan.")
+    except ValueError as e:
+        st.error(f"Gagal menambahkan {kode}: {str(e)}")
 
 # ======= FUNGSI ANALISIS LANJUTAN =======
 
@@ -72,43 +97,15 @@ def analisis_valuasi_mendalam(info, harga_terakhir):
 
     return hasil
 
-def prediksi_harga_lstm(df, periode=30):
+def prediksi_harga_lstm(data_hist, periode=30):
+    # Bobot LSTM disimpan per ticker dan dipakai ulang, lihat prakiraan_lstm.py. Render halaman
+    # tidak melatih model; bobot dibuat/diperbarui lewat `python prakiraan_lstm.py`
     try:
-        from keras.models import Sequential
-        from keras.layers import LSTM, Dense
-
-        scaler = MinMaxScaler()
-        data = scaler.fit_transform(df['Close'].values.reshape(-1,1))
-
-        X, y = [], []
-        for i in range(periode, len(data)):
-            X.append(data[i-periode:i, 0])
-            y.append(data[i, 0])
-
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
-
-        model = Sequential()
-        model.add(LSTM(50, return_sequences=True, input_shape=(X.shape[1], 1)))
-        model.add(LSTM(50))
-        model.add(Dense(1))
-        model.compile(optimizer='adam', loss='mean_squared_error')
-
-        model.fit(X, y, epochs=10, batch_size=32, verbose=0)
-
-        inputs = data[-periode:]
-        inputs = scaler.transform(inputs)
-
-        X_test = np.array([inputs])
-        X_test = np.reshape(X_test, (X_test.shape[0], X_test.shape[1], 1))
-
-        pred = model.predict(X_test)
-        pred = scaler.inverse_transform(pred)[0][0]
-
-        return pred
+        return prakiraan_lstm.prediksi_banyak({ticker: hist['Close'] for ticker, hist in data_hist.items()},
+                                              periode, latih_jika_perlu=False)
     except Exception as e:
         st.warning(f"Prediksi LSTM gagal: {str(e)}")
-        return None
+        return {}
 
 def scrape_sentimen(ticker):
     try:
@@ -131,45 +128,66 @@ def scrape_sentimen(ticker):
         return None
 
 # ======= TABEL PORTOFOLIO PENGGUNA =======
-portofolio = st.session_state.portofolio
+# Struktur portofolio: { 'UNVR.JK': {'jumlah': 300, 'harga_beli': 4500} }
+portofolio = muat_portofolio(akun)
+
+# Ambil harga pasar terbaru: semua ticker sekaligus, dari sumber termurah dulu
+def ambil_harga_terakhir_banyak(tickers):
+    penentu = penentu_harga.penentu_bersama()
+    hasil = penentu.tentukan(tickers)
+    gagal = [ticker for ticker in tickers if not hasil[ticker][0]]
+    if gagal:
+        st.warning(f"Gagal mengambil harga untuk {', '.join(gagal)}")
+    return {ticker: hasil[ticker][0] for ticker in tickers}, \
+           {ticker: hasil[ticker][1] for ticker in tickers}
 
-# Struktur portofolio: { 'UNVR': {'jumlah': 300, 'harga_beli': 4500} }
-# Update struktur jika hanya berisi angka (lama)
-for kode, data in portofolio.items():
-    if isinstance(data, int):
-        portofolio[kode] = {'jumlah': data, 'harga_beli': 1000}
-
-# Ambil harga pasar terbaru
-def ambil_harga_terakhir(ticker):
-    try:
-        ticker_obj = yf.Ticker(ticker + ".JK")
-        harga = ticker_obj.info.get("regularMarketPrice")
-        if not harga:
-            harga = ticker_obj.fast_info.get("last_price")
-        if not harga:
-            harga = ticker_obj.history(period="5d")["Close"].dropna().iloc[-1]
-        return harga
-    except Exception as e:
-        st.warning(f"Gagal mengambil harga untuk {ticker}.JK: {e}")
-        return None
 if portofolio:
     data_porto = []
-    for kode, data in portofolio.items():
+    harga_pasar, sumber_harga = ambil_harga_terakhir_banyak(list(portofolio.keys()))
+    for ticker, data in portofolio.items():
         jumlah = data['jumlah']
         harga_beli = data['harga_beli']
         total = jumlah * harga_beli
-        harga_now = ambil_harga_terakhir(kode)
+        harga_now = harga_pasar[ticker]
         data_porto.append({
-            'Kode Saham': kode,
+            'Kode Saham': penyimpanan_portofolio.kode_idx(ticker),
             'Jumlah Lembar': jumlah,
             'Harga Beli': format_rupiah(harga_beli),
             'Total Investasi': format_rupiah(total),
             'Harga Terakhir': format_rupiah(harga_now) if harga_now else 'N/A',
-            'Keuntungan/Rugi (%)': f"{((harga_now - harga_beli) / harga_beli * 100):.2f}%" if harga_now and harga_beli else 'N/A'
+            'Keuntungan/Rugi (%)': f"{((harga_now - harga_beli) / harga_beli * 100):.2f}%" if harga_now and harga_beli else 'N/A',
+            'Sumber Harga': sumber_harga[ticker] or '-'
         })
     df_porto = pd.DataFrame(data_porto)
     st.subheader("📋 Portofolio Saat Ini")
     st.dataframe(df_porto, use_container_width=True)
+
+    # Prediksi multi-horizon seluruh portofolio dengan satu model Random Forest gabungan
+    if st.button("🌲 Prediksi Cepat (Random Forest)"):
+        with st.spinner("Melatih model gabungan..."):
+            data_hist, _ = cache_saham.ambil_banyak(list(portofolio))
+            try:
+                prediksi_rf = prakiraan_rf.prediksi({t: hist for t, (hist, _) in data_hist.items() if not hist.empty})
+            except Exception as e:
+                st.warning(f"Prediksi Random Forest gagal: {str(e)}")
+                prediksi_rf = pd.DataFrame()
+        if not prediksi_rf.empty:
+            st.write("Prediksi harga dalam N hari bursa ke depan")
+            st.dataframe(prediksi_rf.apply(lambda kolom: kolom.map(format_rupiah)), use_container_width=True)
+
+    # Prediksi LSTM hari bursa berikutnya dari bobot per ticker yang sudah dilatih
+    if prakiraan_lstm.KERAS_ENABLED and st.button("🧠 Prediksi LSTM"):
+        with st.spinner("Memuat bobot LSTM..."):
+            data_hist, _ = cache_saham.ambil_banyak(list(portofolio))
+            prediksi_lstm = prediksi_harga_lstm({t: hist for t, (hist, _) in data_hist.items() if not hist.empty})
+        if prediksi_lstm:
+            belum_dilatih = [penyimpanan_portofolio.kode_idx(t) for t, p in prediksi_lstm.items() if p is None]
+            st.dataframe(pd.DataFrame([
+                {'Kode Saham': penyimpanan_portofolio.kode_idx(t), 'Prediksi Besok': format_rupiah(p)}
+                for t, p in prediksi_lstm.items() if p is not None
+            ]), use_container_width=True)
+            if belum_dilatih:
+                st.info(f"Belum ada bobot LSTM untuk {', '.join(belum_dilatih)}; jalankan `python prakiraan_lstm.py`.")
 else:
     st.info("Portofolio kosong. Silakan masukkan data di sidebar.")
 
@@ -183,7 +201,7 @@ def format_rupiah(x):
 st.title("📈 Aplikasi Analisis Saham Kurokishi")
 st.write("Selamat datang! Silakan eksplorasi fitur analisis saham di bawah.")
 
-portofolio = st.session_state.portofolio
+portofolio = muat_portofolio(akun)
 
 # Dummy total nilai awal
 total_nilai = 100_000_000
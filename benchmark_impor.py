@@ -0,0 +1,99 @@
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# ======== Benchmark Waktu Startup (python -X importtime) ========
+# Import tingkat modul dari setiap aplikasi Streamlit dijalankan di proses baru dengan
+# -X importtime, lalu waktu kumulatif tiap paket tingkat atas dijumlahkan. Hasil bisa
+# ditambahkan ke file JSONL agar perubahannya bisa dipantau dari commit ke commit.
+APLIKASI = ("main.py", "Main01.py", "app.py")
+DEPENDENCY_BERAT = ("prophet", "sklearn", "yfinance", "matplotlib", "tensorflow", "keras", "ta", "bs4")
+DIREKTORI = os.path.dirname(os.path.abspath(__file__))
+
+def import_tingkat_modul(path):
+    # Pernyataan import di tingkat modul (termasuk di dalam try/if tingkat atas) sebagai kode sumber
+    with open(path, "r", encoding="utf-8") as f:
+        pohon = ast.parse(f.read(), filename=path)
+    baris = []
+    antrian = list(pohon.body)
+    while antrian:
+        node = antrian.pop(0)
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            baris.append(ast.unparse(node))
+        elif isinstance(node, ast.Try):
+            antrian[:0] = node.body
+        elif isinstance(node, ast.If) and not _blok_main(node):
+            antrian[:0] = node.body
+    return baris
+
+def _blok_main(node):
+    # `if __name__ == "__main__":` hanya berjalan saat skrip dieksekusi langsung
+    return "__name__" in ast.unparse(node.test)
+
+def ukur(kode):
+    # -> (detik wall-clock proses, {paket tingkat atas: detik kumulatif}, {semua modul yang di-import})
+    mulai = time.perf_counter()
+    hasil = subprocess.run([sys.executable, "-X", "importtime", "-c", kode],
+                           cwd=DIREKTORI, capture_output=True, text=True)
+    durasi = time.perf_counter() - mulai
+    if hasil.returncode != 0:
+        raise RuntimeError(hasil.stderr.strip().splitlines()[-1] if hasil.stderr else "import gagal")
+    paket, semua = {}, set()
+    for baris in hasil.stderr.splitlines():
+        if not baris.startswith("import time:") or "imported package" in baris:
+            continue
+        _, kumulatif, nama = baris[len("import time:"):].split("|")
+        semua.add(nama.strip().partition(".")[0])
+        # Paket tingkat atas tidak diindentasi; submodul diindentasi sesuai kedalaman
+        if nama.startswith("  "):
+            continue
+        paket[nama.strip()] = int(kumulatif) / 1e6
+    return durasi, paket, semua
+
+def benchmark(path, ulang=3):
+    kode = "\n".join(import_tingkat_modul(path))
+    pengukuran = [ukur(kode) for _ in range(ulang)]
+    total = [sum(paket.values()) for _, paket, _ in pengukuran]
+    # Ambil putaran dengan total median agar tidak terpengaruh cache disk putaran pertama
+    _, paket, semua = sorted(pengukuran, key=lambda p: sum(p[1].values()))[len(pengukuran) // 2]
+    return {
+        'total_detik': statistics.median(total),
+        'proses_detik': statistics.median(d for d, _, _ in pengukuran),
+        'terberat': sorted(paket.items(), key=lambda x: -x[1])[:8],
+        'berat_dimuat': [nama for nama in DEPENDENCY_BERAT if nama in semua],
+    }
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIREKTORI,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ukur waktu import startup aplikasi Streamlit")
+    parser.add_argument("aplikasi", nargs="*", default=list(APLIKASI))
+    parser.add_argument("--ulang", type=int, default=3, help="Jumlah putaran per aplikasi (diambil median)")
+    parser.add_argument("--simpan", metavar="JSONL", help="Tambahkan hasil ke file riwayat, mis. riwayat_startup.jsonl")
+    args = parser.parse_args()
+
+    catatan = {'tanggal': datetime.now().isoformat(timespec="seconds"), 'commit': _commit(),
+               'python': sys.version.split()[0], 'aplikasi': {}}
+    for nama in args.aplikasi:
+        hasil = benchmark(os.path.join(DIREKTORI, nama), args.ulang)
+        catatan['aplikasi'][nama] = hasil
+        print(f"{nama}: import {hasil['total_detik']:.2f} s (proses {hasil['proses_detik']:.2f} s), "
+              f"dependency berat dimuat: {', '.join(hasil['berat_dimuat']) or '-'}")
+        for paket, detik in hasil['terberat']:
+            print(f"    {paket:30} {detik:6.3f} s")
+
+    if args.simpan:
+        with open(args.simpan, "a", encoding="utf-8") as f:
+            f.write(json.dumps(catatan) + "\n")
+        print(f"Hasil ditambahkan ke {args.simpan}")
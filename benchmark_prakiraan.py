@@ -0,0 +1,90 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import penyedia_data
+import prakiraan_lstm
+import prakiraan_prophet
+import prakiraan_rf
+
+# ======== Benchmark Forecaster: Random Forest vs LSTM vs Prophet ========
+# Setiap ticker dipotong h bar terakhir sebagai data uji; semua mesin dilatih pada sisa
+# data lalu diukur MAPE prediksi harga h bar ke depan dan latensinya (latih + prediksi).
+
+def mape(aktual, prediksi):
+    aktual, prediksi = np.asarray(aktual, dtype="float64"), np.asarray(prediksi, dtype="float64")
+    valid = np.isfinite(prediksi)
+    if not valid.any():
+        return float("nan")
+    return float(np.mean(np.abs(prediksi[valid] / aktual[valid] - 1)) * 100)
+
+def uji_rf(latih, uji, h):
+    mulai = time.perf_counter()
+    hasil = prakiraan_rf.prediksi(latih, model=prakiraan_rf.latih(latih))
+    durasi = time.perf_counter() - mulai
+    return hasil[f"H+{h}"].reindex(list(uji)).to_numpy(), durasi
+
+def uji_lstm(latih, uji, h, cache_dir):
+    # LSTM hanya memprediksi satu bar ke depan; horizon > 1 diprediksi berulang. Model dilatih
+    # sekali pada langkah pertama; langkah berikutnya memakai bobot itu (data bertambah satu
+    # bar prediksi, bukan data baru), sehingga latensi setara latih + prediksi mesin lain
+    if not prakiraan_lstm.KERAS_ENABLED:
+        return None, None
+    mulai = time.perf_counter()
+    close = {t: df["Close"].to_numpy(dtype="float64") for t, df in latih.items()}
+    for langkah in range(h):
+        berikut = prakiraan_lstm.prediksi_banyak(close, latih_jika_perlu=langkah == 0, cache_dir=cache_dir)
+        close = {t: np.append(c, berikut[t]) for t, c in close.items()}
+    durasi = time.perf_counter() - mulai
+    return np.array([close[t][-1] for t in uji]), durasi
+
+def uji_prophet(latih, uji, h):
+    if not prakiraan_prophet.PROPHET_ENABLED:
+        return None, None
+    mulai = time.perf_counter()
+    hasil = []
+    for ticker, df in latih.items():
+        model = prakiraan_prophet.Prophet(**prakiraan_prophet.PARAMETER_CEPAT)
+        model.fit(prakiraan_prophet.siapkan_data(df))
+        tanggal = prakiraan_prophet.siapkan_data(uji[ticker].iloc[[h - 1]])[['ds']]
+        hasil.append(float(model.predict(tanggal)['yhat'].iloc[0]))
+    durasi = time.perf_counter() - mulai
+    return np.array(hasil), durasi
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description="Bandingkan latensi dan galat Random Forest, LSTM dan Prophet")
+    parser.add_argument("--ticker", type=int, default=20, help="Jumlah ticker sintetis")
+    parser.add_argument("--horizon", type=int, default=5, choices=prakiraan_rf.HORIZON)
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--penyedia", default="sintetis", help="Sumber data, lihat penyedia_data.PENYEDIA_DATA")
+    parser.add_argument("--lstm-cache-dir", default="cache_lstm_benchmark")
+    args = parser.parse_args()
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    penyedia = penyedia_data.dapatkan_penyedia(args.penyedia)
+    tickers = [f"T{i:03d}.JK" for i in range(args.ticker)]
+    data = {t: penyedia.riwayat(t, period=args.period) for t in tickers}
+    h = args.horizon
+    latih = {t: df.iloc[:-h] for t, df in data.items()}
+    uji = {t: df.iloc[-h:] for t, df in data.items()}
+    aktual = np.array([uji[t]["Close"].iloc[-1] for t in tickers])
+    naif = np.array([latih[t]["Close"].iloc[-1] for t in tickers])
+
+    baris = [{'Mesin': 'Naif (harga terakhir)', 'MAPE (%)': mape(aktual, naif), 'Latensi (s)': 0.0}]
+    for nama, fungsi in (
+        ("Random Forest (gabungan)", lambda: uji_rf(latih, uji, h)),
+        ("LSTM (per ticker)", lambda: uji_lstm(latih, tickers, h, args.lstm_cache_dir)),
+        ("Prophet mode cepat (per ticker)", lambda: uji_prophet(latih, uji, h)),
+    ):
+        prediksi, durasi = fungsi()
+        if prediksi is None:
+            baris.append({'Mesin': nama, 'MAPE (%)': None, 'Latensi (s)': None, 'Catatan': 'tidak terinstall'})
+            continue
+        baris.append({'Mesin': nama, 'MAPE (%)': mape(aktual, prediksi), 'Latensi (s)': durasi})
+
+    print(f"{args.ticker} ticker, horizon {h} bar, data {args.period} ({args.penyedia})")
+    print(pd.DataFrame(baris).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
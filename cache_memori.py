@@ -0,0 +1,116 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# ======== Cache Memori Bersama Antar Sesi ========
+# Modul Python hanya diimpor sekali per proses server Streamlit, sehingga objek
+# di registri ini dipakai bersama oleh semua sesi/pengguna yang terhubung.
+_REGISTRI = {}
+_KUNCI_REGISTRI = threading.Lock()
+
+class CacheBersama:
+    def __init__(self, ttl_detik=3600, maks_entri=256, basi_detik=0):
+        self.ttl_detik = ttl_detik
+        self.maks_entri = maks_entri
+        self.basi_detik = basi_detik        # Jendela stale-while-revalidate setelah TTL habis
+        self._data = OrderedDict()          # kunci -> (waktu_simpan, nilai), urutan = LRU
+        self._kunci = threading.Lock()
+        # kunci -> Lock agar satu kunci hanya dimuat sekali; referensi lemah sehingga Lock
+        # hilang sendiri begitu tidak ada pemuat yang memegangnya (tidak tumbuh tanpa batas)
+        self._kunci_muat = weakref.WeakValueDictionary()
+        self._diperbarui = set()            # kunci yang sedang diperbarui di latar belakang
+        self.statistik = {'hit': 0, 'miss': 0, 'basi': 0, 'galat_latar': 0}
+
+    def _simpan(self, kunci, nilai):
+        with self._kunci:
+            self._data[kunci] = (time.monotonic(), nilai)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.maks_entri:
+                self._data.popitem(last=False)
+
+    def _cari(self, kunci):
+        # Kembalikan (status, nilai) dengan status "segar", "basi" atau None
+        with self._kunci:
+            entri = self._data.get(kunci)
+            if entri is None:
+                return None, None
+            umur = time.monotonic() - entri[0]
+            if umur < self.ttl_detik:
+                self._data.move_to_end(kunci)
+                return "segar", entri[1]
+            if umur < self.ttl_detik + self.basi_detik:
+                self._data.move_to_end(kunci)
+                return "basi", entri[1]
+            return None, None
+
+    def _catat(self, nama):
+        with self._kunci:
+            self.statistik[nama] += 1
+
+    def _kunci_untuk(self, kunci):
+        with self._kunci:
+            kunci_muat = self._kunci_muat.get(kunci)
+            if kunci_muat is None:
+                kunci_muat = self._kunci_muat[kunci] = threading.Lock()
+            return kunci_muat
+
+    def _perbarui_latar(self, kunci, fungsi_muat):
+        with self._kunci:
+            if kunci in self._diperbarui:
+                return
+            self._diperbarui.add(kunci)
+
+        def tugas():
+            try:
+                with self._kunci_untuk(kunci):
+                    self._simpan(kunci, fungsi_muat())
+            except Exception:
+                # Data basi tetap disajikan; coba lagi pada akses berikutnya
+                self._catat('galat_latar')
+            finally:
+                with self._kunci:
+                    self._diperbarui.discard(kunci)
+
+        threading.Thread(target=tugas, name=f"perbarui-{kunci}", daemon=True).start()
+
+    def ambil(self, kunci, fungsi_muat):
+        status, nilai = self._cari(kunci)
+        if status == "segar":
+            self._catat('hit')
+            return nilai
+        if status == "basi":
+            self._catat('basi')
+            self._perbarui_latar(kunci, fungsi_muat)
+            return nilai
+
+        # Cache miss: sesi lain yang meminta kunci yang sama menunggu hasil muat pertama
+        with self._kunci_untuk(kunci):
+            status, nilai = self._cari(kunci)
+            if status is not None:
+                self._catat('hit')
+                return nilai
+            self._catat('miss')
+            nilai = fungsi_muat()
+            self._simpan(kunci, nilai)
+            return nilai
+
+    def ada(self, kunci):
+        # True jika kunci tersimpan (segar atau masih dalam jendela basi), tanpa memuat
+        return self._cari(kunci)[0] is not None
+
+    def hapus(self, kunci=None):
+        with self._kunci:
+            if kunci is None:
+                self._data.clear()
+            else:
+                self._data.pop(kunci, None)
+
+    def __len__(self):
+        return len(self._data)
+
+def cache_proses(nama, **kwargs):
+    with _KUNCI_REGISTRI:
+        if nama not in _REGISTRI:
+            _REGISTRI[nama] = CacheBersama(**kwargs)
+        return _REGISTRI[nama]
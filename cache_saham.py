@@ -0,0 +1,526 @@
+import os
+import json
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import impor_malas
+import penyedia_data
+from sinkronisasi import SingleFlight, kunci_file, tulis_atomik
+
+# pyarrow cukup diperiksa keberadaannya; pandas meng-import-nya saat parquet dibaca/ditulis
+PYARROW_ENABLED = impor_malas.tersedia("pyarrow")
+
+# ======== Konfigurasi Cache ========
+JENDELA_HARI = 365      # Panjang jendela bergulir riwayat harga (setara period="1y")
+TTL_INFO_JAM = 24       # Info fundamental jarang berubah, cukup diambil sehari sekali
+
+# Format penyimpanan riwayat: "parquet", "feather" (biner, butuh pyarrow) atau "csv"
+FORMAT_CACHE = os.environ.get("CACHE_FORMAT", "parquet" if PYARROW_ENABLED else "csv").lower()
+EKSTENSI_FORMAT = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+KOLOM_FLOAT32 = ["Open", "High", "Low", "Close", "Dividends", "Stock Splits", "Capital Gains"]
+
+# Jumlah maksimum unduhan paralel saat memperbarui banyak ticker sekaligus
+MAKS_PEKERJA = int(os.environ.get("CACHE_MAKS_PEKERJA", "8"))
+
+# Anggaran ukuran direktori cache; ticker yang paling lama tidak diakses digusur duluan
+MAKS_BYTE_CACHE = int(float(os.environ.get("CACHE_MAKS_MB", "500")) * 1024 * 1024)
+JEDA_CEK_ANGGARAN_DETIK = 60
+
+# ======== Statistik Cache ========
+_KUNCI_STATISTIK = threading.Lock()
+STATISTIK = {
+    'hit': 0,           # Cache segar langsung dipakai
+    'miss': 0,          # Belum ada cache sama sekali
+    'basi': 0,          # Cache ada tetapi kedaluwarsa, diperbarui dengan delta
+    'byte_dibaca': 0,
+    'unduh_penuh': 0,
+    'unduh_delta': 0,
+    'gagal_unduh': 0,   # Unduhan gagal; data lama (jika ada) disajikan tanpa diperpanjang TTL-nya
+    'digusur': 0,       # Ticker yang dihapus karena melebihi anggaran ukuran
+}
+
+def _catat(nama, jumlah=1):
+    with _KUNCI_STATISTIK:
+        STATISTIK[nama] += jumlah
+
+def statistik_cache():
+    with _KUNCI_STATISTIK:
+        hasil = dict(STATISTIK)
+    total = hasil['hit'] + hasil['miss'] + hasil['basi']
+    hasil['hit_rate'] = hasil['hit'] / total if total else 0.0
+    return hasil
+
+# ======== Fungsi Pembantu File Cache ========
+def format_aktif(format_cache=None):
+    format_cache = (format_cache or FORMAT_CACHE).lower()
+    if format_cache not in EKSTENSI_FORMAT:
+        raise ValueError(f"Format cache tidak dikenal: {format_cache}")
+    if format_cache != "csv" and not PYARROW_ENABLED:
+        return "csv"
+    return format_cache
+
+def path_cache(ticker, cache_dir="cache", format_cache=None):
+    format_cache = format_aktif(format_cache)
+    return {
+        'format': format_cache,
+        'hist': os.path.join(cache_dir, f"{ticker}_hist{EKSTENSI_FORMAT[format_cache]}"),
+        'hist_csv': os.path.join(cache_dir, f"{ticker}_hist.csv"),
+        'info': os.path.join(cache_dir, f"{ticker}_info.json"),
+        'meta': os.path.join(cache_dir, f"{ticker}_meta.json"),
+        'indikator': os.path.join(cache_dir, f"{ticker}_indikator{EKSTENSI_FORMAT[format_cache]}"),
+        'status_indikator': os.path.join(cache_dir, f"{ticker}_indstatus.json"),
+        'lock': os.path.join(cache_dir, f"{ticker}.lock"),
+    }
+
+def cache_valid(path, ttl_jam):
+    if not os.path.exists(path):
+        return False
+    umur = datetime.now() - datetime.fromtimestamp(os.path.getmtime(path))
+    return umur < timedelta(hours=ttl_jam)
+
+def _baca_json(path, default=None):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def _tulis_json(path, data, indent=None):
+    with tulis_atomik(path) as tmp:
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=indent, default=str)
+
+def _normalisasi_index(index, tz=None):
+    # CSV tidak menyimpan nama zona waktu, hanya offset. Simpan nama zona di meta
+    # agar index yang dibaca ulang sama persis dengan keluaran yfinance.
+    if tz:
+        return pd.to_datetime(index, utc=True).tz_convert(tz)
+    try:
+        return pd.to_datetime(index)
+    except (ValueError, TypeError):
+        return pd.to_datetime(index, utc=True)
+
+def siapkan_tipe(hist):
+    # Harga cukup float32 (presisi ~7 digit), Volume tetap bilangan bulat
+    hist = hist.copy()
+    for kolom in KOLOM_FLOAT32:
+        if kolom in hist.columns:
+            hist[kolom] = hist[kolom].astype("float32")
+    if "Volume" in hist.columns:
+        hist["Volume"] = hist["Volume"].fillna(0).astype("int64")
+    hist.index.name = "Date"
+    return hist
+
+def _baca_csv(path, meta, kolom=None):
+    hist = pd.read_csv(path, index_col=0)
+    if kolom is not None:
+        hist = hist[kolom]
+    hist.index = _normalisasi_index(hist.index, meta.get('tz'))
+    hist.index.name = "Date"
+    return hist
+
+def _baca_biner(path, format_cache, kolom=None):
+    # Parquet/Feather menyimpan tipe kolom dan index bertimezone apa adanya, tanpa parsing
+    if format_cache == "parquet":
+        return pd.read_parquet(path, columns=kolom)
+    return pd.read_feather(path, columns=None if kolom is None else ["Date", *kolom]).set_index("Date")
+
+def _tulis_biner(path, hist, format_cache):
+    if format_cache == "parquet":
+        hist.to_parquet(path)
+    else:
+        hist.reset_index().to_feather(path)
+
+def perlu_migrasi(paths):
+    return paths['format'] != "csv" and not os.path.exists(paths['hist']) and os.path.exists(paths['hist_csv'])
+
+def migrasi_csv(paths):
+    # Migrasi satu kali: cache CSV lama diubah ke format biner lalu dihapus
+    meta = _baca_json(paths['meta'], {}) or {}
+    hist = siapkan_tipe(_baca_csv(paths['hist_csv'], meta))
+    with tulis_atomik(paths['hist']) as tmp:
+        _tulis_biner(tmp, hist, paths['format'])
+    os.utime(paths['hist'], (os.path.getatime(paths['hist_csv']), os.path.getmtime(paths['hist_csv'])))
+    os.remove(paths['hist_csv'])
+    return hist
+
+def baca_riwayat(paths, kolom=None):
+    # kolom: daftar kolom yang dibaca (mis. ["Close"]); format biner hanya membaca kolom itu
+    meta = _baca_json(paths['meta'], {}) or {}
+    if os.path.exists(paths['hist']):
+        if paths['format'] == "csv":
+            return _baca_csv(paths['hist'], meta, kolom)
+        return _baca_biner(paths['hist'], paths['format'], kolom)
+    if os.path.exists(paths['hist_csv']):
+        # Belum dimigrasi: tetap bisa dibaca, migrasi dilakukan saat memegang kunci
+        return _baca_csv(paths['hist_csv'], meta, kolom)
+    return pd.DataFrame()
+
+def tulis_riwayat(paths, hist):
+    with tulis_atomik(paths['hist']) as tmp:
+        if paths['format'] == "csv":
+            hist.to_csv(tmp)
+        else:
+            _tulis_biner(tmp, hist, paths['format'])
+    _tulis_json(paths['meta'], {
+        'terakhir': hist.index.max().isoformat(),
+        'tz': str(hist.index.tz) if hist.index.tz is not None else None,
+        'jumlah_bar': len(hist),
+        'diperbarui': datetime.now().isoformat(),
+    })
+
+# ======== Pengambilan Delta ========
+def gabung_riwayat(lama, baru, jendela_hari=JENDELA_HARI):
+    if lama.empty:
+        gabungan = baru
+    elif baru.empty:
+        gabungan = lama
+    else:
+        if baru.index.tz is not None and lama.index.tz is not None:
+            lama = lama.tz_convert(baru.index.tz)
+        gabungan = pd.concat([lama, baru])
+        # Bar terakhir di cache bisa jadi bar intraday yang belum final, versi baru menang
+        gabungan = gabungan[~gabungan.index.duplicated(keep="last")].sort_index()
+    if gabungan.empty:
+        return gabungan
+    batas = gabungan.index.max() - pd.Timedelta(days=jendela_hari)
+    return gabungan[gabungan.index > batas]
+
+def _ada_aksi_korporasi(baru, sejak):
+    # Dividen/split baru membuat yfinance menyesuaikan ulang seluruh harga historis,
+    # sehingga potongan lama di cache tidak lagi sebanding dan harus diunduh penuh.
+    baru = baru[baru.index > sejak]
+    for kolom in ("Dividends", "Stock Splits"):
+        if kolom in baru.columns and (baru[kolom].fillna(0) != 0).any():
+            return True
+    return False
+
+def ambil_riwayat_delta(penyedia, ticker, lama, jendela_hari=JENDELA_HARI):
+    if lama.empty:
+        return penyedia.riwayat(ticker, period="1y", interval="1d"), "penuh"
+
+    terakhir = lama.index.max()
+    sekarang = pd.Timestamp.now(tz=terakhir.tz)
+    if sekarang - terakhir > pd.Timedelta(days=jendela_hari):
+        return penyedia.riwayat(ticker, period="1y", interval="1d"), "penuh"
+
+    # Ambil mulai dari tanggal bar terakhir agar bar yang belum final ikut diperbarui
+    baru = penyedia.riwayat(ticker, start=terakhir.strftime("%Y-%m-%d"), interval="1d")
+    if _ada_aksi_korporasi(baru, terakhir):
+        return penyedia.riwayat(ticker, period="1y", interval="1d"), "penuh"
+    return gabung_riwayat(lama, baru, jendela_hari), "delta"
+
+# ======== Fungsi Utama Cache ========
+# Satu unduhan per ticker dalam proses ini; pemanggil lain menunggu hasilnya
+_SINGLE_FLIGHT = SingleFlight()
+
+def _muat_cache(paths):
+    try:
+        lama = baca_riwayat(paths)
+    except Exception:
+        # Cache rusak: abaikan dan unduh ulang penuh
+        lama = pd.DataFrame()
+    info = _baca_json(paths['info'], {}) or {}
+    _catat('byte_dibaca', sum(os.path.getsize(p) for p in (paths['hist'], paths['hist_csv'], paths['info'])
+                              if os.path.exists(p)))
+    return lama, info
+
+def _tandai_akses(paths):
+    # Waktu akses terakhir disimpan sebagai mtime file kunci, bukan atime file data:
+    # atime sering dimatikan (noatime) dan mtime file data dipakai untuk TTL.
+    with open(paths['lock'], "a"):
+        pass
+    os.utime(paths['lock'])
+
+def _cache_segar(paths, lama, ttl_jam, ttl_info_jam):
+    return (not lama.empty and not perlu_migrasi(paths)
+            and cache_valid(paths['hist'], ttl_jam) and cache_valid(paths['info'], ttl_info_jam))
+
+def _perbarui_cache(ticker, paths, ttl_jam, ttl_info_jam, jendela_hari, sajikan_basi=True):
+    # Kunci file membuat proses worker lain di host yang sama menunggu, lalu
+    # memakai hasil unduhan proses pertama alih-alih mengunduh ulang.
+    with kunci_file(paths['lock']):
+        if perlu_migrasi(paths):
+            migrasi_csv(paths)
+        lama, info = _muat_cache(paths)
+        if _cache_segar(paths, lama, ttl_jam, ttl_info_jam):
+            return lama, info
+
+        penyedia = penyedia_data.dapatkan_penyedia()
+        hist = lama
+        if lama.empty or not cache_valid(paths['hist'], ttl_jam):
+            try:
+                hist, mode = ambil_riwayat_delta(penyedia, ticker, lama, jendela_hari)
+                _catat(f"unduh_{mode}")
+            except Exception:
+                # Jaringan gagal tetapi masih ada data lama: sajikan data lama tanpa menyentuh
+                # mtime, sehingga akses berikutnya mencoba lagi
+                _catat('gagal_unduh')
+                if lama.empty or not sajikan_basi:
+                    raise
+                return lama, info
+            if hist.empty and not lama.empty:
+                hist = lama
+            if hist is lama and not lama.empty:
+                # Unduhan berhasil tanpa bar baru (libur bursa): cukup tandai cache masih segar
+                os.utime(paths['hist'])
+            elif not hist.empty:
+                if paths['format'] != "csv":
+                    hist = siapkan_tipe(hist)
+                tulis_riwayat(paths, hist)
+
+        if not cache_valid(paths['info'], ttl_info_jam):
+            try:
+                info = penyedia.info(ticker)
+                _tulis_json(paths['info'], info, indent=2 if paths['format'] == "csv" else None)
+            except Exception:
+                pass
+
+        return hist, info
+
+def ambil_data(ticker, cache_dir="cache", ttl_jam=1, ttl_info_jam=TTL_INFO_JAM, jendela_hari=JENDELA_HARI,
+               format_cache=None, sajikan_basi=True):
+    # sajikan_basi=False: galat unduhan diteruskan walau ada data lama (dipakai prefetch untuk backoff)
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = path_cache(ticker, cache_dir, format_cache)
+
+    lama, info = _muat_cache(paths)
+    _tandai_akses(paths)
+    if _cache_segar(paths, lama, ttl_jam, ttl_info_jam):
+        _catat('hit')
+        return lama, info
+
+    _catat('miss' if lama.empty else 'basi')
+    hasil = _SINGLE_FLIGHT.jalankan(
+        (os.path.abspath(paths['hist']), sajikan_basi),
+        lambda: _perbarui_cache(ticker, paths, ttl_jam, ttl_info_jam, jendela_hari, sajikan_basi),
+    )
+    pengelola_cache(cache_dir).tegakkan_anggaran_berkala()
+    return hasil
+
+# ======== Pengambilan Banyak Ticker ========
+def ambil_banyak(tickers, maks_pekerja=MAKS_PEKERJA, **kwargs):
+    # Kembalikan {ticker: (hist, info)} untuk semua ticker dan {ticker: pesan} untuk yang gagal
+    tickers = list(dict.fromkeys(tickers))
+    hasil, galat = {}, {}
+    if not tickers:
+        return hasil, galat
+
+    with ThreadPoolExecutor(max_workers=max(1, min(maks_pekerja, len(tickers)))) as pool:
+        futures = {pool.submit(ambil_data, ticker, **kwargs): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                hist, info = future.result()
+                if hist.empty:
+                    galat[ticker] = "Data historis kosong"
+            except Exception as e:
+                hist, info = pd.DataFrame(), {}
+                galat[ticker] = str(e)
+            hasil[ticker] = (hist, info)
+
+    return {ticker: hasil[ticker] for ticker in tickers}, galat
+
+# ======== Pengelola Direktori Cache ========
+def _ticker_dari_nama(nama):
+    if nama.endswith(".lock"):
+        return nama[:-len(".lock")]
+    if nama.endswith(".tmp"):
+        return None
+    return nama.rsplit("_", 1)[0] if "_" in nama else None
+
+class PengelolaCache:
+    def __init__(self, cache_dir="cache", maks_byte=MAKS_BYTE_CACHE):
+        self.cache_dir = cache_dir
+        self.maks_byte = maks_byte
+        self._cek_terakhir = 0.0
+        self._kunci = threading.Lock()
+
+    def entri(self):
+        # Kelompokkan file per ticker: {ticker: {'file': [...], 'byte': n, 'akses': ts}}
+        hasil = {}
+        if not os.path.isdir(self.cache_dir):
+            return hasil
+        for nama in os.listdir(self.cache_dir):
+            ticker = _ticker_dari_nama(nama)
+            if ticker is None:
+                continue
+            path = os.path.join(self.cache_dir, nama)
+            try:
+                st_file = os.stat(path)
+            except OSError:
+                continue
+            entri = hasil.setdefault(ticker, {'file': [], 'byte': 0, 'akses': 0.0, 'data': False})
+            entri['file'].append(path)
+            entri['data'] = entri['data'] or not nama.endswith(".lock")
+            entri['byte'] += st_file.st_size
+            if nama.endswith(".lock"):
+                entri['akses'] = max(entri['akses'], st_file.st_mtime)
+            elif not entri['akses']:
+                entri['akses'] = st_file.st_mtime
+        return hasil
+
+    def ukuran(self):
+        return sum(e['byte'] for e in self.entri().values())
+
+    def _hapus_ticker(self, ticker, file):
+        # Hapus file data sambil memegang kunci ticker; file .lock sendiri dibiarkan
+        # agar proses yang sedang menunggu kunci tetap memakai inode yang sama.
+        path_lock = os.path.join(self.cache_dir, f"{ticker}.lock")
+        try:
+            with kunci_file(path_lock, batas_waktu=0):
+                for path in file:
+                    if not path.endswith(".lock") and os.path.exists(path):
+                        os.remove(path)
+            return True
+        except Exception:
+            return False
+
+    def tegakkan_anggaran(self, target=0.9):
+        entri = self.entri()
+        total = sum(e['byte'] for e in entri.values())
+        if total <= self.maks_byte:
+            return 0
+        # Gusur hingga di bawah 90% anggaran agar tidak menggusur lagi di setiap tulis
+        batas = self.maks_byte * target
+        digusur = 0
+        for ticker, e in sorted(entri.items(), key=lambda item: item[1]['akses']):
+            if total <= batas:
+                break
+            if e['data'] and self._hapus_ticker(ticker, e['file']):
+                total -= e['byte']
+                digusur += 1
+        _catat('digusur', digusur)
+        return digusur
+
+    def tegakkan_anggaran_berkala(self):
+        with self._kunci:
+            sekarang = time.monotonic()
+            if sekarang - self._cek_terakhir < JEDA_CEK_ANGGARAN_DETIK:
+                return 0
+            self._cek_terakhir = sekarang
+        return self.tegakkan_anggaran()
+
+    def kompaksi(self, umur_tmp_detik=3600):
+        # Bersihkan sisa tulis yang gagal, CSV yatim, file kunci tanpa data, lalu tegakkan anggaran
+        dihapus = 0
+        sekarang = time.time()
+        if not os.path.isdir(self.cache_dir):
+            return dihapus
+        for nama in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, nama)
+            if nama.endswith(".tmp") and sekarang - os.path.getmtime(path) > umur_tmp_detik:
+                os.remove(path)
+                dihapus += 1
+        for ticker, e in self.entri().items():
+            paths = path_cache(ticker, self.cache_dir)
+            if paths['format'] != "csv" and os.path.exists(paths['hist']) and os.path.exists(paths['hist_csv']):
+                os.remove(paths['hist_csv'])
+                dihapus += 1
+            if not e['data'] and sekarang - e['akses'] > 24 * 3600:
+                os.remove(paths['lock'])
+                dihapus += 1
+        self.tegakkan_anggaran()
+        return dihapus
+
+    def purge(self, lebih_dari_hari=None):
+        # Hapus semua ticker, atau hanya yang tidak diakses lebih dari N hari
+        dihapus = 0
+        batas = time.time() - lebih_dari_hari * 86400 if lebih_dari_hari is not None else None
+        for ticker, e in self.entri().items():
+            if not e['data'] or (batas is not None and e['akses'] > batas):
+                continue
+            if self._hapus_ticker(ticker, e['file']):
+                dihapus += 1
+        return dihapus
+
+_PENGELOLA = {}
+
+def pengelola_cache(cache_dir="cache"):
+    with _KUNCI_STATISTIK:
+        if cache_dir not in _PENGELOLA:
+            _PENGELOLA[cache_dir] = PengelolaCache(cache_dir)
+        return _PENGELOLA[cache_dir]
+
+# ======== Benchmark Format Cache ========
+def daftar_ticker(cache_dir="cache"):
+    if not os.path.isdir(cache_dir):
+        return []
+    return sorted(nama[:-len("_meta.json")] for nama in os.listdir(cache_dir) if nama.endswith("_meta.json"))
+
+def benchmark_format(cache_dir="cache", ulang=20):
+    # Semua pembacaan dan penulisan dilakukan pada salinan di direktori sementara;
+    # cache aktif (termasuk file CSV yang belum dimigrasi) tidak disentuh sama sekali
+    import shutil
+    import tempfile
+
+    hasil = []
+    with tempfile.TemporaryDirectory() as tmp:
+        sumber_dir = os.path.join(tmp, "sumber")
+        os.makedirs(sumber_dir)
+        for ticker in daftar_ticker(cache_dir):
+            asli, salinan = path_cache(ticker, cache_dir), path_cache(ticker, sumber_dir)
+            for kunci in ('hist', 'hist_csv', 'meta'):
+                if os.path.exists(asli[kunci]):
+                    shutil.copy2(asli[kunci], salinan[kunci])
+            try:
+                hist = baca_riwayat(salinan)
+            except Exception:
+                continue
+            if hist.empty:
+                continue
+            meta = _baca_json(salinan['meta'], {})
+            for format_cache in EKSTENSI_FORMAT:
+                if format_aktif(format_cache) != format_cache:
+                    continue
+                paths = path_cache(ticker, os.path.join(tmp, format_cache), format_cache)
+                os.makedirs(os.path.dirname(paths['hist']), exist_ok=True)
+                _tulis_json(paths['meta'], meta)
+                tulis_riwayat(paths, hist if format_cache == "csv" else siapkan_tipe(hist))
+                mulai = time.perf_counter()
+                for _ in range(ulang):
+                    baca_riwayat(paths)
+                hasil.append({
+                    'ticker': ticker,
+                    'format': format_cache,
+                    'baca_ms': (time.perf_counter() - mulai) / ulang * 1000,
+                    'ukuran_kb': os.path.getsize(paths['hist']) / 1024,
+                })
+    return pd.DataFrame(hasil)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Utilitas cache data saham")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+    bench = sub.add_parser("bench", help="Bandingkan kecepatan baca tiap format cache")
+    bench.add_argument("--cache-dir", default="cache")
+    bench.add_argument("--ulang", type=int, default=20)
+    for nama, bantuan in (("status", "Tampilkan ukuran dan isi cache"),
+                          ("kompaksi", "Bersihkan file sisa dan tegakkan anggaran ukuran"),
+                          ("purge", "Hapus isi cache")):
+        perintah = sub.add_parser(nama, help=bantuan)
+        perintah.add_argument("--cache-dir", default="cache")
+    sub.choices["purge"].add_argument("--lebih-dari-hari", type=float, default=None,
+                                      help="Hanya hapus ticker yang tidak diakses selama N hari")
+    args = parser.parse_args()
+    pengelola = PengelolaCache(getattr(args, "cache_dir", "cache"))
+
+    if args.perintah == "bench":
+        df = benchmark_format(args.cache_dir, args.ulang)
+        if df.empty:
+            print("Cache kosong, jalankan aplikasi dulu untuk mengisi cache.")
+        else:
+            print(df.groupby("format")[["baca_ms", "ukuran_kb"]].mean().round(3).to_string())
+    elif args.perintah == "status":
+        entri = [e for e in pengelola.entri().values() if e['data']]
+        print(f"{len(entri)} ticker, {pengelola.ukuran() / 1024 / 1024:.2f} MB "
+              f"dari anggaran {pengelola.maks_byte / 1024 / 1024:.0f} MB")
+    elif args.perintah == "kompaksi":
+        print(f"{pengelola.kompaksi()} file sisa dihapus, ukuran kini "
+              f"{pengelola.ukuran() / 1024 / 1024:.2f} MB")
+    elif args.perintah == "purge":
+        print(f"{pengelola.purge(args.lebih_dari_hari)} ticker dihapus dari cache")
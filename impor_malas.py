@@ -0,0 +1,92 @@
+import importlib
+import importlib.metadata
+import importlib.util
+import threading
+import time
+
+# ======== Import Malas untuk Dependency Berat ========
+# Prophet, scikit-learn dan yfinance butuh 1-2 detik untuk di-import. Keberadaannya cukup
+# diperiksa lewat find_spec (tanpa mengeksekusi modul) sehingga flag *_ENABLED tetap bisa
+# ditampilkan saat startup; import sungguhan baru terjadi saat fitur pertama kali dipakai.
+STATISTIK = {}                  # nama modul -> durasi import pertama (detik)
+_KUNCI = threading.Lock()
+_TERSEDIA = {}                  # nama paket -> bool
+
+def tersedia(nama):
+    # True jika paket terinstall; hanya paket tingkat atas yang dicari agar find_spec tidak
+    # mengeksekusi paket induk (find_spec("sklearn.ensemble") meng-import sklearn)
+    paket = nama.partition(".")[0]
+    with _KUNCI:
+        if paket not in _TERSEDIA:
+            _TERSEDIA[paket] = importlib.util.find_spec(paket) is not None
+        return _TERSEDIA[paket]
+
+def versi(nama):
+    # Versi paket dari metadata instalasi, tanpa meng-import paketnya
+    try:
+        return importlib.metadata.version(nama)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def muat(nama):
+    # import_module dengan pencatatan durasi import pertama
+    with _KUNCI:
+        sudah = nama in STATISTIK
+    if sudah:
+        return importlib.import_module(nama)
+    mulai = time.perf_counter()
+    modul = importlib.import_module(nama)
+    with _KUNCI:
+        STATISTIK.setdefault(nama, time.perf_counter() - mulai)
+    return modul
+
+class ModulMalas:
+    # Pengganti modul: import terjadi saat atribut pertama kali diakses
+    def __init__(self, nama):
+        self._nama = nama
+        self._modul = None
+
+    def _muat(self):
+        if self._modul is None:
+            self._modul = muat(self._nama)
+        return self._modul
+
+    def __getattr__(self, atribut):
+        if atribut.startswith("__"):
+            raise AttributeError(atribut)
+        return getattr(self._muat(), atribut)
+
+    def __repr__(self):
+        status = "dimuat" if self._modul is not None else "belum dimuat"
+        return f"<ModulMalas {self._nama} ({status})>"
+
+class AtributMalas:
+    # Pengganti `from modul import atribut` (kelas/fungsi): dipanggil atau diakses -> import
+    def __init__(self, nama_modul, atribut):
+        self._nama_modul = nama_modul
+        self._atribut = atribut
+        self._objek = None
+
+    def _muat(self):
+        if self._objek is None:
+            self._objek = getattr(muat(self._nama_modul), self._atribut)
+        return self._objek
+
+    def __call__(self, *args, **kwargs):
+        return self._muat()(*args, **kwargs)
+
+    def __getattr__(self, atribut):
+        if atribut.startswith("__"):
+            raise AttributeError(atribut)
+        return getattr(self._muat(), atribut)
+
+    def __repr__(self):
+        status = "dimuat" if self._objek is not None else "belum dimuat"
+        return f"<AtributMalas {self._nama_modul}.{self._atribut} ({status})>"
+
+def modul(nama, cadangan=None):
+    # -> ModulMalas jika paket terinstall, selain itu `cadangan` (mis. DummyModule())
+    return ModulMalas(nama) if tersedia(nama) else cadangan
+
+def atribut(nama_modul, nama_atribut, cadangan=None):
+    return AtributMalas(nama_modul, nama_atribut) if tersedia(nama_modul) else cadangan
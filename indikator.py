@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+# ======== Mesin Indikator Teknikal Tervektorisasi ========
+# Semua indikator dihitung sekaligus pada panel tanggal × ticker (NumPy), dengan hasil
+# yang sama dengan library `ta` (RSIIndicator, MACD, SMAIndicator, fillna=False).
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGN = 12, 26, 9
+SMA_WINDOWS = (50, 200)
+
+def panel_harga(data, kolom="Close"):
+    # data: {ticker: DataFrame riwayat} -> DataFrame tanggal × ticker, sel kosong = NaN
+    seri = {ticker: df[kolom] for ticker, df in data.items() if df is not None and not df.empty and kolom in df}
+    if not seri:
+        return pd.DataFrame()
+    return pd.DataFrame(seri).sort_index().astype("float64")
+
+def kehadiran(data, panel):
+    # -> array bool tanggal × ticker: True jika tanggal itu ada di riwayat ticker sendiri.
+    # Membedakan celah kalender (tanggal milik ticker lain) dari Close NaN di data asli.
+    hadir = np.zeros(panel.shape, dtype=bool)
+    for j, ticker in enumerate(panel.columns):
+        hadir[panel.index.get_indexer(data[ticker].index), j] = True
+    return hadir
+
+def _rapatkan(nilai, hadir=None):
+    # Kalender bursa tiap ticker bisa berbeda. Geser baris milik tiap ticker ke bawah
+    # (urutan tetap) sehingga setiap kolom menjadi deret rapat seperti Series per ticker
+    # dan rekursi bisa berjalan baris demi baris untuk semua kolom sekaligus. NaN di dalam
+    # riwayat ticker sendiri tetap di tempatnya dan diperlakukan seperti di `ta`.
+    # Tanpa `hadir`, semua NaN dianggap celah kalender.
+    hadir = ~np.isnan(nilai) if hadir is None else hadir
+    urutan = np.argsort(hadir, axis=0, kind="stable")
+    return np.take_along_axis(nilai, urutan, axis=0), np.take_along_axis(hadir, urutan, axis=0), urutan
+
+def _kembalikan(nilai, urutan):
+    hasil = np.empty_like(nilai)
+    np.put_along_axis(hasil, urutan, nilai, axis=0)
+    return hasil
+
+def ema_panel(nilai, alpha, min_periods):
+    # Setara pandas .ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean() per kolom
+    # (ignore_na=False): pada NaN nilai terakhir diteruskan dan bobotnya terus meluruh
+    hasil = np.full(nilai.shape, np.nan)
+    status = np.full(nilai.shape[1], np.nan)
+    bobot = np.ones(nilai.shape[1])
+    jumlah = np.zeros(nilai.shape[1])
+    for t in range(nilai.shape[0]):
+        x = nilai[t]
+        valid = ~np.isnan(x)
+        mulai = ~np.isnan(status)
+        bobot = np.where(mulai, bobot * (1 - alpha), bobot)
+        baru = (bobot * status + alpha * x) / (bobot + alpha)
+        status = np.where(valid, np.where(mulai, baru, x), status)
+        bobot = np.where(valid, 1.0, bobot)
+        jumlah += valid
+        hasil[t] = np.where(jumlah >= min_periods, status, np.nan)
+    return hasil
+
+def sma_panel(nilai, window):
+    # Setara .rolling(window, min_periods=window).mean() pada deret yang sudah dirapatkan
+    # (NaN di dalam jendela -> NaN, seperti rolling pandas)
+    valid = ~np.isnan(nilai)
+    kumulatif = np.cumsum(np.where(valid, nilai, 0.0), axis=0)
+    jumlah = np.cumsum(valid, axis=0)
+    geser, geser_jumlah = np.zeros_like(kumulatif), np.zeros_like(jumlah)
+    geser[window:] = kumulatif[:-window]
+    geser_jumlah[window:] = jumlah[:-window]
+    hasil = (kumulatif - geser) / window
+    return np.where(jumlah - geser_jumlah >= window, hasil, np.nan)
+
+def rsi_panel(close, window=RSI_WINDOW, hadir=None):
+    selisih = np.full(close.shape, np.nan)
+    selisih[1:] = close[1:] - close[:-1]
+    hadir = ~np.isnan(close) if hadir is None else hadir
+    # Selisih NaN (baris pertama tiap ticker, atau di sekitar Close NaN) dihitung 0, sama seperti ta
+    naik = np.where(hadir, np.where(selisih > 0, selisih, 0.0), np.nan)
+    turun = np.where(hadir, np.where(selisih < 0, -selisih, 0.0), np.nan)
+    ema_naik = ema_panel(naik, 1 / window, window)
+    ema_turun = ema_panel(turun, 1 / window, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + ema_naik / ema_turun)
+    return np.where(ema_turun == 0, 100.0, rsi)
+
+def macd_panel(close, fast=MACD_FAST, slow=MACD_SLOW, sign=MACD_SIGN):
+    ema_cepat = ema_panel(close, 2 / (fast + 1), fast)
+    ema_lambat = ema_panel(close, 2 / (slow + 1), slow)
+    macd = ema_cepat - ema_lambat
+    sinyal = ema_panel(macd, 2 / (sign + 1), sign)
+    return macd, sinyal
+
+def indikator_rapat(panel, hadir=None):
+    # -> (close rapat, {nama: array}, urutan). Pada bentuk rapat bar terakhir setiap ticker
+    # berada di baris terakhir, sehingga "N bar terakhir" cukup diambil dengan [-N:].
+    # hadir: lihat kehadiran(); wajib jika riwayat bisa berisi Close NaN
+    rapat, hadir_rapat, urutan = _rapatkan(panel.to_numpy(dtype="float64"), hadir)
+    macd, sinyal = macd_panel(rapat)
+    hasil = {
+        'RSI_14': rsi_panel(rapat, hadir=hadir_rapat),
+        'MACD': macd,
+        'MACD_signal': sinyal,
+    }
+    for window in SMA_WINDOWS:
+        hasil[f'MA_{window}'] = sma_panel(rapat, window)
+    return rapat, hasil, urutan
+
+def _hitung_array(panel, hadir=None):
+    # -> (nama indikator, array indikator × tanggal × ticker) pada posisi panel asli
+    _, hasil, urutan = indikator_rapat(panel, hadir)
+    return list(hasil), np.stack([_kembalikan(nilai, urutan) for nilai in hasil.values()])
+
+def hitung_indikator_panel(panel):
+    # panel: DataFrame tanggal × ticker -> {nama_indikator: DataFrame tanggal × ticker}
+    # Semua NaN di panel dianggap celah kalender; pakai hitung_indikator_banyak jika
+    # riwayat bisa berisi Close NaN
+    if panel.empty:
+        return {}
+    nama, nilai = _hitung_array(panel)
+    return {n: pd.DataFrame(nilai[i], index=panel.index, columns=panel.columns) for i, n in enumerate(nama)}
+
+def hitung_indikator_banyak(data):
+    # {ticker: riwayat} -> {ticker: salinan riwayat + kolom RSI_14, MACD, MACD_signal, MA_50, MA_200}
+    panel = panel_harga(data)
+    if panel.empty:
+        return {ticker: df.copy() for ticker, df in data.items()}
+    nama, nilai = _hitung_array(panel, kehadiran(data, panel))
+    kolom = {ticker: j for j, ticker in enumerate(panel.columns)}
+    hasil = {}
+    for ticker, df in data.items():
+        if ticker not in kolom:
+            hasil[ticker] = df.copy()
+            continue
+        posisi = panel.index.get_indexer(df.index)
+        tambahan = pd.DataFrame(nilai[:, posisi, kolom[ticker]].T, index=df.index, columns=nama)
+        hasil[ticker] = pd.concat([df, tambahan], axis=1)
+    return hasil
+
+def hitung_indikator_teknikal(df):
+    return hitung_indikator_banyak({'_': df})['_']
+
+# ======== Verifikasi & Benchmark terhadap `ta` ========
+def _indikator_ta(df):
+    from ta.momentum import RSIIndicator
+    from ta.trend import MACD, SMAIndicator
+
+    df = df.copy()
+    df['RSI_14'] = RSIIndicator(df['Close'], window=14).rsi()
+    macd = MACD(df['Close'], window_slow=26, window_fast=12, window_sign=9)
+    df['MACD'] = macd.macd()
+    df['MACD_signal'] = macd.macd_signal()
+    df['MA_50'] = SMAIndicator(df['Close'], window=50).sma_indicator()
+    df['MA_200'] = SMAIndicator(df['Close'], window=200).sma_indicator()
+    return df
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import penyedia_data
+
+    parser = argparse.ArgumentParser(description="Verifikasi dan benchmark mesin indikator terhadap ta")
+    parser.add_argument("--ticker", type=int, default=300, help="Jumlah ticker sintetis")
+    args = parser.parse_args()
+
+    sintetis = penyedia_data.PenyediaSintetis()
+    data = {f"T{i:04d}.JK": sintetis.riwayat(f"T{i:04d}.JK") for i in range(args.ticker)}
+    # Sebagian ticker diberi celah kalender (tanggal dibuang) dan Close NaN di tengah riwayat
+    acak = np.random.default_rng(0)
+    for i, ticker in enumerate(data):
+        df = data[ticker]
+        if i % 7 == 3:
+            df = df.drop(df.index[acak.choice(len(df), size=5, replace=False)])
+        if i % 5 == 1:
+            df = df.copy()
+            df.iloc[acak.integers(1, len(df), size=3), df.columns.get_loc("Close")] = np.nan
+        data[ticker] = df
+
+    mulai = time.perf_counter()
+    hasil = hitung_indikator_banyak(data)
+    durasi_panel = time.perf_counter() - mulai
+
+    mulai = time.perf_counter()
+    acuan = {ticker: _indikator_ta(df) for ticker, df in data.items()}
+    durasi_ta = time.perf_counter() - mulai
+
+    # Digabung dulu: kolom yang seluruhnya NaN (mis. MA_200 dengan Close NaN) tidak perlu dilewati
+    selisih = float(np.nanmax(np.concatenate([
+        np.abs(hasil[t][k].to_numpy() - acuan[t][k].to_numpy())
+        for t in data for k in ('RSI_14', 'MACD', 'MACD_signal', 'MA_50', 'MA_200')
+    ])))
+    nan_sama = all(
+        (hasil[t][k].isna() == acuan[t][k].isna()).all()
+        for t in data for k in ('RSI_14', 'MACD', 'MACD_signal', 'MA_50', 'MA_200')
+    )
+    print(f"{args.ticker} ticker: panel {durasi_panel * 1000:.1f} ms, ta per ticker {durasi_ta * 1000:.1f} ms")
+    print(f"Selisih maksimum terhadap ta: {selisih:.2e}, posisi NaN sama: {nan_sama}")
@@ -0,0 +1,222 @@
+import copy
+import json
+import math
+import os
+from collections import deque
+
+import pandas as pd
+
+import cache_saham
+import indikator
+from sinkronisasi import kunci_file, tulis_atomik
+
+# ======== Indikator Inkremental ========
+# Status RSI (rata-rata Wilder), EMA MACD dan buffer SMA disimpan di samping cache harga
+# sehingga setiap bar baru cukup diproses O(1), bukan menghitung ulang seluruh riwayat.
+# Bar terakhir bisa masih berjalan (belum ditutup), jadi status hanya di-commit sampai
+# bar kedua terakhir; bar terakhir dihitung sementara dari salinan status.
+#
+# Setelah dibangun ulang, hasilnya sama dengan indikator.hitung_indikator_teknikal pada
+# riwayat yang sama. Begitu jendela riwayat bergulir, status tetap membawa sejarah yang
+# lebih panjang sehingga nilai EMA awal bisa sedikit berbeda dari hitung ulang penuh.
+KOLOM_INDIKATOR = ['RSI_14', 'MACD', 'MACD_signal'] + [f'MA_{w}' for w in indikator.SMA_WINDOWS]
+VERSI_STATUS = 1
+SINKRON_ULANG_BAR = 500     # Jumlah SMA dihitung ulang berkala agar galat pembulatan tidak menumpuk
+
+class StatusIndikator:
+    def __init__(self):
+        self.jumlah_bar = 0
+        self.terakhir = None            # Timestamp bar terakhir yang sudah di-commit
+        self.close_terakhir = None
+        self.rsi_naik = None
+        self.rsi_turun = None
+        self.ema_cepat = None
+        self.ema_lambat = None
+        self.ema_sinyal = None
+        self.jumlah_macd = 0
+        self.buffer = deque(maxlen=max(indikator.SMA_WINDOWS))
+        self.jumlah_sma = {w: 0.0 for w in indikator.SMA_WINDOWS}
+
+    @staticmethod
+    def _ema(status, x, alpha):
+        return x if status is None else status + alpha * (x - status)
+
+    def perbarui(self, waktu, close):
+        # Maju satu bar; mengembalikan nilai indikator pada bar tersebut
+        close = float(close)
+        selisih = 0.0 if self.close_terakhir is None else close - self.close_terakhir
+        alpha_rsi = 1 / indikator.RSI_WINDOW
+        self.rsi_naik = self._ema(self.rsi_naik, max(selisih, 0.0), alpha_rsi)
+        self.rsi_turun = self._ema(self.rsi_turun, max(-selisih, 0.0), alpha_rsi)
+
+        self.ema_cepat = self._ema(self.ema_cepat, close, 2 / (indikator.MACD_FAST + 1))
+        self.ema_lambat = self._ema(self.ema_lambat, close, 2 / (indikator.MACD_SLOW + 1))
+        self.jumlah_bar += 1
+        if self.jumlah_bar >= indikator.MACD_SLOW:
+            self.ema_sinyal = self._ema(self.ema_sinyal, self.ema_cepat - self.ema_lambat,
+                                        2 / (indikator.MACD_SIGN + 1))
+            self.jumlah_macd += 1
+
+        for w in indikator.SMA_WINDOWS:
+            keluar = self.buffer[-w] if len(self.buffer) >= w else 0.0
+            self.jumlah_sma[w] += close - keluar
+        self.buffer.append(close)
+        if self.jumlah_bar % SINKRON_ULANG_BAR == 0:
+            for w in indikator.SMA_WINDOWS:
+                self.jumlah_sma[w] = math.fsum(list(self.buffer)[-w:])
+
+        self.terakhir = pd.Timestamp(waktu)
+        self.close_terakhir = close
+        return self.nilai()
+
+    def nilai(self):
+        nan = float("nan")
+        hasil = dict.fromkeys(KOLOM_INDIKATOR, nan)
+        if self.jumlah_bar >= indikator.RSI_WINDOW:
+            if self.rsi_turun == 0:
+                hasil['RSI_14'] = 100.0
+            else:
+                hasil['RSI_14'] = 100 - 100 / (1 + self.rsi_naik / self.rsi_turun)
+        if self.jumlah_bar >= indikator.MACD_SLOW:
+            hasil['MACD'] = self.ema_cepat - self.ema_lambat
+        if self.jumlah_macd >= indikator.MACD_SIGN:
+            hasil['MACD_signal'] = self.ema_sinyal
+        for w in indikator.SMA_WINDOWS:
+            if self.jumlah_bar >= w:
+                hasil[f'MA_{w}'] = self.jumlah_sma[w] / w
+        return hasil
+
+    def ke_dict(self):
+        data = {k: v for k, v in vars(self).items() if k not in ('buffer', 'terakhir', 'jumlah_sma')}
+        data['versi'] = VERSI_STATUS
+        data['terakhir'] = self.terakhir.isoformat() if self.terakhir is not None else None
+        data['buffer'] = list(self.buffer)
+        data['jumlah_sma'] = {str(w): v for w, v in self.jumlah_sma.items()}
+        return data
+
+    @classmethod
+    def dari_dict(cls, data):
+        if not data or data.get('versi') != VERSI_STATUS:
+            return None
+        status = cls()
+        for kunci in ('jumlah_bar', 'close_terakhir', 'rsi_naik', 'rsi_turun',
+                      'ema_cepat', 'ema_lambat', 'ema_sinyal', 'jumlah_macd'):
+            setattr(status, kunci, data[kunci])
+        status.terakhir = pd.Timestamp(data['terakhir']) if data['terakhir'] else None
+        status.buffer.extend(data['buffer'])
+        status.jumlah_sma = {int(w): v for w, v in data['jumlah_sma'].items()}
+        return status
+
+# ======== Penyimpanan Status & Deret Indikator ========
+def _baca_status(paths):
+    try:
+        with open(paths['status_indikator'], "r") as f:
+            return StatusIndikator.dari_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _baca_seri(paths, tz):
+    path = paths['indikator']
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=KOLOM_INDIKATOR)
+    if paths['format'] == "parquet":
+        return pd.read_parquet(path)
+    if paths['format'] == "feather":
+        return pd.read_feather(path).set_index("Date")
+    seri = pd.read_csv(path, index_col=0)
+    seri.index = pd.to_datetime(seri.index, utc=True)
+    seri.index = seri.index.tz_convert(tz) if tz else seri.index.tz_localize(None)
+    return seri
+
+def _simpan(paths, status, seri):
+    seri.index.name = "Date"
+    with tulis_atomik(paths['indikator']) as tmp:
+        if paths['format'] == "parquet":
+            seri.to_parquet(tmp)
+        elif paths['format'] == "feather":
+            seri.reset_index().to_feather(tmp)
+        else:
+            seri.to_csv(tmp)
+    # Status ditulis terakhir: jika proses terhenti di tengah, deret yang lebih panjang
+    # dipotong kembali ke bar terakhir status lama saat dibaca
+    with tulis_atomik(paths['status_indikator']) as tmp:
+        with open(tmp, "w") as f:
+            json.dump(status.ke_dict(), f)
+
+def _status_cocok(status, close):
+    # Status hanya bisa dilanjutkan jika bar terakhirnya masih ada dengan harga yang sama;
+    # riwayat yang diunduh ulang penuh (mis. setelah split/dividen) memicu bangun ulang.
+    if status is None or status.terakhir is None or status.terakhir not in close.index:
+        return False
+    return math.isclose(float(close.loc[status.terakhir]), status.close_terakhir, rel_tol=1e-6)
+
+def _baris(waktu, nilai):
+    return pd.DataFrame([nilai], index=pd.DatetimeIndex([waktu], name="Date"), columns=KOLOM_INDIKATOR)
+
+def perbarui_indikator(ticker, hist=None, cache_dir="cache", bangun_ulang=False):
+    # -> salinan riwayat + kolom indikator; hanya bar yang belum pernah diproses yang dihitung
+    paths = cache_saham.path_cache(ticker, cache_dir)
+    if hist is None:
+        hist = cache_saham.baca_riwayat(paths)
+    if hist.empty or "Close" not in hist:
+        return hist.copy()
+    close = hist["Close"].astype("float64").dropna()
+    close = close[~close.index.duplicated(keep="last")].sort_index()
+    if close.empty:
+        return hist.copy()
+
+    with kunci_file(paths['lock']):
+        status = None if bangun_ulang else _baca_status(paths)
+        if _status_cocok(status, close):
+            seri = _baca_seri(paths, str(close.index.tz) if close.index.tz is not None else None)
+            seri = seri[seri.index <= status.terakhir]
+            baru = close[close.index > status.terakhir]
+        else:
+            status, seri = StatusIndikator(), pd.DataFrame(columns=KOLOM_INDIKATOR)
+            baru = close
+
+        commit = baru.iloc[:-1]
+        if not commit.empty:
+            tambahan = pd.DataFrame([status.perbarui(t, x) for t, x in commit.items()],
+                                    index=commit.index, columns=KOLOM_INDIKATOR)
+            seri = tambahan if seri.empty else pd.concat([seri, tambahan])
+            # Deret mengikuti jendela riwayat di cache; status sendiri tidak terbatas jendela
+            seri = seri[seri.index >= close.index[0]]
+            _simpan(paths, status, seri)
+
+    # Bar terakhir (bisa belum final) dihitung dari salinan status tanpa disimpan
+    if not baru.empty:
+        sementara = copy.deepcopy(status)
+        baris = _baris(baru.index[-1], sementara.perbarui(baru.index[-1], baru.iloc[-1]))
+        seri = baris if seri.empty else pd.concat([seri, baris])
+    indikator_hist = seri.reindex(hist.index).astype("float64")
+    return pd.concat([hist, indikator_hist], axis=1)
+
+def perbarui_banyak(data, cache_dir="cache", bangun_ulang=False):
+    # {ticker: riwayat} -> {ticker: riwayat + indikator}
+    return {ticker: perbarui_indikator(ticker, hist, cache_dir, bangun_ulang) for ticker, hist in data.items()}
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description="Perbarui atau bangun ulang status indikator inkremental")
+    parser.add_argument("tickers", nargs="*", help="Default: semua ticker di cache")
+    parser.add_argument("--cache-dir", default="cache")
+    parser.add_argument("--bangun-ulang", action="store_true", help="Buang status lama dan hitung dari awal")
+    parser.add_argument("--verifikasi", action="store_true", help="Bandingkan dengan hitung ulang penuh")
+    args = parser.parse_args()
+
+    for ticker in args.tickers or cache_saham.daftar_ticker(args.cache_dir):
+        mulai = time.perf_counter()
+        df = perbarui_indikator(ticker, cache_dir=args.cache_dir, bangun_ulang=args.bangun_ulang)
+        durasi = (time.perf_counter() - mulai) * 1000
+        pesan = f"{ticker}: {len(df)} bar, {durasi:.1f} ms"
+        if args.verifikasi and not df.empty:
+            acuan = indikator.hitung_indikator_teknikal(df.drop(columns=KOLOM_INDIKATOR))
+            selisih = max(float(np.nanmax(np.abs(df[k].to_numpy() - acuan[k].to_numpy())))
+                          for k in KOLOM_INDIKATOR if acuan[k].notna().any())
+            pesan += f", selisih maksimum terhadap hitung ulang penuh {selisih:.2e}"
+        print(pesan)
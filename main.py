@@ -5,8 +5,19 @@ import json
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
-import requests
-from datetime import datetime, timedelta
+
+import cache_memori
+import cache_saham
+import impor_malas
+import indikator_inkremental
+import pemindai_sinyal
+import prakiraan_prophet
+import proyeksi
+import simulasi_monte_carlo
+import penjadwal_prefetch
+import penyimpanan_portofolio
+import penyedia_data
+import transport_http
 
 # ======== Konfigurasi Awal ========
 st.set_page_config(layout="wide", page_title="Analisis Portofolio Saham")
@@ -16,111 +27,96 @@ python_version = sys.version.split()[0]
 st.sidebar.write(f"Python version: {python_version}")
 
 # ======== Setup Session dengan Timeout ========
-session = requests.Session()
-session.timeout = 10
+# Sesi bersama (pool koneksi, timeout connect/read, retry, pembatas laju) dipakai
+# oleh semua panggilan yfinance lewat cache_saham, lihat transport_http.py
+session = transport_http.sesi_bersama()
 
 # ======== Dependency Fallbacks ========
-class DummyModule:
-    def __call__(self, *args, **kwargs):
-        st.error("Fitur dinonaktifkan: Dependency tidak tersedia")
-        return None
-    def __getattr__(self, name):
-        return self
-
-try:
-    import yfinance as yf
-    YFINANCE_ENABLED = True
-except ImportError:
-    yf = DummyModule()
-    YFINANCE_ENABLED = False
+# Dependency berat hanya diperiksa keberadaannya; import sungguhan ditunda sampai fiturnya
+# dipakai (lihat impor_malas.py), sehingga worker baru tidak membayar detik-detik import
+YFINANCE_ENABLED = impor_malas.tersedia("yfinance")
+if not YFINANCE_ENABLED:
     st.sidebar.error("⚠️ yfinance tidak terinstall (pip install yfinance)")
 
-try:
-    from ta.momentum import RSIIndicator
-    from ta.trend import MACD, SMAIndicator
-    TA_ENABLED = True
-except ImportError:
-    RSIIndicator = MACD = SMAIndicator = DummyModule()
-    TA_ENABLED = False
-    st.sidebar.error("⚠️ Library TA tidak terinstall (pip install ta)")
-
-try:
-    from prophet import Prophet
-    PROPHET_ENABLED = True
-except ImportError:
-    Prophet = DummyModule()
-    PROPHET_ENABLED = False
+# Sumber data dipilih lewat PENYEDIA_DATA (yfinance, rekam, replay, sintetis)
+penyedia = penyedia_data.dapatkan_penyedia()
+DATA_ENABLED = penyedia.aktif
+
+PROPHET_ENABLED = impor_malas.tersedia("prophet")
+if not PROPHET_ENABLED:
     st.sidebar.error("⚠️ Prophet tidak terinstall (pip install prophet)")
 
+# ======== Prefetch Latar Belakang (opsional, PREFETCH_AKTIF=1) ========
+if penjadwal_prefetch.PREFETCH_AKTIF and DATA_ENABLED:
+    penjadwal_prefetch.mulai_prefetch()
+
 # ======== Fungsi Portofolio ========
-def muat_portofolio(filename="portfolio.json"):
+def pilih_portofolio():
+    # Pengguna + portofolio bernama -> kunci akun di ledger (lihat penyimpanan_portofolio.py)
+    pengguna = st.sidebar.text_input("Pengguna", value=penyimpanan_portofolio.PENGGUNA_DEFAULT,
+                                     key="pengguna").strip() or penyimpanan_portofolio.PENGGUNA_DEFAULT
     try:
-        if os.path.exists(filename):
-            with open(filename, "r") as f:
-                return json.load(f)
-        return {}
+        daftar = penyimpanan_portofolio.daftar_portofolio(pengguna)
+        nama = st.sidebar.selectbox("Portofolio", daftar + ["➕ Portofolio baru"], key="nama_portofolio")
+        if nama == "➕ Portofolio baru":
+            nama_baru = st.sidebar.text_input("Nama portofolio baru", key="nama_portofolio_baru").strip()
+            if not nama_baru:
+                return penyimpanan_portofolio.akun_untuk(pengguna)
+            return penyimpanan_portofolio.buat_portofolio(pengguna, nama_baru)
+        return penyimpanan_portofolio.akun_untuk(pengguna, nama)
+    except ValueError as e:
+        st.sidebar.error(f"❌ {str(e)}")
+        return penyimpanan_portofolio.AKUN_DEFAULT
+
+def muat_portofolio(akun=None, filename="portfolio.json"):
+    # Posisi dibaca dari ledger SQLite lewat cache dalam proses yang dibuang saat ada tulisan;
+    # portfolio.json lama diimpor sekali ke portofolio utama pengguna default.
+    # Versi yang dimuat disimpan di sesi untuk pemeriksaan konflik saat menghapus.
+    akun = akun or AKUN_AKTIF
+    try:
+        penyimpanan_portofolio.migrasi_json(filename)
     except json.JSONDecodeError:
-        st.error("❌ File portofolio corrupt. Membuat portofolio baru.")
-        return {}
+        st.error("❌ File portofolio lama corrupt, tidak dapat diimpor.")
+    except Exception as e:
+        st.error(f"❌ Gagal mengimpor portofolio lama: {str(e)}")
+    try:
+        versi, portofolio = penyimpanan_portofolio.muat(akun)
     except Exception as e:
         st.error(f"❌ Gagal memuat portofolio: {str(e)}")
         return {}
+    st.session_state[f"versi_{akun}"] = versi
+    return portofolio
 
-def simpan_portofolio(data, filename="portfolio.json"):
-    try:
-        if os.path.exists(filename):
-            os.replace(filename, f"{filename}.bak")
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        st.error(f"❌ Gagal menyimpan portofolio: {str(e)}")
-        if os.path.exists(f"{filename}.bak"):
-            os.replace(f"{filename}.bak", filename)
+# Pengguna dan portofolio aktif dipilih sekali per rerun, dipakai kedua halaman di bawah.
+# VERSI_DILIHAT = versi yang ditampilkan pada render sebelumnya (sebelum dimuat ulang)
+AKUN_AKTIF = pilih_portofolio()
+VERSI_DILIHAT = st.session_state.get(f"versi_{AKUN_AKTIF}")
 
 # ======== Fungsi Ambil Data Saham dengan Cache ========
 def ambil_data_saham(ticker, cache_dir="cache", ttl_jam=1):
-    if not YFINANCE_ENABLED:
+    if not DATA_ENABLED:
         return pd.DataFrame(), {}
 
-    os.makedirs(cache_dir, exist_ok=True)
-    path_hist = os.path.join(cache_dir, f"{ticker}_hist.csv")
-    path_info = os.path.join(cache_dir, f"{ticker}_info.json")
-
-    now = datetime.now()
-
-    def cache_valid(path):
-        return os.path.exists(path) and (now - datetime.fromtimestamp(os.path.getmtime(path))) < timedelta(hours=ttl_jam)
-
-    if cache_valid(path_hist):
-        try:
-            hist = pd.read_csv(path_hist, index_col=0, parse_dates=True)
-            info = {}
-            if os.path.exists(path_info):
-                with open(path_info, "r") as f:
-                    info = json.load(f)
-            return hist, info
-        except Exception as e:
-            st.warning(f"⚠️ Gagal membaca cache untuk {ticker}, mengambil ulang...")
-
+    # Cache hanya mengunduh bar yang belum tersimpan, lihat cache_saham.ambil_data
     try:
-        saham = yf.Ticker(ticker)
-        hist = saham.history(period="1y", interval="1d")
-        info = getattr(saham, "info", {})
-
-        if not hist.empty:
-            hist.to_csv(path_hist)
-            with open(path_info, "w") as f:
-                json.dump(info, f, indent=2)
-            return hist, info
-        else:
-            st.warning(f"⚠️ Data historis {ticker} kosong")
-            return pd.DataFrame(), info
+        hist, info = cache_saham.ambil_data(ticker, cache_dir=cache_dir, ttl_jam=ttl_jam)
     except Exception as e:
         st.error(f"❌ Gagal mengambil data {ticker}: {str(e)}")
         return pd.DataFrame(), {}
 
+    if hist.empty:
+        st.warning(f"⚠️ Data historis {ticker} kosong")
+    return hist, info
+
+def ambil_data_saham_batch(tickers, cache_dir="cache", ttl_jam=1):
+    if not DATA_ENABLED:
+        return {ticker: (pd.DataFrame(), {}) for ticker in tickers}, {}
+
+    # Semua ticker diperbarui paralel; galat dikumpulkan agar ditampilkan sekali saja
+    return cache_saham.ambil_banyak(tickers, cache_dir=cache_dir, ttl_jam=ttl_jam)
+
 # ======== Fungsi Prediksi Harga Saham dengan Prophet ========
-def prediksi_harga_saham_prophet(ticker, periode_hari=30):
+def prediksi_harga_saham_prophet(ticker, periode_hari=30, paksa_fit=False, mode_cepat=False):
     if not PROPHET_ENABLED:
         st.warning("Modul Prophet tidak tersedia")
         return
@@ -130,15 +126,12 @@ def prediksi_harga_saham_prophet(ticker, periode_hari=30):
         st.warning("Tidak ada data historis untuk prediksi.")
         return
 
-    df = hist[['Close']].reset_index()
-    df.rename(columns={"Date": "ds", "Close": "y"}, inplace=True)
-    df['ds'] = pd.to_datetime(df['ds']).dt.tz_localize(None)  # Hilangkan timezone
-
-    model = Prophet(daily_seasonality=True)
-    model.fit(df)
-
-    future = model.make_future_dataframe(periods=periode_hari)
-    forecast = model.predict(future)
+    # Model dan hasil prakiraan di-cache di disk per sidik jari data + parameter + periode;
+    # fit ulang dimulai dari parameter fit terakhir ticker ini (warm start)
+    parameter = prakiraan_prophet.PRESET["cepat" if mode_cepat else "standar"]
+    df, forecast, dari_cache = prakiraan_prophet.prakiraan(hist, periode_hari, parameter, paksa_fit, ticker=ticker)
+    if dari_cache:
+        st.caption("⚡ Prakiraan diambil dari cache (data dan parameter tidak berubah)")
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=df['ds'], y=df['y'], name='Harga Aktual'))
@@ -148,11 +141,40 @@ def prediksi_harga_saham_prophet(ticker, periode_hari=30):
     st.plotly_chart(fig, use_container_width=True)
 
     st.write("### Tabel Prediksi")
-    prediksi_tampil = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periode_hari)
-    prediksi_tampil.columns = ['Tanggal', 'Prediksi', 'Batas Bawah', 'Batas Atas']
+    kolom = [k for k in ['ds', 'yhat', 'yhat_lower', 'yhat_upper'] if k in forecast]
+    prediksi_tampil = forecast[kolom].tail(periode_hari)
+    prediksi_tampil.columns = ['Tanggal', 'Prediksi', 'Batas Bawah', 'Batas Atas'][:len(kolom)]
     prediksi_tampil['Prediksi'] = prediksi_tampil['Prediksi'].apply(lambda x: format_rupiah(x))
     st.dataframe(prediksi_tampil)
 
+def prediksi_semua_saham_prophet(tickers, periode_hari=30, paksa_fit=False, mode_cepat=False):
+    # Fit semua ticker di proses paralel; tabel diperbarui setiap kali satu ticker selesai
+    if not PROPHET_ENABLED:
+        st.warning("Modul Prophet tidak tersedia")
+        return
+
+    data_saham, _ = ambil_data_saham_batch(tickers)
+    progress = st.progress(0.0, text=f"Memprediksi {len(tickers)} saham...")
+    tabel = st.empty()
+    hasil, galat = [], {}
+    for i, (ticker, df, forecast, dari_cache, pesan) in enumerate(prakiraan_prophet.prakiraan_banyak(
+            {t: hist for t, (hist, _) in data_saham.items()}, periode_hari,
+            prakiraan_prophet.PRESET["cepat" if mode_cepat else "standar"], paksa_fit), start=1):
+        if pesan:
+            galat[ticker] = pesan
+        else:
+            hasil.append(prakiraan_prophet.ringkasan(ticker, df, forecast, periode_hari))
+        progress.progress(i / len(tickers), text=f"{i}/{len(tickers)} selesai ({ticker}{', cache' if dari_cache else ''})")
+        if hasil:
+            df_hasil = pd.DataFrame(hasil).sort_values('Perubahan (%)', ascending=False)
+            for kolom in ['Harga Terakhir', 'Prakiraan', 'Batas Bawah', 'Batas Atas']:
+                df_hasil[kolom] = df_hasil[kolom].map(lambda x: format_rupiah(x) if pd.notna(x) else "-")
+            df_hasil['Perubahan (%)'] = df_hasil['Perubahan (%)'].map(lambda x: f"{x:.2f}%" if pd.notna(x) else "-")
+            tabel.dataframe(df_hasil, use_container_width=True)
+    progress.empty()
+    for ticker, pesan in galat.items():
+        st.warning(f"Prediksi {ticker} gagal: {pesan}")
+
 # ======== Fungsi Format dan Main ========
 def format_rupiah(nilai):
     try:
@@ -160,6 +182,49 @@ def format_rupiah(nilai):
     except:
         return "Rp0"
 
+# ======== Grafik Detail per Saham ========
+# Figur Plotly dibangun hanya untuk panel yang grafiknya dibuka, lalu disimpan per
+# (ticker, jenis, versi data) dan dipakai bersama semua sesi. Yang disimpan objek Figure,
+# bukan JSON-nya: st.plotly_chart memvalidasi ulang dict/JSON (±20 ms per figur), sedangkan
+# Figure yang sudah jadi langsung diserialisasi (±2 ms).
+CACHE_GRAFIK = cache_memori.cache_proses(
+    "main.grafik_saham",
+    ttl_detik=int(os.environ.get("CACHE_TTL_DETIK", 3600)),
+    maks_entri=int(os.environ.get("CACHE_MAKS_GRAFIK", 512)),
+)
+UKURAN_HALAMAN = (10, 25, 50)
+URUTAN_DETAIL = {
+    "Ticker": lambda baris: baris['ticker'],
+    "Nilai Saat Ini": lambda baris: baris['nilai'],
+    "Untung/Rugi (%)": lambda baris: baris['persen'],
+    "Lot": lambda baris: baris['lot'],
+}
+
+def versi_data(df):
+    # Jumlah bar + bar terakhir cukup untuk mendeteksi riwayat yang diperbarui
+    if df.empty:
+        return (0, None, None)
+    terakhir = df.iloc[-1, 0]
+    # NaN tidak sama dengan dirinya sendiri, jadi tidak bisa dipakai di kunci cache
+    return (len(df), df.index[-1], None if pd.isna(terakhir) else float(terakhir))
+
+def grafik_harga(ticker, hist):
+    def bangun():
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=hist.index, y=hist['Close'], name="Harga Penutupan"))
+        fig.update_layout(title=f"Performa {ticker}", xaxis_title="Tanggal",
+                          yaxis_title="Harga (Rp)", height=400)
+        return fig
+    return CACHE_GRAFIK.ambil((ticker, "harga", versi_data(hist[['Close']])), bangun)
+
+def grafik_rsi(ticker, df_teknikal):
+    def bangun():
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=df_teknikal.index, y=df_teknikal['RSI_14'], name="RSI 14"))
+        fig.update_layout(height=300)
+        return fig
+    return CACHE_GRAFIK.ambil((ticker, "rsi", versi_data(df_teknikal[['RSI_14']])), bangun)
+
 def main():
     st.title("📊 Aplikasi Analisis Portofolio Saham + AI Prediksi")
     portofolio = muat_portofolio()
@@ -172,30 +237,31 @@ def main():
     ticker_pred = st.selectbox("Pilih saham untuk prediksi harga:", list(portofolio.keys()))
     periode = st.slider("Periode Prediksi (hari ke depan):", min_value=7, max_value=90, value=30)
 
-    if st.button("🔮 Jalankan Prediksi Prophet"):
-        prediksi_harga_saham_prophet(ticker_pred, periode)
+    paksa_fit = st.checkbox("Paksa fit ulang model (abaikan cache prakiraan)")
+    mode_cepat = st.checkbox("Mode cepat (tanpa interval ketidakpastian dan musiman harian/tahunan)")
+
+    col_satu, col_semua = st.columns(2)
+    if col_satu.button("🔮 Jalankan Prediksi Prophet"):
+        prediksi_harga_saham_prophet(ticker_pred, periode, paksa_fit, mode_cepat)
+    if col_semua.button("🔮 Prediksi Semua Saham"):
+        prediksi_semua_saham_prophet(list(portofolio.keys()), periode, paksa_fit, mode_cepat)
 
 if __name__ == "__main__":
     main()
     
     
 def hitung_bunga_majemuk(modal_awal, tingkat_bunga, tahun):
+    # tahun boleh berupa array: semua titik dihitung sekaligus (lihat proyeksi.py)
     try:
-        return modal_awal * (1 + tingkat_bunga/100) ** tahun
+        return proyeksi.bunga_majemuk(modal_awal, tingkat_bunga, tahun)
     except:
         return 0
 
 def proyeksi_investasi(modal_awal, tambahan_bulanan, tingkat_bunga, tahun):
-    hasil = []
     try:
-        saldo = modal_awal
-        for bulan in range(1, tahun * 12 + 1):
-            saldo = saldo * (1 + tingkat_bunga/100/12) + tambahan_bulanan
-            if bulan % 12 == 0:
-                hasil.append((bulan//12, saldo))
+        return list(proyeksi.jalur_tahunan(modal_awal, tingkat_bunga, tahun, tambahan_bulanan).itertuples(index=False))
     except:
-        pass
-    return hasil
+        return []
 
 def hitung_alokasi_dana(modal, portofolio, harga_saham_terkini):
     try:
@@ -235,10 +301,38 @@ def tampilkan_status_sistem():
     with st.expander("ℹ️ Status Sistem", expanded=True):
         st.write(f"**Python version:** {python_version}")
         st.write(f"**yfinance:** {'✅' if YFINANCE_ENABLED else '❌'}")
-        st.write(f"**Technical Analysis:** {'✅' if TA_ENABLED else '❌'}")
-        if not YFINANCE_ENABLED:
+        st.write(f"**Penyedia data:** {penyedia.nama} {'✅' if DATA_ENABLED else '❌'}")
+        st.write("**Technical Analysis:** ✅ (indikator.py, NumPy)")
+        dimuat = ", ".join(f"{nama} ({durasi:.1f} s)" for nama, durasi in impor_malas.STATISTIK.items())
+        st.write(f"**Dependency berat dimuat:** {dimuat or 'belum ada'}")
+        if not DATA_ENABLED:
             st.warning("Fitur utama tidak tersedia tanpa yfinance")
 
+        # Statistik cache proses ini, dipakai untuk menyetel TTL dari data nyata
+        stat = cache_saham.statistik_cache()
+        pengelola = cache_saham.pengelola_cache()
+        st.write(f"**Cache ({cache_saham.format_aktif()}):** "
+                 f"{pengelola.ukuran() / 1024 / 1024:.1f} / {pengelola.maks_byte / 1024 / 1024:.0f} MB")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Hit Rate", f"{stat['hit_rate'] * 100:.1f}%")
+        col2.metric("Hit / Basi / Miss", f"{stat['hit']} / {stat['basi']} / {stat['miss']}")
+        col3.metric("Data Dibaca", f"{stat['byte_dibaca'] / 1024 / 1024:.1f} MB")
+        col4.metric("Unduh Delta / Penuh", f"{stat['unduh_delta']} / {stat['unduh_penuh']}")
+        if session is not None:
+            st.write(f"**HTTP:** {session.statistik['permintaan']} permintaan, "
+                     f"{session.statistik['ulang']} diulang, {session.statistik['galat']} galat")
+        penjadwal = penjadwal_prefetch.penjadwal_aktif()
+        if penjadwal:
+            st.write(f"**Prefetch latar:** ✅ {penjadwal.statistik['diperbarui']} diperbarui, "
+                     f"{penjadwal.statistik['galat']} galat")
+        else:
+            st.write("**Prefetch latar:** ❌ (aktifkan dengan PREFETCH_AKTIF=1)")
+        if st.button("🧹 Kompaksi Cache"):
+            dihapus = pengelola.kompaksi()
+            # Statistik dibaca ulang: kompaksi juga menegakkan anggaran dan bisa menggusur ticker
+            digusur = cache_saham.statistik_cache()['digusur']
+            st.success(f"{dihapus} file sisa dihapus, {digusur} ticker pernah digusur")
+
 # ======== Fungsi main() Anda tetap di sini (tidak berubah) ========
 # Salin fungsi main() dari versi sebelumnya tepat di bawah baris ini.
 # Fungsi ini akan tetap kompatibel dengan cache dan portofolio JSON.
@@ -259,32 +353,26 @@ def main():
         if st.form_submit_button("💾 Simpan"):
             if ticker:
                 try:
-                    if ticker not in portofolio:
-                        portofolio[ticker] = {
-                            'lot': 0,
-                            'harga_per_lembar': 0,
-                            'total_investasi': 0,
-                            'tgl_beli': datetime.now().strftime("%Y-%m-%d")
-                        }
-                    
-                    portofolio[ticker]['lot'] += lot
-                    portofolio[ticker]['harga_per_lembar'] = harga_per_lembar
-                    portofolio[ticker]['total_investasi'] += lot * 100 * harga_per_lembar
-                    
-                    simpan_portofolio(portofolio)
-                    st.success(f"Berhasil menambahkan {ticker}")
-                    st.experimental_rerun()  # Refresh tampilan
+                    # Satu baris transaksi beli; posisi & harga rata-rata diperbarui di database
+                    # Pembelian hanya menambah baris ledger sehingga aman tanpa pemeriksaan versi
+                    penyimpanan_portofolio.beli(ticker, lot, harga_per_lembar, akun=AKUN_AKTIF)
                 except Exception as e:
                     st.error(f"Gagal menambahkan saham: {str(e)}")
+                else:
+                    st.success(f"Berhasil menambahkan {ticker}")
+                    st.rerun()  # Refresh tampilan
             else:
                 st.error("Kode saham tidak boleh kosong")
 
     # Tombol Hapus Portofolio
     if st.sidebar.button("🗑️ Hapus Semua Portofolio", type="secondary"):
-        portofolio = {}
-        simpan_portofolio(portofolio)
-        st.sidebar.success("Portofolio telah direset")
-        st.experimental_rerun()
+        try:
+            penyimpanan_portofolio.kosongkan(AKUN_AKTIF, versi_diharapkan=VERSI_DILIHAT)
+        except penyimpanan_portofolio.KonflikVersi:
+            st.sidebar.error("❌ Portofolio baru saja diubah pengguna lain. Periksa isinya lalu ulangi.")
+        else:
+            st.sidebar.success("Portofolio telah direset")
+            st.rerun()
 
     # Status Sistem
     tampilkan_status_sistem()
@@ -299,12 +387,21 @@ def main():
     # Ambil harga terkini dengan progress bar
     harga_terkini = {}
     with st.spinner("Memperbarui data saham..."):
-        for ticker in portofolio.keys():
-            hist, _ = ambil_data_saham(ticker)
-            if not hist.empty:
-                harga_terkini[ticker] = hist['Close'].iloc[-1]
-            else:
-                harga_terkini[ticker] = portofolio[ticker].get('harga_per_lembar', 0)
+        data_saham, galat_data = ambil_data_saham_batch(list(portofolio.keys()))
+    for ticker in portofolio.keys():
+        hist, _ = data_saham[ticker]
+        if not hist.empty:
+            harga_terkini[ticker] = hist['Close'].iloc[-1]
+        else:
+            harga_terkini[ticker] = portofolio[ticker].get('harga_per_lembar', 0)
+
+    # Indikator teknikal dilanjutkan dari status yang tersimpan di cache; hanya bar baru yang dihitung
+    indikator_saham = indikator_inkremental.perbarui_banyak({t: hist for t, (hist, _) in data_saham.items()})
+
+    if galat_data:
+        with st.expander(f"⚠️ Gagal memperbarui {len(galat_data)} saham"):
+            for ticker, pesan in galat_data.items():
+                st.write(f"**{ticker}**: {pesan}")
     
     # Hitung total portofolio dengan nilai terkini
     try:
@@ -317,16 +414,51 @@ def main():
         st.warning("Gagal menghitung total portofolio")
     
     # Tab untuk portofolio dan analisis
-    tab1, tab2 = st.tabs(["Detail Portofolio", "Analisis & Proyeksi"])
+    tab1, tab2, tab3 = st.tabs(["Detail Portofolio", "Analisis & Proyeksi", "Pemindai Sinyal"])
     
     with tab1:
+        # Ringkasan semua saham dihitung dulu (murah), lalu disaring, diurutkan dan dipotong per
+        # halaman; grafik hanya dibangun untuk panel yang grafiknya dibuka
+        baris_detail = []
         for ticker, data in portofolio.items():
             lot = data.get('lot', 0)
+            total_investasi = data.get('total_investasi', 0)
+            harga = harga_terkini.get(ticker, 0)
+            nilai = lot * 100 * harga if harga > 0 else 0
+            persen = ((nilai - total_investasi) / total_investasi * 100
+                      if harga > 0 and total_investasi != 0 else 0)
+            baris_detail.append({'ticker': ticker, 'lot': lot, 'nilai': nilai, 'persen': persen})
+
+        col_cari, col_urut, col_arah, col_ukuran = st.columns([3, 2, 1, 1])
+        cari = col_cari.text_input("🔍 Cari saham", key="detail_cari").strip().upper()
+        urutan = col_urut.selectbox("Urutkan", list(URUTAN_DETAIL), key="detail_urutan")
+        menurun = col_arah.toggle("Menurun", value=urutan != "Ticker", key=f"detail_menurun_{urutan}")
+        per_halaman = col_ukuran.selectbox("Per halaman", UKURAN_HALAMAN, key="detail_per_halaman")
+
+        if cari:
+            baris_detail = [baris for baris in baris_detail if cari in baris['ticker'].upper()]
+        baris_detail.sort(key=URUTAN_DETAIL[urutan], reverse=menurun)
+
+        jumlah_halaman = max(1, -(-len(baris_detail) // per_halaman))
+        if jumlah_halaman > 1:
+            halaman = st.number_input("Halaman", min_value=1, max_value=jumlah_halaman, value=1,
+                                      step=1, key=f"detail_halaman_{cari}_{urutan}_{per_halaman}")
+        else:
+            halaman = 1
+        awal = (halaman - 1) * per_halaman
+        st.caption(f"Halaman {halaman} dari {jumlah_halaman} · {len(baris_detail)} saham")
+        if not baris_detail:
+            st.info("Tidak ada saham yang cocok dengan pencarian.")
+
+        for baris in baris_detail[awal:awal + per_halaman]:
+            ticker = baris['ticker']
+            data = portofolio[ticker]
+            lot = baris['lot']
             harga_per_lembar = data.get('harga_per_lembar', 0)
             total_investasi = data.get('total_investasi', 0)
             tgl_beli = data.get('tgl_beli', '-')
             
-            with st.expander(f"📈 {ticker} ({lot} lot)", expanded=True):
+            with st.expander(f"📈 {ticker} ({lot} lot)"):
                 # Tampilkan data dasar bahkan jika tidak bisa ambil data terbaru
                 col1, col2, col3, col4 = st.columns(4)
                 col1.metric("Harga Beli", format_rupiah(harga_per_lembar))
@@ -334,51 +466,21 @@ def main():
                 col3.metric("Tanggal Beli", tgl_beli)
                 
                 # Coba tampilkan data terbaru jika ada
-                if ticker in harga_terkini and harga_terkini[ticker] > 0:
-                    harga_terkini_saham = harga_terkini[ticker]
-                    col4.metric("Harga Terkini", format_rupiah(harga_terkini_saham))
-                    
-                    # Hitung keuntungan/kerugian
-                    nilai_sekarang = lot * 100 * harga_terkini_saham
-                    keuntungan = nilai_sekarang - total_investasi
-                    persentase_keuntungan = (keuntungan / total_investasi) * 100 if total_investasi != 0 else 0
-                    
+                if harga_terkini.get(ticker, 0) > 0:
+                    col4.metric("Harga Terkini", format_rupiah(harga_terkini[ticker]))
                     st.metric("Nilai Saat Ini", 
-                             format_rupiah(nilai_sekarang),
-                             delta=f"{persentase_keuntungan:.2f}%")
+                             format_rupiah(baris['nilai']),
+                             delta=f"{baris['persen']:.2f}%")
                 
-                # Coba tampilkan grafik jika data tersedia
-                hist, info = ambil_data_saham(ticker)
-                if not hist.empty:
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatter(
-                        x=hist.index,
-                        y=hist['Close'],
-                        name="Harga Penutupan"
-                    ))
-                    fig.update_layout(
-                        title=f"Performa {ticker}",
-                        xaxis_title="Tanggal",
-                        yaxis_title="Harga (Rp)",
-                        height=400
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    if TA_ENABLED:
-                        st.subheader("Analisis Teknikal")
-                        df_teknikal = hist.copy()
-                        df_teknikal['RSI'] = RSIIndicator(df_teknikal['Close'], window=14).rsi()
-                        
-                        fig_rsi = go.Figure()
-                        fig_rsi.add_trace(go.Scatter(
-                            x=df_teknikal.index,
-                            y=df_teknikal['RSI'],
-                            name="RSI 14"
-                        ))
-                        fig_rsi.update_layout(height=300)
-                        st.plotly_chart(fig_rsi, use_container_width=True)
-                else:
+                # Isi expander tetap dieksekusi walau tertutup, jadi grafik dibuka lewat toggle
+                hist, info = data_saham[ticker]
+                if hist.empty:
                     st.warning("Data historis tidak tersedia")
+                elif st.toggle("Tampilkan grafik", key=f"grafik_{AKUN_AKTIF}_{ticker}"):
+                    st.plotly_chart(grafik_harga(ticker, hist), use_container_width=True)
+                    
+                    st.subheader("Analisis Teknikal")
+                    st.plotly_chart(grafik_rsi(ticker, indikator_saham[ticker]), use_container_width=True)
     
     with tab2:
         st.header("Analisis Bunga Majemuk & Proyeksi Investasi")
@@ -395,8 +497,8 @@ def main():
             st.metric(f"Nilai Investasi setelah {tahun} tahun", format_rupiah(hasil))
             
             # Grafik proyeksi
-            tahun_list = list(range(tahun + 1))
-            nilai_list = [hitung_bunga_majemuk(modal_awal, tingkat_bunga, t) for t in tahun_list]
+            tahun_list = np.arange(tahun + 1)
+            nilai_list = hitung_bunga_majemuk(modal_awal, tingkat_bunga, tahun_list)
             
             fig = go.Figure()
             fig.add_trace(go.Scatter(
@@ -428,7 +530,7 @@ def main():
             fig2 = go.Figure()
             fig2.add_trace(go.Scatter(
                 x=df_proyeksi['Tahun'],
-                y=[float(x.replace('Rp', '').replace('.', '')) for x in df_proyeksi['Nilai']],
+                y=[nilai for _, nilai in hasil_proyeksi],
                 name="Proyeksi Nilai",
                 mode='lines+markers'
             ))
@@ -440,6 +542,77 @@ def main():
             )
             st.plotly_chart(fig2, use_container_width=True)
         
+        # Sensitivitas: seluruh grid tingkat bunga × jangka waktu dihitung dalam satu panggilan
+        st.subheader("Sensitivitas Nilai Akhir")
+        tingkat_grid = np.arange(0, 21, 1.0)
+        tahun_grid = np.arange(1, 31)
+        tabel_grid = proyeksi.tabel_sensitivitas(modal_awal, tingkat_grid, tahun_grid, tambahan_bulanan)
+        fig_grid = go.Figure(go.Heatmap(
+            z=tabel_grid.to_numpy(),
+            x=tahun_grid,
+            y=tingkat_grid,
+            colorscale="Viridis",
+            colorbar=dict(title="Nilai (Rp)"),
+            hovertemplate="Tahun %{x}<br>Tingkat %{y}%<br>Rp%{z:,.0f}<extra></extra>"
+        ))
+        fig_grid.add_trace(go.Scatter(x=[tahun], y=[tingkat_bunga], mode="markers",
+                                      marker=dict(color="red", size=10), name="Pilihan saat ini"))
+        fig_grid.update_layout(
+            title=f"Nilai Akhir dengan Tambahan Bulanan {format_rupiah(tambahan_bulanan)}",
+            xaxis_title="Jangka Waktu (tahun)",
+            yaxis_title="Tingkat Bunga Tahunan (%)",
+            height=450
+        )
+        st.plotly_chart(fig_grid, use_container_width=True)
+
+        # Simulasi Monte Carlo: pita persentil nilai portofolio dari distribusi return historis
+        st.subheader("Simulasi Monte Carlo Portofolio")
+        col_mc1, col_mc2, col_mc3 = st.columns(3)
+        metode_mc = col_mc1.selectbox("Metode", list(simulasi_monte_carlo.METODE),
+                                      help="cholesky: return normal berkorelasi; bootstrap: blok return historis")
+        jalur_mc = col_mc2.select_slider("Jumlah Jalur", options=[1000, 10000, 50000, 100000], value=10000)
+        tahun_mc = col_mc3.slider("Jangka Simulasi (tahun)", 1, 10, 5)
+        if st.button("🎲 Jalankan Simulasi"):
+            nilai_posisi = {
+                ticker: data['lot'] * 100 * harga_terkini.get(ticker, 0)
+                for ticker, data in portofolio.items()
+                if harga_terkini.get(ticker, 0) > 0
+            }
+            try:
+                with st.spinner(f"Mensimulasikan {jalur_mc:,} jalur..."):
+                    hasil_mc = simulasi_monte_carlo.simulasikan(
+                        {t: hist for t, (hist, _) in data_saham.items()},
+                        nilai_posisi, tahun_mc, jalur_mc, metode_mc
+                    )
+            except ValueError as e:
+                st.warning(f"Simulasi tidak dapat dijalankan: {e}")
+            else:
+                pita = hasil_mc['persentil']
+                bulan = pita.index / 12
+                fig_mc = go.Figure()
+                for bawah, atas, warna in (("P5", "P95", "rgba(31,119,180,0.15)"),
+                                           ("P25", "P75", "rgba(31,119,180,0.35)")):
+                    fig_mc.add_trace(go.Scatter(x=bulan, y=pita[atas], mode="lines",
+                                                line=dict(width=0), showlegend=False, hoverinfo="skip"))
+                    fig_mc.add_trace(go.Scatter(x=bulan, y=pita[bawah], mode="lines", line=dict(width=0),
+                                                fill="tonexty", fillcolor=warna, name=f"{bawah}–{atas}"))
+                fig_mc.add_trace(go.Scatter(x=bulan, y=pita["P50"], mode="lines", name="Median"))
+                fig_mc.update_layout(
+                    title=f"Sebaran Nilai Portofolio {tahun_mc} Tahun ({jalur_mc:,} jalur, {metode_mc})",
+                    xaxis_title="Tahun",
+                    yaxis_title="Nilai Portofolio (Rp)",
+                    height=450
+                )
+                st.plotly_chart(fig_mc, use_container_width=True)
+
+                ringkasan_mc = simulasi_monte_carlo.ringkasan_akhir(hasil_mc)
+                col_r1, col_r2, col_r3 = st.columns(3)
+                col_r1.metric("Median Nilai Akhir", format_rupiah(ringkasan_mc['Median']))
+                col_r2.metric("Rata-rata Nilai Akhir", format_rupiah(ringkasan_mc['Rata-rata']))
+                col_r3.metric("Peluang Rugi", f"{ringkasan_mc['Peluang Rugi (%)']:.1f}%")
+                if hasil_mc['dilewati']:
+                    st.caption(f"Tanpa riwayat harga, tidak disimulasikan: {', '.join(hasil_mc['dilewati'])}")
+
         # Alokasi Dana dan Pembelian Saham
         st.subheader("Alokasi Dana dan Pembelian Saham")
         
@@ -487,6 +660,25 @@ def main():
                 )
                 st.plotly_chart(fig_pie, use_container_width=True)
 
+    with tab3:
+        st.header("Pemindai Sinyal Teknikal")
+        st.caption("Golden/Death Cross, persilangan MACD dan RSI ekstrem dari cache harga lokal, tanpa unduhan")
+        col1, col2 = st.columns([3, 1])
+        sumber_universe = col1.text_input(
+            "Universe (file daftar ticker atau dipisah koma, kosong = semua ticker di cache)",
+            value=pemindai_sinyal.UNIVERSE
+        )
+        jumlah_bar = col2.number_input("Dalam N bar terakhir", min_value=1, max_value=60, value=pemindai_sinyal.JUMLAH_BAR)
+
+        if st.button("🔎 Pindai"):
+            with st.spinner("Memindai universe..."):
+                hasil_pindai = pemindai_sinyal.pindai_universe(sumber_universe, jumlah_bar=int(jumlah_bar))
+            if hasil_pindai.empty:
+                st.info("Tidak ada sinyal dalam rentang tersebut")
+            else:
+                st.write(f"{len(hasil_pindai)} saham dengan sinyal")
+                st.dataframe(hasil_pindai, use_container_width=True)
+
 if __name__ == "__main__":
     main()
     
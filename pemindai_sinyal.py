@@ -0,0 +1,137 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import cache_saham
+import indikator
+
+# ======== Konfigurasi Pemindai ========
+# Universe: path file (satu ticker per baris) atau daftar dipisah koma. Kosong = semua
+# ticker yang sudah ada di cache lokal.
+UNIVERSE = os.environ.get("PEMINDAI_UNIVERSE", "")
+JUMLAH_BAR = 5              # Sinyal dicari dalam N bar terakhir
+RSI_ATAS, RSI_BAWAH = 70, 30
+
+# Bobot skor: positif = bullish, negatif = bearish
+BOBOT_SINYAL = {
+    'Golden Cross': 2,
+    'Death Cross': -2,
+    'MACD Bullish': 1,
+    'MACD Bearish': -1,
+    'RSI Oversold': 1,
+    'RSI Overbought': -1,
+}
+
+def baca_universe(sumber=None, cache_dir="cache"):
+    sumber = UNIVERSE if sumber is None else sumber
+    if not sumber:
+        return cache_saham.daftar_ticker(cache_dir)
+    if os.path.exists(sumber):
+        with open(sumber, "r") as f:
+            baris = [b.split("#", 1)[0].strip() for b in f]
+    else:
+        baris = sumber.split(",")
+    return list(dict.fromkeys(b.strip().upper() for b in baris if b.strip()))
+
+def muat_harga_lokal(tickers, cache_dir="cache", maks_pekerja=cache_saham.MAKS_PEKERJA):
+    # Hanya membaca kolom Close dari cache di disk, tanpa jaringan; ticker tanpa cache dilewati
+    def baca(ticker):
+        try:
+            return ticker, cache_saham.baca_riwayat(cache_saham.path_cache(ticker, cache_dir), kolom=["Close"])
+        except Exception:
+            return ticker, pd.DataFrame()
+
+    with ThreadPoolExecutor(max_workers=maks_pekerja) as executor:
+        hasil = dict(executor.map(baca, tickers))
+    return {ticker: hist for ticker, hist in hasil.items() if not hist.empty}
+
+def _bar_lalu(kejadian):
+    # kejadian: array bool (N bar terakhir × ticker) -> bar sejak kejadian terbaru, -1 jika tidak ada
+    terbaru = np.argmax(kejadian[::-1], axis=0)
+    return np.where(kejadian.any(axis=0), terbaru, -1)
+
+def _persilangan(cepat, lambat, jumlah_bar):
+    # -> (naik, turun): jumlah bar sejak persilangan terakhir dalam N bar, -1 jika tidak ada
+    selisih = cepat - lambat
+    sebelum, sesudah = selisih[-jumlah_bar - 1:-1], selisih[-jumlah_bar:]
+    naik = (sebelum < 0) & (sesudah > 0)
+    turun = (sebelum > 0) & (sesudah < 0)
+    return _bar_lalu(naik), _bar_lalu(turun)
+
+def _melewati(rsi, jumlah_bar, atas, bawah):
+    # -> (oversold, overbought): jumlah bar sejak RSI terakhir di luar batas dalam N bar, -1 jika tidak ada
+    jendela = rsi[-jumlah_bar:]
+    return _bar_lalu(jendela < bawah), _bar_lalu(jendela > atas)
+
+def pindai(data, jumlah_bar=JUMLAH_BAR, rsi_atas=RSI_ATAS, rsi_bawah=RSI_BAWAH):
+    # data: {ticker: riwayat} -> DataFrame sinyal terurut dari skor absolut terbesar
+    panel = indikator.panel_harga(data)
+    if panel.empty:
+        return pd.DataFrame()
+    close, nilai, _ = indikator.indikator_rapat(panel, indikator.kehadiran(data, panel))
+    jumlah_bar = max(1, min(jumlah_bar, len(panel) - 1))
+
+    golden, death = _persilangan(nilai['MA_50'], nilai['MA_200'], jumlah_bar)
+    macd_naik, macd_turun = _persilangan(nilai['MACD'], nilai['MACD_signal'], jumlah_bar)
+    oversold, overbought = _melewati(nilai['RSI_14'], jumlah_bar, rsi_atas, rsi_bawah)
+    rsi = nilai['RSI_14'][-1]
+    kejadian = {
+        'Golden Cross': golden,
+        'Death Cross': death,
+        'MACD Bullish': macd_naik,
+        'MACD Bearish': macd_turun,
+        'RSI Oversold': oversold,
+        'RSI Overbought': overbought,
+    }
+    ada = np.stack([bar >= 0 for bar in kejadian.values()])
+    skor = np.array(list(BOBOT_SINYAL.values())) @ ada
+    terbaru = np.stack([np.where(bar >= 0, bar, jumlah_bar) for bar in kejadian.values()]).min(axis=0)
+
+    pilih = ada.any(axis=0)
+    if not pilih.any():
+        return pd.DataFrame()
+    nama_sinyal = np.array(list(kejadian))
+    hasil = pd.DataFrame({
+        'Ticker': panel.columns[pilih],
+        'Harga': close[-1][pilih],
+        'RSI_14': rsi[pilih].round(2),
+        'Sinyal': [", ".join(nama_sinyal[kolom]) for kolom in ada[:, pilih].T],
+        'Bar Lalu': terbaru[pilih],
+        'Skor': skor[pilih],
+    })
+    hasil = hasil.assign(_urut=-hasil['Skor'].abs()).sort_values(['_urut', 'Bar Lalu', 'Ticker'])
+    return hasil.drop(columns='_urut').reset_index(drop=True)
+
+def pindai_universe(sumber=None, cache_dir="cache", **kwargs):
+    tickers = baca_universe(sumber, cache_dir)
+    return pindai(muat_harga_lokal(tickers, cache_dir), **kwargs)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Pindai sinyal teknikal seluruh universe dari cache lokal")
+    parser.add_argument("--universe", default=None, help="File daftar ticker atau daftar dipisah koma")
+    parser.add_argument("--cache-dir", default="cache")
+    parser.add_argument("--bar", type=int, default=JUMLAH_BAR, help="Cari sinyal dalam N bar terakhir")
+    parser.add_argument("--isi", action="store_true", help="Perbarui cache universe dari penyedia data dulu")
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args()
+
+    tickers = baca_universe(args.universe, args.cache_dir)
+    if args.isi:
+        _, galat = cache_saham.ambil_banyak(tickers, cache_dir=args.cache_dir)
+        print(f"Cache diperbarui: {len(tickers) - len(galat)} berhasil, {len(galat)} gagal")
+
+    mulai = time.perf_counter()
+    data = muat_harga_lokal(tickers, args.cache_dir)
+    durasi_baca = time.perf_counter() - mulai
+    hasil = pindai(data, jumlah_bar=args.bar)
+    durasi_total = time.perf_counter() - mulai
+
+    print(f"{len(data)} ticker dipindai dalam {durasi_total:.2f} s (baca cache {durasi_baca:.2f} s), "
+          f"{len(hasil)} dengan sinyal")
+    if not hasil.empty:
+        print(hasil.head(args.top).to_string(index=False))
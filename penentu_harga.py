@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+
+import cache_saham
+import penyedia_data
+
+# ======== Konfigurasi Penentu Harga ========
+TTL_HARGA_DETIK = int(os.environ.get("HARGA_TTL_DETIK", "60"))
+
+# Urutan tier dari yang termurah; setiap tier hanya mencari ticker yang belum terjawab
+TIER = ("memori", "cache_lokal", "batch", "fast_info", "lengkap")
+
+class PenentuHarga:
+    def __init__(self, penyedia=None, ttl_detik=TTL_HARGA_DETIK, cache_dir="cache", ttl_cache_jam=1):
+        self.penyedia = penyedia
+        self.ttl_detik = ttl_detik
+        self.cache_dir = cache_dir
+        self.ttl_cache_jam = ttl_cache_jam
+        self._harga = {}            # ticker -> (waktu, harga)
+        self._kunci = threading.Lock()
+        self.statistik = {tier: 0 for tier in TIER}
+        self.statistik['gagal'] = 0
+
+    def _penyedia(self):
+        return self.penyedia or penyedia_data.dapatkan_penyedia()
+
+    def _dari_memori(self, tickers):
+        sekarang = time.monotonic()
+        with self._kunci:
+            return {t: self._harga[t][1] for t in tickers
+                    if t in self._harga and sekarang - self._harga[t][0] < self.ttl_detik}
+
+    def _dari_cache_lokal(self, tickers):
+        # Bar terakhir dari cache riwayat di disk yang masih segar, tanpa jaringan
+        hasil = {}
+        for ticker in tickers:
+            paths = cache_saham.path_cache(ticker, self.cache_dir)
+            if not cache_saham.cache_valid(paths['hist'], self.ttl_cache_jam):
+                continue
+            try:
+                close = cache_saham.baca_riwayat(paths)["Close"].dropna()
+            except Exception:
+                continue
+            if not close.empty:
+                hasil[ticker] = float(close.iloc[-1])
+        return hasil
+
+    def _per_ticker(self, tickers, fungsi):
+        hasil = {}
+        for ticker in tickers:
+            try:
+                harga = fungsi(ticker)
+            except Exception:
+                continue
+            if harga:
+                hasil[ticker] = float(harga)
+        return hasil
+
+    def tentukan(self, tickers):
+        # -> {ticker: (harga, tier)}; (None, None) jika tidak ada tier yang menjawab. Tier
+        # dikembalikan per panggilan karena penentu dipakai bersama semua sesi
+        tickers = list(dict.fromkeys(tickers))
+        penyedia = self._penyedia()
+        sumber = (
+            ("memori", self._dari_memori),
+            ("cache_lokal", self._dari_cache_lokal),
+            ("batch", penyedia.harga_terakhir_banyak),
+            ("fast_info", lambda sisa: self._per_ticker(sisa, penyedia.harga_fast_info)),
+            ("lengkap", lambda sisa: self._per_ticker(sisa, lambda t: penyedia.info(t).get("regularMarketPrice"))),
+        )
+
+        hasil, tier_ticker = {}, {}
+        sisa = tickers
+        for tier, fungsi in sumber:
+            if not sisa:
+                break
+            try:
+                ditemukan = fungsi(sisa)
+            except Exception:
+                ditemukan = {}
+            for ticker, harga in ditemukan.items():
+                if ticker in sisa and harga:
+                    hasil[ticker] = harga
+                    tier_ticker[ticker] = tier
+            sisa = [t for t in sisa if t not in hasil]
+
+        sekarang = time.monotonic()
+        with self._kunci:
+            for ticker, harga in hasil.items():
+                self.statistik[tier_ticker[ticker]] += 1
+                if tier_ticker[ticker] != "memori":
+                    self._harga[ticker] = (sekarang, harga)
+            self.statistik['gagal'] += len(sisa)
+        return {ticker: (hasil.get(ticker), tier_ticker.get(ticker)) for ticker in tickers}
+
+# Satu penentu per proses agar cache harga singkat dipakai bersama semua sesi
+_PENENTU = None
+_KUNCI_PENENTU = threading.Lock()
+
+def penentu_bersama():
+    global _PENENTU
+    with _KUNCI_PENENTU:
+        if _PENENTU is None:
+            _PENENTU = PenentuHarga()
+        return _PENENTU
@@ -0,0 +1,148 @@
+import os
+import json
+import random
+import sqlite3
+import threading
+import time
+
+import cache_saham
+import indikator_inkremental
+import penyimpanan_portofolio
+
+# ======== Konfigurasi Prefetch ========
+PREFETCH_AKTIF = os.environ.get("PREFETCH_AKTIF", "0") == "1"
+MARGIN_DETIK = 5 * 60           # Perbarui 5 menit sebelum TTL habis
+JEDA_ANTAR_UNDUH_DETIK = 2.0    # Jarak minimum antar unduhan agar tidak membanjiri Yahoo
+BACKOFF_AWAL_DETIK = 30
+BACKOFF_MAKS_DETIK = 30 * 60
+
+def baca_ticker_portofolio(filename="portfolio.json"):
+    # Ticker dari ledger SQLite (semua akun); portfolio.json hanya dibaca selama belum dimigrasi
+    tickers = []
+    try:
+        tickers = penyimpanan_portofolio.daftar_ticker()
+        if penyimpanan_portofolio.sudah_dimigrasi(filename):
+            return tickers
+    except sqlite3.Error:
+        pass
+    try:
+        with open(filename, "r") as f:
+            tickers += [t for t in json.load(f).keys() if t not in tickers]
+    except (OSError, ValueError, AttributeError):
+        pass
+    return tickers
+
+# ======== Penjadwal Latar Belakang ========
+class PenjadwalPrefetch:
+    def __init__(self, filename="portfolio.json", cache_dir="cache", ttl_jam=1,
+                 ttl_info_jam=cache_saham.TTL_INFO_JAM, margin_detik=MARGIN_DETIK,
+                 jeda_detik=JEDA_ANTAR_UNDUH_DETIK):
+        self.filename = filename
+        self.cache_dir = cache_dir
+        self.ttl_jam = ttl_jam
+        self.ttl_info_jam = ttl_info_jam
+        self.margin_detik = margin_detik
+        self.jeda_detik = jeda_detik
+        self._berhenti = threading.Event()
+        self._thread = None
+        self._gagal = {}            # ticker -> (jumlah_gagal, coba_lagi_pada)
+        self.statistik = {'diperbarui': 0, 'galat': 0, 'terakhir': None}
+
+    def _kedaluwarsa(self, ticker):
+        # Waktu (epoch) paling awal salah satu file cache ticker ini kedaluwarsa
+        paths = cache_saham.path_cache(ticker, self.cache_dir)
+        try:
+            hist = os.path.getmtime(paths['hist']) + self.ttl_jam * 3600
+            info = os.path.getmtime(paths['info']) + self.ttl_info_jam * 3600
+            return min(hist, info)
+        except OSError:
+            return 0.0
+
+    def _jatuh_tempo(self, ticker):
+        tempo = self._kedaluwarsa(ticker) - self.margin_detik
+        if ticker in self._gagal:
+            tempo = max(tempo, self._gagal[ticker][1])
+        return tempo
+
+    def _perbarui(self, ticker):
+        # TTL diperkecil sebesar margin sehingga ambil_data memperbarui lebih awal
+        margin_jam = self.margin_detik / 3600
+        try:
+            hist, _ = cache_saham.ambil_data(
+                ticker,
+                cache_dir=self.cache_dir,
+                ttl_jam=max(self.ttl_jam - margin_jam, 0),
+                ttl_info_jam=max(self.ttl_info_jam - margin_jam, 0),
+                sajikan_basi=False,
+            )
+            if hist.empty:
+                raise ValueError(f"Data historis {ticker} kosong")
+            # Status indikator ikut dimajukan agar render berikutnya tidak perlu menghitung
+            indikator_inkremental.perbarui_indikator(ticker, hist, self.cache_dir)
+            self._gagal.pop(ticker, None)
+            self.statistik['diperbarui'] += 1
+        except Exception:
+            jumlah = self._gagal.get(ticker, (0, 0))[0] + 1
+            tunda = min(BACKOFF_AWAL_DETIK * 2 ** (jumlah - 1), BACKOFF_MAKS_DETIK)
+            self._gagal[ticker] = (jumlah, time.time() + tunda * random.uniform(0.8, 1.2))
+            self.statistik['galat'] += 1
+        self.statistik['terakhir'] = time.time()
+
+    def _loop(self):
+        while not self._berhenti.is_set():
+            tickers = baca_ticker_portofolio(self.filename)
+            if not tickers:
+                self._berhenti.wait(60)
+                continue
+
+            ticker = min(tickers, key=self._jatuh_tempo)
+            tunggu = self._jatuh_tempo(ticker) - time.time()
+            if tunggu > 0:
+                # Tidur paling lama 60 detik agar perubahan portofolio cepat terlihat
+                self._berhenti.wait(min(tunggu, 60))
+                continue
+
+            self._perbarui(ticker)
+            # Sebar unduhan dengan jeda acak agar tidak terjadi lonjakan permintaan
+            self._berhenti.wait(self.jeda_detik * random.uniform(1.0, 1.5))
+
+    def mulai(self):
+        if self.berjalan():
+            return self
+        self._berhenti.clear()
+        self._thread = threading.Thread(target=self._loop, name="prefetch-portofolio", daemon=True)
+        self._thread.start()
+        return self
+
+    def hentikan(self, timeout=None):
+        self._berhenti.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def berjalan(self):
+        return self._thread is not None and self._thread.is_alive()
+
+# Satu penjadwal per proses server, dipakai bersama semua sesi Streamlit
+_PENJADWAL = None
+_KUNCI = threading.Lock()
+
+def mulai_prefetch(**kwargs):
+    global _PENJADWAL
+    with _KUNCI:
+        if _PENJADWAL is None:
+            _PENJADWAL = PenjadwalPrefetch(**kwargs)
+        return _PENJADWAL.mulai()
+
+def penjadwal_aktif():
+    return _PENJADWAL if _PENJADWAL is not None and _PENJADWAL.berjalan() else None
+
+if __name__ == "__main__":
+    # Jalankan sebagai proses worker terpisah: python penjadwal_prefetch.py
+    penjadwal = PenjadwalPrefetch()
+    penjadwal.mulai()
+    try:
+        while penjadwal.berjalan():
+            time.sleep(60)
+            print(f"Prefetch: {penjadwal.statistik['diperbarui']} diperbarui, {penjadwal.statistik['galat']} galat")
+    except KeyboardInterrupt:
+        penjadwal.hentikan()
@@ -0,0 +1,290 @@
+import abc
+import os
+import json
+import random
+import threading
+import zlib
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+import impor_malas
+import transport_http
+
+# yfinance baru di-import saat data pertama kali diunduh, lihat impor_malas.py
+YFINANCE_ENABLED = impor_malas.tersedia("yfinance")
+yf = impor_malas.modul("yfinance")
+PYARROW_ENABLED = impor_malas.tersedia("pyarrow")
+
+# ======== Konfigurasi Penyedia ========
+# "yfinance" (default), "rekam" (yfinance + simpan ke disk), "replay" (hanya dari disk)
+# atau "sintetis" (data acak deterministik, tanpa jaringan)
+PENYEDIA_DATA = os.environ.get("PENYEDIA_DATA", "yfinance").lower()
+DIREKTORI_REPLAY = os.environ.get("PENYEDIA_REPLAY_DIR", "replay")
+HARI_PERIODE = {"1d": 1, "5d": 7, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 365, "2y": 730, "5y": 1826}
+
+class DataTidakTersedia(Exception):
+    pass
+
+def potong_riwayat(hist, period=None, start=None):
+    # Terapkan period/start gaya yfinance pada DataFrame riwayat yang sudah ada
+    if hist.empty:
+        return hist
+    if start is not None:
+        mulai = pd.Timestamp(start)
+        if mulai.tz is None and hist.index.tz is not None:
+            mulai = mulai.tz_localize(hist.index.tz)
+        return hist[hist.index >= mulai]
+    if period and period != "max":
+        return hist[hist.index > hist.index.max() - pd.Timedelta(days=HARI_PERIODE.get(period, 365))]
+    return hist
+
+# ======== Antarmuka Penyedia ========
+class PenyediaData(abc.ABC):
+    # Backend wajib mengimplementasikan riwayat() dan info(); sisanya punya bawaan
+    nama = "dasar"
+    aktif = True
+
+    @abc.abstractmethod
+    def riwayat(self, ticker, period="1y", start=None, interval="1d"):
+        ...
+
+    @abc.abstractmethod
+    def info(self, ticker):
+        ...
+
+    def harga_terakhir(self, ticker):
+        hist = self.riwayat(ticker, period="5d")
+        if hist.empty:
+            return None
+        return float(hist["Close"].dropna().iloc[-1])
+
+    def harga_terakhir_banyak(self, tickers):
+        # Backend tanpa endpoint batch cukup mengulang per ticker; ticker yang gagal dilewati
+        hasil = {}
+        for ticker in tickers:
+            try:
+                harga = self.harga_terakhir(ticker)
+            except Exception:
+                continue
+            if harga:
+                hasil[ticker] = harga
+        return hasil
+
+    def harga_fast_info(self, ticker):
+        return None
+
+# ======== Backend yfinance ========
+class PenyediaYFinance(PenyediaData):
+    nama = "yfinance"
+    aktif = YFINANCE_ENABLED
+
+    def _ticker(self, ticker):
+        return yf.Ticker(ticker, session=transport_http.sesi_bersama())
+
+    def riwayat(self, ticker, period="1y", start=None, interval="1d"):
+        if start is not None:
+            return self._ticker(ticker).history(start=start, interval=interval)
+        return self._ticker(ticker).history(period=period, interval=interval)
+
+    def info(self, ticker):
+        return getattr(self._ticker(ticker), "info", {}) or {}
+
+    def harga_terakhir(self, ticker):
+        # Dari sumber termurah ke termahal: fast_info, riwayat 5 hari, lalu info lengkap
+        ticker_obj = self._ticker(ticker)
+        harga = ticker_obj.fast_info.get("last_price")
+        if not harga:
+            close = ticker_obj.history(period="5d")["Close"].dropna()
+            harga = close.iloc[-1] if not close.empty else None
+        if not harga:
+            harga = ticker_obj.info.get("regularMarketPrice")
+        return harga
+
+    def harga_terakhir_banyak(self, tickers):
+        # Satu panggilan untuk semua ticker lewat yf.download (chart per simbol, paralel,
+        # tetap melewati pembatas laju transport bersama)
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        df = yf.download(tickers, period="5d", interval="1d", progress=False, threads=True,
+                         auto_adjust=True, session=transport_http.sesi_bersama())
+        if df is None or df.empty:
+            return {}
+        close = df["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        terakhir = close.ffill().iloc[-1]
+        return {ticker: float(harga) for ticker, harga in terakhir.items() if pd.notna(harga) and harga}
+
+    def harga_fast_info(self, ticker):
+        return self._ticker(ticker).fast_info.get("last_price")
+
+# ======== Backend Rekam/Replay ========
+class PenyediaReplay(PenyediaData):
+    # Mode rekam: teruskan ke sumber (yfinance) lalu simpan hasilnya ke disk.
+    # Mode replay: layani hanya dari rekaman, tanpa jaringan, untuk benchmark yang berulang.
+    def __init__(self, direktori=DIREKTORI_REPLAY, sumber=None, rekam=False):
+        self.direktori = direktori
+        self.sumber = sumber
+        self.rekam = rekam
+        self.nama = "rekam" if rekam else "replay"
+        self.aktif = sumber.aktif if rekam else True
+        self._kunci = threading.Lock()
+        os.makedirs(direktori, exist_ok=True)
+
+    def _path(self, ticker, jenis):
+        if jenis == "hist":
+            ekstensi = "parquet" if PYARROW_ENABLED else "pkl"
+        else:
+            ekstensi = "json"
+        return os.path.join(self.direktori, f"{ticker}_{jenis}.{ekstensi}")
+
+    def _baca_hist(self, ticker):
+        path = self._path(ticker, "hist")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_pickle(path)
+
+    def _tulis_hist(self, ticker, hist):
+        path = self._path(ticker, "hist")
+        # Gabungkan dengan rekaman lama agar rekaman tumbuh mengikuti pengambilan delta
+        lama = self._baca_hist(ticker)
+        if not lama.empty:
+            hist = pd.concat([lama, hist])
+            hist = hist[~hist.index.duplicated(keep="last")].sort_index()
+        if path.endswith(".parquet"):
+            hist.to_parquet(path)
+        else:
+            hist.to_pickle(path)
+
+    def riwayat(self, ticker, period="1y", start=None, interval="1d"):
+        if self.rekam:
+            hist = self.sumber.riwayat(ticker, period=period, start=start, interval=interval)
+            with self._kunci:
+                if not hist.empty:
+                    self._tulis_hist(ticker, hist)
+            return hist
+        hist = self._baca_hist(ticker)
+        if hist.empty:
+            raise DataTidakTersedia(f"Tidak ada rekaman riwayat untuk {ticker} di {self.direktori}")
+        return potong_riwayat(hist, period, start)
+
+    def info(self, ticker):
+        path = self._path(ticker, "info")
+        if self.rekam:
+            info = self.sumber.info(ticker)
+            with self._kunci:
+                with open(path, "w") as f:
+                    json.dump(info, f, default=str)
+            return info
+        if not os.path.exists(path):
+            raise DataTidakTersedia(f"Tidak ada rekaman info untuk {ticker} di {self.direktori}")
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def harga_terakhir(self, ticker):
+        if self.rekam:
+            self.riwayat(ticker, period="5d")
+            return self.sumber.harga_terakhir(ticker)
+        return super().harga_terakhir(ticker)
+
+    def harga_terakhir_banyak(self, tickers):
+        if self.rekam:
+            return self.sumber.harga_terakhir_banyak(tickers)
+        return super().harga_terakhir_banyak(tickers)
+
+# ======== Backend Data Sintetis ========
+def bar_sintetis(simbol, mulai, akhir):
+    # Random walk deterministik per simbol: (timestamp_utc, open, high, low, close, volume)
+    acak = random.Random(zlib.crc32(simbol.encode()))
+    harga = acak.uniform(500, 10000)
+    hari = datetime(2000, 1, 3, 2, 0, tzinfo=timezone.utc)   # 09:00 WIB
+    baris = []
+    while hari <= akhir:
+        if hari.weekday() < 5:
+            buka = harga
+            harga = max(1.0, harga * (1 + acak.gauss(0.0003, 0.018)))
+            if hari >= mulai:
+                rentang = abs(acak.gauss(0, 0.01)) * harga
+                baris.append((int(hari.timestamp()), buka, max(buka, harga) + rentang,
+                              min(buka, harga) - rentang, harga, acak.randint(10_000, 5_000_000)))
+        hari += timedelta(days=1)
+    return baris
+
+def zona_waktu(ticker):
+    return "Asia/Jakarta" if ticker.endswith(".JK") else "America/New_York"
+
+class PenyediaSintetis(PenyediaData):
+    nama = "sintetis"
+
+    def riwayat(self, ticker, period="1y", start=None, interval="1d"):
+        akhir = datetime.now(timezone.utc)
+        if start is not None:
+            mulai = pd.Timestamp(start, tz=zona_waktu(ticker)).tz_convert("UTC").to_pydatetime()
+        else:
+            mulai = akhir - timedelta(days=HARI_PERIODE.get(period, 365))
+        baris = bar_sintetis(ticker, mulai, akhir)
+        index = pd.to_datetime([b[0] for b in baris], unit="s", utc=True).tz_convert(zona_waktu(ticker)).normalize()
+        return pd.DataFrame({
+            "Open": [b[1] for b in baris],
+            "High": [b[2] for b in baris],
+            "Low": [b[3] for b in baris],
+            "Close": [b[4] for b in baris],
+            "Volume": [b[5] for b in baris],
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        }, index=pd.DatetimeIndex(index, name="Date"))
+
+    def info(self, ticker):
+        acak = random.Random(zlib.crc32(f"info-{ticker}".encode()))
+        return {
+            "symbol": ticker,
+            "industry": acak.choice(["Banks - Regional", "Telecom Services", "Coal", "Packaged Foods"]),
+            "trailingPE": round(acak.uniform(5, 30), 2),
+            "forwardPE": round(acak.uniform(5, 25), 2),
+            "priceToBook": round(acak.uniform(0.5, 5), 2),
+            "dividendYield": round(acak.uniform(0, 0.08), 4),
+            "dividendRate": round(acak.uniform(0, 500), 2),
+            "earningsGrowth": round(acak.uniform(-0.1, 0.2), 3),
+        }
+
+# ======== Pemilihan Penyedia ========
+_PENYEDIA = {}
+_KUNCI_PENYEDIA = threading.Lock()
+
+def buat_penyedia(nama):
+    if nama == "yfinance":
+        return PenyediaYFinance()
+    if nama == "rekam":
+        return PenyediaReplay(sumber=PenyediaYFinance(), rekam=True)
+    if nama == "replay":
+        return PenyediaReplay()
+    if nama == "sintetis":
+        return PenyediaSintetis()
+    raise ValueError(f"Penyedia data tidak dikenal: {nama}")
+
+def dapatkan_penyedia(nama=None):
+    nama = (nama or PENYEDIA_DATA).lower()
+    with _KUNCI_PENYEDIA:
+        if nama not in _PENYEDIA:
+            _PENYEDIA[nama] = buat_penyedia(nama)
+        return _PENYEDIA[nama]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rekam data pasar ke disk untuk penyedia replay")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--sumber", default="yfinance", choices=["yfinance", "sintetis"])
+    parser.add_argument("--direktori", default=DIREKTORI_REPLAY)
+    args = parser.parse_args()
+
+    perekam = PenyediaReplay(args.direktori, sumber=buat_penyedia(args.sumber), rekam=True)
+    for ticker in args.tickers:
+        try:
+            hist = perekam.riwayat(ticker, period=args.period)
+            perekam.info(ticker)
+            print(f"{ticker}: {len(hist)} bar direkam")
+        except Exception as e:
+            print(f"{ticker}: gagal ({e})")
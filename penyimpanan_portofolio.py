@@ -0,0 +1,435 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# ======== Penyimpanan Portofolio (Ledger SQLite) ========
+# Setiap pembelian/penjualan dicatat sebagai satu baris di tabel `transaksi` (hanya
+# ditambah, tidak pernah diubah). Posisi per akun × ticker dipelihara di tabel `posisi`
+# dalam transaksi database yang sama, sehingga satu edit hanya menulis beberapa baris
+# dan tidak pernah menulis ulang seluruh portofolio. Mode WAL membuat pembaca tidak
+# terblokir penulis dari proses worker lain.
+#
+# Satu akun = satu portofolio bernama milik satu pengguna. Setiap akun punya nomor versi
+# yang naik di setiap penulisan; penulis boleh menyertakan versi yang terakhir ia lihat
+# (optimistic concurrency) dan ditolak dengan KonflikVersi jika orang lain sudah menulis.
+PATH_DB = os.environ.get("PORTOFOLIO_DB", "portfolio.db")
+PENGGUNA_DEFAULT = os.environ.get("PORTOFOLIO_PENGGUNA", "default")
+NAMA_UTAMA = "Utama"
+AKUN_DEFAULT = PENGGUNA_DEFAULT    # Kunci portofolio utama pengguna = nama penggunanya
+LEMBAR_PER_LOT = 100
+AKHIRAN_IDX = ".JK"
+BATAS_TUNGGU_DETIK = 5.0
+
+SKEMA = """
+CREATE TABLE IF NOT EXISTS transaksi (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    akun TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    jenis TEXT NOT NULL CHECK (jenis IN ('beli', 'jual')),
+    lot INTEGER NOT NULL CHECK (lot > 0),
+    harga REAL,
+    tanggal TEXT NOT NULL,
+    dicatat REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transaksi_akun_ticker ON transaksi (akun, ticker, id);
+
+CREATE TABLE IF NOT EXISTS posisi (
+    akun TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    lot INTEGER NOT NULL,
+    biaya REAL,
+    tgl_beli TEXT,
+    PRIMARY KEY (akun, ticker)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS akun (
+    akun TEXT PRIMARY KEY,
+    pengguna TEXT NOT NULL,
+    nama TEXT NOT NULL,
+    versi INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (pengguna, nama)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    kunci TEXT PRIMARY KEY,
+    nilai TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+STATISTIK = {'baca_db': 0, 'cache': 0, 'transaksi': 0, 'migrasi': 0, 'konflik': 0}
+_KUNCI = threading.Lock()
+_LOKAL = threading.local()      # Koneksi SQLite per thread (sqlite3 tidak berbagi koneksi antar thread)
+_CACHE = {}                     # (path, akun) -> (versi, posisi)
+
+class KonflikVersi(Exception):
+    def __init__(self, akun, versi_diharapkan, versi_sekarang):
+        super().__init__(f"Portofolio {akun} sudah diubah (versi {versi_sekarang}, diharapkan {versi_diharapkan})")
+        self.akun = akun
+        self.versi_diharapkan = versi_diharapkan
+        self.versi_sekarang = versi_sekarang
+
+def _catat(nama, jumlah=1):
+    with _KUNCI:
+        STATISTIK[nama] += jumlah
+
+def koneksi(path=PATH_DB):
+    koneksi_thread = getattr(_LOKAL, "koneksi", None)
+    if koneksi_thread is None:
+        koneksi_thread = _LOKAL.koneksi = {}
+    conn = koneksi_thread.get(path)
+    if conn is None:
+        # isolation_level=None: transaksi dikelola sendiri lewat _transaksi (BEGIN IMMEDIATE)
+        conn = sqlite3.connect(path, timeout=BATAS_TUNGGU_DETIK, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # FULL: setiap COMMIT di-fsync sehingga transaksi yang sudah dikonfirmasi tidak hilang
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(SKEMA)
+        koneksi_thread[path] = conn
+    return conn
+
+@contextmanager
+def _transaksi(conn):
+    # BEGIN IMMEDIATE mengambil kunci tulis di awal sehingga dua penulis tidak saling
+    # menunggu upgrade kunci (SQLITE_BUSY di tengah transaksi)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+@contextmanager
+def _baca(conn):
+    # Transaksi baca: versi dan isi posisi berasal dari snapshot WAL yang sama
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.execute("COMMIT")
+
+# ======== Pengguna & Portofolio Bernama ========
+def akun_untuk(pengguna=PENGGUNA_DEFAULT, nama=NAMA_UTAMA):
+    # Kunci akun: "<pengguna>" untuk portofolio utama, "<pengguna>/<nama>" untuk lainnya
+    pengguna, nama = str(pengguna).strip(), str(nama).strip()
+    if not pengguna or "/" in pengguna:
+        raise ValueError("Nama pengguna tidak boleh kosong atau mengandung '/'")
+    if not nama:
+        raise ValueError("Nama portofolio tidak boleh kosong")
+    return pengguna if nama == NAMA_UTAMA else f"{pengguna}/{nama}"
+
+def _pastikan_akun(conn, akun):
+    pengguna, _, nama = akun.partition("/")
+    conn.execute("INSERT OR IGNORE INTO akun (akun, pengguna, nama) VALUES (?, ?, ?)",
+                 (akun, pengguna, nama or NAMA_UTAMA))
+
+def _versi(conn, akun):
+    baris = conn.execute("SELECT versi FROM akun WHERE akun = ?", (akun,)).fetchone()
+    return baris["versi"] if baris is not None else 0
+
+def _periksa_versi(conn, akun, versi_diharapkan=None):
+    # Dipanggil di dalam transaksi tulis (kunci tulis sudah dipegang), jadi periksa-lalu-naikkan atomik
+    _pastikan_akun(conn, akun)
+    sekarang = _versi(conn, akun)
+    if versi_diharapkan is not None and versi_diharapkan != sekarang:
+        _catat('konflik')
+        raise KonflikVersi(akun, versi_diharapkan, sekarang)
+    return sekarang
+
+def _naikkan_versi(conn, akun):
+    conn.execute("UPDATE akun SET versi = versi + 1 WHERE akun = ?", (akun,))
+
+def _invalidasi(path, akun=None):
+    with _KUNCI:
+        if akun is None:
+            for kunci in [k for k in _CACHE if k[0] == path]:
+                del _CACHE[kunci]
+        else:
+            _CACHE.pop((path, akun), None)
+
+def buat_portofolio(pengguna=PENGGUNA_DEFAULT, nama=NAMA_UTAMA, path=PATH_DB):
+    akun = akun_untuk(pengguna, nama)
+    conn = koneksi(path)
+    with _transaksi(conn):
+        _pastikan_akun(conn, akun)
+    return akun
+
+def daftar_portofolio(pengguna=PENGGUNA_DEFAULT, path=PATH_DB):
+    # Nama portofolio milik pengguna; portofolio utama selalu ada dan di urutan pertama
+    baris = koneksi(path).execute("SELECT nama FROM akun WHERE pengguna = ? ORDER BY nama", (pengguna,)).fetchall()
+    return [NAMA_UTAMA] + [b["nama"] for b in baris if b["nama"] != NAMA_UTAMA]
+
+def versi(akun=AKUN_DEFAULT, path=PATH_DB):
+    return _versi(koneksi(path), akun)
+
+# ======== Normalisasi Ticker ========
+# Ledger menyimpan simbol yfinance apa adanya (mis. "BBCA.JK", "AAPL"); semua halaman menulis
+# dan membaca lewat fungsi ini sehingga satu saham tidak tercatat dengan dua ejaan.
+def normalisasi_ticker(ticker):
+    return "".join(str(ticker).split()).upper()
+
+def ticker_idx(kode):
+    # Kode IDX tanpa akhiran bursa ("BBCA") -> "BBCA.JK"; simbol berakhiran dibiarkan
+    ticker = normalisasi_ticker(kode)
+    return ticker if not ticker or "." in ticker else ticker + AKHIRAN_IDX
+
+def kode_idx(ticker):
+    # Kebalikan ticker_idx untuk tampilan: "BBCA.JK" -> "BBCA", simbol lain tetap
+    return ticker[:-len(AKHIRAN_IDX)] if ticker.endswith(AKHIRAN_IDX) else ticker
+
+# ======== Penulisan Transaksi ========
+def _terapkan(conn, akun, ticker, jenis, lot, harga, tanggal):
+    # Perbarui posisi dengan metode biaya rata-rata: beli menambah biaya, jual mengurangi
+    # biaya sebanding lot yang dijual; posisi yang habis dihapus. Lot tanpa harga (hanya dari
+    # migrasi format lama) dihitung berbiaya 0, seperti Main01 lama: biaya NULL hanya selama
+    # belum ada satu pun pembelian berharga. Aturan yang sama berlaku di bangun_ulang_posisi.
+    baris = conn.execute("SELECT lot, biaya, tgl_beli FROM posisi WHERE akun = ? AND ticker = ?",
+                         (akun, ticker)).fetchone()
+    if jenis == "beli":
+        tambah = lot * LEMBAR_PER_LOT * harga if harga is not None else None
+        if baris is None:
+            conn.execute("INSERT INTO posisi (akun, ticker, lot, biaya, tgl_beli) VALUES (?, ?, ?, ?, ?)",
+                         (akun, ticker, lot, tambah, tanggal))
+        else:
+            bagian = [b for b in (baris["biaya"], tambah) if b is not None]
+            biaya = sum(bagian) if bagian else None
+            conn.execute("UPDATE posisi SET lot = ?, biaya = ? WHERE akun = ? AND ticker = ?",
+                         (baris["lot"] + lot, biaya, akun, ticker))
+        return
+    if baris is None or baris["lot"] < lot:
+        raise ValueError(f"Lot {ticker} tidak cukup untuk dijual ({baris['lot'] if baris else 0} < {lot})")
+    sisa = baris["lot"] - lot
+    if sisa == 0:
+        conn.execute("DELETE FROM posisi WHERE akun = ? AND ticker = ?", (akun, ticker))
+    else:
+        biaya = baris["biaya"] * sisa / baris["lot"] if baris["biaya"] is not None else None
+        conn.execute("UPDATE posisi SET lot = ?, biaya = ? WHERE akun = ? AND ticker = ?",
+                     (sisa, biaya, akun, ticker))
+
+def _normalisasi(ticker, jenis, lot, harga, izinkan_tanpa_harga=False):
+    ticker = normalisasi_ticker(ticker)
+    if not ticker:
+        raise ValueError("Kode saham tidak boleh kosong")
+    if jenis not in ("beli", "jual"):
+        raise ValueError(f"Jenis transaksi tidak dikenal: {jenis}")
+    lot = int(lot)
+    if lot <= 0:
+        raise ValueError("Jumlah lot harus lebih dari 0")
+    if harga is None and jenis == "beli" and not izinkan_tanpa_harga:
+        raise ValueError(f"Harga beli {ticker} wajib diisi")
+    if harga is not None:
+        harga = float(harga)
+        if harga < 0:
+            raise ValueError("Harga tidak boleh negatif")
+    return ticker, lot, harga
+
+def _sisipkan(conn, akun, transaksi, izinkan_tanpa_harga=False):
+    jumlah = 0
+    for item in transaksi:
+        ticker, jenis, lot, harga = item[:4]
+        tanggal = item[4] if len(item) > 4 and item[4] else datetime.now().strftime("%Y-%m-%d")
+        ticker, lot, harga = _normalisasi(ticker, jenis, lot, harga, izinkan_tanpa_harga)
+        conn.execute(
+            "INSERT INTO transaksi (akun, ticker, jenis, lot, harga, tanggal, dicatat) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (akun, ticker, jenis, lot, harga, tanggal, time.time()),
+        )
+        _terapkan(conn, akun, ticker, jenis, lot, harga, tanggal)
+        jumlah += 1
+    return jumlah
+
+def _tulis(akun, path, versi_diharapkan, buat_transaksi):
+    # buat_transaksi(conn) -> daftar transaksi, dipanggil setelah kunci tulis dipegang sehingga
+    # transaksi yang bergantung pada posisi saat ini (jual semua, kosongkan) bebas race.
+    # -> (jumlah transaksi, versi baru)
+    conn = koneksi(path)
+    try:
+        with _transaksi(conn):
+            versi_baru = _periksa_versi(conn, akun, versi_diharapkan)
+            jumlah = _sisipkan(conn, akun, buat_transaksi(conn))
+            if jumlah:
+                _naikkan_versi(conn, akun)
+                versi_baru += 1
+    finally:
+        _invalidasi(path, akun)
+    _catat('transaksi', jumlah)
+    return jumlah, versi_baru
+
+def catat_banyak(transaksi, akun=AKUN_DEFAULT, path=PATH_DB, versi_diharapkan=None):
+    # transaksi: iterable (ticker, jenis, lot, harga[, tanggal]); semua berhasil atau tidak sama sekali.
+    # versi_diharapkan: versi akun yang terakhir dilihat pemanggil, None = tanpa pemeriksaan
+    transaksi = list(transaksi)
+    return _tulis(akun, path, versi_diharapkan, lambda conn: transaksi)[0]
+
+def beli(ticker, lot, harga, tanggal=None, akun=AKUN_DEFAULT, path=PATH_DB, versi_diharapkan=None):
+    return catat_banyak([(ticker, "beli", lot, harga, tanggal)], akun, path, versi_diharapkan)
+
+def jual(ticker, lot, harga=None, tanggal=None, akun=AKUN_DEFAULT, path=PATH_DB, versi_diharapkan=None):
+    return catat_banyak([(ticker, "jual", lot, harga, tanggal)], akun, path, versi_diharapkan)
+
+def tutup_posisi(ticker, harga=None, akun=AKUN_DEFAULT, path=PATH_DB, versi_diharapkan=None):
+    # Jual seluruh lot ticker; False jika ticker tidak ada di portofolio
+    ticker = normalisasi_ticker(ticker)
+
+    def transaksi(conn):
+        baris = conn.execute("SELECT lot FROM posisi WHERE akun = ? AND ticker = ?", (akun, ticker)).fetchone()
+        return [(ticker, "jual", baris["lot"], harga)] if baris is not None else []
+    return _tulis(akun, path, versi_diharapkan, transaksi)[0] > 0
+
+def kosongkan(akun=AKUN_DEFAULT, path=PATH_DB, versi_diharapkan=None):
+    # Tutup semua posisi akun dalam satu transaksi; riwayat tetap tersimpan di ledger
+    def transaksi(conn):
+        baris = conn.execute("SELECT ticker, lot FROM posisi WHERE akun = ?", (akun,)).fetchall()
+        return [(b["ticker"], "jual", b["lot"], None) for b in baris]
+    return _tulis(akun, path, versi_diharapkan, transaksi)[0]
+
+# ======== Pembacaan Posisi (ter-cache per versi akun) ========
+def _baris_ke_posisi(baris):
+    lot = baris["lot"]
+    biaya = baris["biaya"]
+    harga_rata = biaya / (lot * LEMBAR_PER_LOT) if biaya is not None and lot else None
+    # Kunci untuk kedua format lama: main.py (harga_per_lembar, total_investasi, tgl_beli)
+    # dan Main01.py (harga_beli, None jika harga beli tidak diketahui)
+    return {
+        'lot': lot,
+        'harga_per_lembar': harga_rata or 0,
+        'harga_beli': harga_rata,
+        'total_investasi': biaya or 0,
+        'tgl_beli': baris["tgl_beli"] or '-',
+    }
+
+def muat(akun=AKUN_DEFAULT, path=PATH_DB):
+    # -> (versi, {ticker: {...}}). Cache dalam proses dibuang saat proses ini menulis; tulisan
+    # proses lain terdeteksi lewat versi akun (satu lookup primary key), bukan baca ulang penuh.
+    conn = koneksi(path)
+    versi_db = _versi(conn, akun)
+    with _KUNCI:
+        tersimpan = _CACHE.get((path, akun))
+    if tersimpan is not None and tersimpan[0] == versi_db:
+        _catat('cache')
+    else:
+        with _baca(conn):
+            versi_db = _versi(conn, akun)
+            baris = conn.execute(
+                "SELECT ticker, lot, biaya, tgl_beli FROM posisi WHERE akun = ? ORDER BY ticker", (akun,)
+            ).fetchall()
+        tersimpan = (versi_db, {b["ticker"]: _baris_ke_posisi(b) for b in baris})
+        with _KUNCI:
+            _CACHE[(path, akun)] = tersimpan
+        _catat('baca_db')
+    # Salinan agar pemanggil bebas mengubah tanpa merusak cache
+    return tersimpan[0], {ticker: dict(data) for ticker, data in tersimpan[1].items()}
+
+def posisi(akun=AKUN_DEFAULT, path=PATH_DB):
+    return muat(akun, path)[1]
+
+def daftar_ticker(path=PATH_DB):
+    # Semua ticker yang sedang dipegang di akun mana pun
+    baris = koneksi(path).execute("SELECT DISTINCT ticker FROM posisi ORDER BY ticker").fetchall()
+    return [b["ticker"] for b in baris]
+
+def riwayat_transaksi(akun=AKUN_DEFAULT, ticker=None, path=PATH_DB):
+    sql = "SELECT id, ticker, jenis, lot, harga, tanggal FROM transaksi WHERE akun = ?"
+    parameter = [akun]
+    if ticker:
+        sql += " AND ticker = ?"
+        parameter.append(normalisasi_ticker(ticker))
+    return [dict(b) for b in koneksi(path).execute(sql + " ORDER BY id", parameter)]
+
+def bangun_ulang_posisi(path=PATH_DB):
+    # Putar ulang seluruh ledger untuk membangun tabel posisi dari nol (pemulihan/verifikasi)
+    conn = koneksi(path)
+    try:
+        with _transaksi(conn):
+            conn.execute("DELETE FROM posisi")
+            for b in conn.execute("SELECT akun, ticker, jenis, lot, harga, tanggal FROM transaksi ORDER BY id").fetchall():
+                _pastikan_akun(conn, b["akun"])
+                _terapkan(conn, b["akun"], b["ticker"], b["jenis"], b["lot"], b["harga"], b["tanggal"])
+            conn.execute("UPDATE akun SET versi = versi + 1")
+    finally:
+        _invalidasi(path)
+
+# ======== Migrasi dari portfolio.json ========
+def _transaksi_dari_json(data):
+    # Format yang didukung:
+    #   main.py  : {ticker: {lot, harga_per_lembar, total_investasi, tgl_beli}}
+    #   Main01.py: {ticker: {lot, harga_beli}} dan format lama {ticker: lot}
+    for ticker, isi in data.items():
+        if isinstance(isi, (int, float)):
+            isi = {'lot': isi, 'harga_beli': None}
+        lot = int(isi.get('lot', 0) or 0)
+        if lot <= 0:
+            continue
+        if isi.get('total_investasi'):
+            # Harga rata-rata dari total investasi; harga_per_lembar main.py = harga beli terakhir
+            harga = isi['total_investasi'] / (lot * LEMBAR_PER_LOT)
+        elif isi.get('harga_per_lembar'):
+            harga = isi['harga_per_lembar']
+        else:
+            harga = isi.get('harga_beli')
+        tanggal = isi.get('tgl_beli') if isi.get('tgl_beli') not in (None, '-') else None
+        yield ticker, "beli", lot, harga, tanggal
+
+def sudah_dimigrasi(filename="portfolio.json", path=PATH_DB):
+    # True jika file JSON ini sudah pernah diimpor ke akun mana pun
+    awalan = f"migrasi:{os.path.abspath(filename)}:"
+    baris = koneksi(path).execute("SELECT 1 FROM meta WHERE substr(kunci, 1, ?) = ? LIMIT 1",
+                                  (len(awalan), awalan)).fetchone()
+    return baris is not None
+
+def migrasi_json(filename="portfolio.json", akun=AKUN_DEFAULT, path=PATH_DB):
+    # Impor portfolio.json sekali saja per (file, akun); file JSON tidak diubah.
+    # -> jumlah transaksi yang diimpor (0 jika sudah pernah atau file tidak ada)
+    if not os.path.exists(filename):
+        return 0
+    penanda = f"migrasi:{os.path.abspath(filename)}:{akun}"
+    conn = koneksi(path)
+    if conn.execute("SELECT 1 FROM meta WHERE kunci = ?", (penanda,)).fetchone():
+        return 0
+    with open(filename, "r") as f:
+        data = json.load(f)
+    transaksi = list(_transaksi_dari_json(data))
+    try:
+        with _transaksi(conn):
+            # Diperiksa ulang di dalam transaksi: proses lain mungkin baru saja memigrasi
+            if conn.execute("SELECT 1 FROM meta WHERE kunci = ?", (penanda,)).fetchone():
+                return 0
+            _periksa_versi(conn, akun)
+            # Format lama {ticker: lot} tidak menyimpan harga beli
+            _sisipkan(conn, akun, transaksi, izinkan_tanpa_harga=True)
+            _naikkan_versi(conn, akun)
+            conn.execute("INSERT INTO meta (kunci, nilai) VALUES (?, ?)", (penanda, str(len(transaksi))))
+    finally:
+        _invalidasi(path, akun)
+    _catat('migrasi', len(transaksi))
+    return len(transaksi)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kelola ledger portofolio SQLite")
+    parser.add_argument("--db", default=PATH_DB)
+    parser.add_argument("--pengguna", default=PENGGUNA_DEFAULT)
+    parser.add_argument("--portofolio", default=NAMA_UTAMA, help="Nama portofolio milik pengguna")
+    parser.add_argument("--migrasi", metavar="JSON", help="Impor portfolio.json (format main.py atau Main01.py)")
+    parser.add_argument("--bangun-ulang", action="store_true", help="Bangun ulang tabel posisi dari ledger")
+    parser.add_argument("--riwayat", action="store_true", help="Tampilkan seluruh transaksi akun")
+    args = parser.parse_args()
+    args.akun = akun_untuk(args.pengguna, args.portofolio)
+
+    if args.migrasi:
+        print(f"{migrasi_json(args.migrasi, args.akun, args.db)} transaksi diimpor dari {args.migrasi}")
+    if args.bangun_ulang:
+        bangun_ulang_posisi(args.db)
+        print("Tabel posisi dibangun ulang dari ledger")
+    if args.riwayat:
+        for t in riwayat_transaksi(args.akun, path=args.db):
+            print(f"#{t['id']} {t['tanggal']} {t['jenis']:4} {t['ticker']:10} {t['lot']:>6} lot @ {t['harga']}")
+    versi_akun, isi = muat(args.akun, args.db)
+    print(f"Portofolio {args.akun} (versi {versi_akun}), tersedia: {', '.join(daftar_portofolio(args.pengguna, args.db))}")
+    for ticker, data in isi.items():
+        print(f"{ticker:10} {data['lot']:>6} lot, rata-rata {data['harga_beli']}, total {data['total_investasi']:,.0f}")
@@ -0,0 +1,199 @@
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import impor_malas
+from sinkronisasi import kunci_file, tulis_atomik
+
+# Keras berat untuk di-import (TensorFlow ikut dimuat), jadi hanya diperiksa keberadaannya
+# di sini dan baru di-import saat model pertama kali dibutuhkan
+KERAS_ENABLED = impor_malas.tersedia("keras")
+
+# ======== Konfigurasi Forecaster LSTM ========
+DIREKTORI_LSTM = os.environ.get("LSTM_CACHE_DIR", "cache_lstm")
+PERIODE_JENDELA = 30
+EPOCHS = int(os.environ.get("LSTM_EPOCHS", "10"))
+UKURAN_BATCH = 32
+UNIT_LSTM = 50
+VERSI_ARSITEKTUR = 1    # Naikkan jika _bangun_model berubah agar bobot lama tidak dipakai
+
+STATISTIK = {'latih': 0, 'muat_disk': 0, 'muat_memori': 0, 'prediksi': 0, 'basi_dipakai': 0}
+_KUNCI_STATISTIK = threading.Lock()
+_KUNCI = threading.Lock()
+_MODEL = {}     # periode -> model Keras; bobot ticker dipasang bergantian dengan set_weights
+_BOBOT = {}     # ticker -> (sidik_jari, bobot, meta)
+
+def _catat(nama, jumlah=1):
+    with _KUNCI_STATISTIK:
+        STATISTIK[nama] += jumlah
+
+def jendela_geser(seri, periode=PERIODE_JENDELA):
+    # X[i] = seri[i:i+periode], y[i] = seri[i+periode]; X adalah view tanpa salinan
+    seri = np.asarray(seri, dtype="float32")
+    return sliding_window_view(seri[:-1], periode), seri[periode:]
+
+def sidik_jari(close, periode=PERIODE_JENDELA):
+    h = hashlib.sha256()
+    h.update(np.asarray(close, dtype="float64").tobytes())
+    h.update(json.dumps({'periode': periode, 'epochs': EPOCHS, 'unit': UNIT_LSTM,
+                         'arsitektur': VERSI_ARSITEKTUR}).encode())
+    return h.hexdigest()[:32]
+
+def _paths(ticker, cache_dir):
+    return {
+        'bobot': os.path.join(cache_dir, f"{ticker}_lstm.weights.h5"),
+        'meta': os.path.join(cache_dir, f"{ticker}_lstm.json"),
+        'lock': os.path.join(cache_dir, f"{ticker}_lstm.lock"),
+    }
+
+def _bangun_model(periode):
+    from keras.models import Sequential
+    from keras.layers import Input, LSTM, Dense
+
+    model = Sequential([
+        Input(shape=(periode, 1)),
+        LSTM(UNIT_LSTM, return_sequences=True),
+        LSTM(UNIT_LSTM),
+        Dense(1),
+    ])
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+def _model(periode):
+    with _KUNCI:
+        if periode not in _MODEL:
+            _MODEL[periode] = _bangun_model(periode)
+        return _MODEL[periode]
+
+def _skala(nilai, meta):
+    rentang = meta['maks'] - meta['min'] or 1.0
+    return (np.asarray(nilai, dtype="float32") - meta['min']) / rentang
+
+def _balik_skala(nilai, meta):
+    return nilai * ((meta['maks'] - meta['min']) or 1.0) + meta['min']
+
+# ======== Latih & Simpan Bobot per Ticker ========
+def latih(ticker, close, periode=PERIODE_JENDELA, cache_dir=DIREKTORI_LSTM):
+    # Latih satu ticker dari awal lalu simpan bobot + skala; close: array/Series harga penutupan
+    close = np.asarray(close, dtype="float64")
+    close = close[~np.isnan(close)]
+    if len(close) <= periode:
+        raise ValueError(f"Data {ticker} terlalu pendek untuk jendela {periode} bar")
+    meta = {'sidik_jari': sidik_jari(close, periode), 'periode': periode,
+            'min': float(close.min()), 'maks': float(close.max())}
+    X, y = jendela_geser(_skala(close, meta), periode)
+
+    model = _bangun_model(periode)
+    model.fit(X[..., np.newaxis], y, epochs=EPOCHS, batch_size=UKURAN_BATCH, verbose=0)
+    _catat('latih')
+
+    paths = _paths(ticker, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    with kunci_file(paths['lock']):
+        # Keras memilih format dari ekstensi, jadi file sementara tetap berakhiran .weights.h5
+        tmp = paths['bobot'][:-len(".weights.h5")] + ".tmp.weights.h5"
+        model.save_weights(tmp)
+        os.replace(tmp, paths['bobot'])
+        with tulis_atomik(paths['meta']) as tmp_meta:
+            with open(tmp_meta, "w") as f:
+                json.dump(meta, f)
+    with _KUNCI:
+        _BOBOT[ticker] = (meta['sidik_jari'], model.get_weights(), meta)
+    return meta
+
+def muat_bobot(ticker, periode=PERIODE_JENDELA, cache_dir=DIREKTORI_LSTM):
+    # -> (bobot, meta) dari memori atau disk, None jika ticker belum pernah dilatih
+    with _KUNCI:
+        tersimpan = _BOBOT.get(ticker)
+    if tersimpan is not None and tersimpan[2]['periode'] == periode:
+        _catat('muat_memori')
+        return tersimpan[1], tersimpan[2]
+
+    paths = _paths(ticker, cache_dir)
+    try:
+        with open(paths['meta'], "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('periode') != periode or not os.path.exists(paths['bobot']):
+        return None
+    model = _model(periode)
+    with _KUNCI:
+        model.load_weights(paths['bobot'])
+        bobot = model.get_weights()
+        _BOBOT[ticker] = (meta['sidik_jari'], bobot, meta)
+    _catat('muat_disk')
+    return bobot, meta
+
+# ======== Prediksi Banyak Ticker ========
+def prediksi_banyak(data, periode=PERIODE_JENDELA, latih_jika_perlu=True, pakai_basi=True,
+                    cache_dir=DIREKTORI_LSTM):
+    # data: {ticker: harga penutupan}. -> {ticker: prediksi harga bar berikutnya atau None}
+    # latih_jika_perlu=False: hanya memakai bobot yang sudah ada (untuk render halaman).
+    # pakai_basi=True: bobot dari data beberapa bar lebih lama tetap dipakai untuk inferensi.
+    if not KERAS_ENABLED:
+        raise ImportError("Keras tidak terinstall (pip install tensorflow)")
+    jendela, meta_ticker, bobot_ticker = {}, {}, {}
+    for ticker, close in data.items():
+        close = np.asarray(close, dtype="float64")
+        close = close[~np.isnan(close)]
+        if len(close) <= periode:
+            continue
+        tersimpan = muat_bobot(ticker, periode, cache_dir)
+        segar = tersimpan is not None and tersimpan[1]['sidik_jari'] == sidik_jari(close, periode)
+        if not segar and latih_jika_perlu:
+            latih(ticker, close, periode, cache_dir)
+            tersimpan = muat_bobot(ticker, periode, cache_dir)
+        elif not segar and (tersimpan is None or not pakai_basi):
+            continue
+        elif not segar:
+            _catat('basi_dipakai')
+        bobot_ticker[ticker], meta_ticker[ticker] = tersimpan
+        # Jendela terakhir sudah dalam skala model; tidak di-transform ulang
+        jendela[ticker] = _skala(close[-periode:], meta_ticker[ticker])
+
+    hasil = dict.fromkeys(data)
+    if not jendela:
+        return hasil
+    # Satu model dipakai bergantian: bobot tiap ticker dipasang lalu inferensi langsung
+    # lewat predict_on_batch, tanpa membangun model baru per ticker
+    model = _model(periode)
+    with _KUNCI:
+        for ticker, x in jendela.items():
+            model.set_weights(bobot_ticker[ticker])
+            prediksi = float(np.asarray(model.predict_on_batch(x.reshape(1, periode, 1))).ravel()[0])
+            hasil[ticker] = float(_balik_skala(prediksi, meta_ticker[ticker]))
+    _catat('prediksi', len(jendela))
+    return hasil
+
+def prediksi_harga_lstm(close, ticker, periode=PERIODE_JENDELA, cache_dir=DIREKTORI_LSTM):
+    # ticker wajib: bobot disimpan per ticker, jadi tiap saham harus punya slotnya sendiri
+    return prediksi_banyak({ticker: close}, periode, cache_dir=cache_dir)[ticker]
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import cache_saham
+
+    parser = argparse.ArgumentParser(description="Latih/perbarui bobot LSTM per ticker dari cache harga lokal")
+    parser.add_argument("tickers", nargs="*", help="Default: semua ticker di cache")
+    parser.add_argument("--cache-dir", default="cache")
+    parser.add_argument("--periode", type=int, default=PERIODE_JENDELA)
+    args = parser.parse_args()
+
+    tickers = args.tickers or cache_saham.daftar_ticker(args.cache_dir)
+    data = {}
+    for ticker in tickers:
+        hist = cache_saham.baca_riwayat(cache_saham.path_cache(ticker, args.cache_dir), kolom=["Close"])
+        if not hist.empty:
+            data[ticker] = hist["Close"]
+    mulai = time.perf_counter()
+    hasil = prediksi_banyak(data, args.periode)
+    print(f"{len(hasil)} ticker dalam {time.perf_counter() - mulai:.1f} s, statistik: {STATISTIK}")
+    for ticker, prediksi in hasil.items():
+        print(f"{ticker}: {prediksi if prediksi is not None else '-'}")
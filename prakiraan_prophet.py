@@ -0,0 +1,293 @@
+import os
+import io
+import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+import impor_malas
+from sinkronisasi import SingleFlight, tulis_atomik
+
+# Prophet (dan cmdstanpy) baru di-import saat model pertama di-fit/dimuat, lihat impor_malas.py
+PROPHET_ENABLED = impor_malas.tersedia("prophet")
+VERSI_PROPHET = impor_malas.versi("prophet")
+Prophet = impor_malas.atribut("prophet", "Prophet")
+model_to_json = impor_malas.atribut("prophet.serialize", "model_to_json")
+model_from_json = impor_malas.atribut("prophet.serialize", "model_from_json")
+
+# ======== Konfigurasi Cache Prakiraan ========
+# Model Prophet yang sudah di-fit dan DataFrame prakiraannya disimpan di disk, dengan kunci
+# hash deret input + parameter model + periode, sehingga klik ulang tanpa perubahan data
+# langsung dilayani dari cache.
+DIREKTORI_PRAKIRAAN = os.environ.get("PRAKIRAAN_CACHE_DIR", "cache_prakiraan")
+MAKS_ENTRI_PRAKIRAAN = int(os.environ.get("PRAKIRAAN_MAKS_ENTRI", "200"))
+PARAMETER_DEFAULT = {"daily_seasonality": True}
+
+# Mode cepat untuk pemakaian interaktif: tanpa MCMC dan sampling ketidakpastian, tanpa
+# musiman harian/tahunan yang tidak cocok untuk bar harian bursa dengan riwayat 1 tahun
+PARAMETER_CEPAT = {
+    "daily_seasonality": False,
+    "weekly_seasonality": True,
+    "yearly_seasonality": False,
+    "mcmc_samples": 0,
+    "uncertainty_samples": 0,
+}
+PRESET = {"standar": PARAMETER_DEFAULT, "cepat": PARAMETER_CEPAT}
+
+# Fit Stan berjalan satu thread dan terikat CPU: prakiraan banyak ticker dibagi ke proses terpisah
+MAKS_PROSES = int(os.environ.get("PRAKIRAAN_MAKS_PROSES", "0")) or (
+    len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+)
+
+STATISTIK = {'hit': 0, 'miss': 0, 'fit': 0, 'warm_start': 0, 'digusur': 0}
+_KUNCI_STATISTIK = threading.Lock()
+_SINGLE_FLIGHT = SingleFlight()
+
+def _catat(nama, jumlah=1):
+    with _KUNCI_STATISTIK:
+        STATISTIK[nama] += jumlah
+
+def siapkan_data(hist):
+    # Riwayat harga -> DataFrame ds/y untuk Prophet (tanpa timezone)
+    df = hist[['Close']].reset_index()
+    df.columns = ['ds', 'y']
+    df['ds'] = pd.to_datetime(df['ds']).dt.tz_localize(None)
+    df['y'] = df['y'].astype("float64")
+    return df.dropna()
+
+def sidik_jari(df, parameter, periode_hari):
+    h = hashlib.sha256()
+    h.update(df['ds'].to_numpy(dtype="datetime64[ns]").view("int64").tobytes())
+    h.update(df['y'].to_numpy(dtype="float64").tobytes())
+    h.update(json.dumps({'parameter': parameter, 'periode': periode_hari, 'prophet': VERSI_PROPHET},
+                        sort_keys=True, default=str).encode())
+    return h.hexdigest()[:32]
+
+def _path(kunci, cache_dir):
+    return os.path.join(cache_dir, f"{kunci}.json")
+
+def _baca(path):
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        forecast = pd.read_json(io.StringIO(data['forecast']), orient="split", convert_dates=["ds"])
+        os.utime(path)      # Tandai akses untuk eviksi LRU
+        return data, forecast
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+def _tulis(path, model, forecast, parameter, periode_hari):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with tulis_atomik(path) as tmp:
+        with open(tmp, "w") as f:
+            json.dump({
+                'parameter': parameter,
+                'periode': periode_hari,
+                'model': model_to_json(model),
+                'forecast': forecast.to_json(orient="split", date_format="iso", date_unit="ns"),
+            }, f)
+
+def bersihkan(cache_dir=DIREKTORI_PRAKIRAAN, maks_entri=MAKS_ENTRI_PRAKIRAAN):
+    # Eviksi LRU: hapus entri yang paling lama tidak diakses di atas batas jumlah entri
+    if not os.path.isdir(cache_dir):
+        return 0
+    entri = []
+    for nama in os.listdir(cache_dir):
+        if nama.endswith(".json"):
+            path = os.path.join(cache_dir, nama)
+            try:
+                entri.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    digusur = 0
+    for _, path in sorted(entri)[:max(len(entri) - maks_entri, 0)]:
+        try:
+            os.remove(path)
+            digusur += 1
+        except OSError:
+            pass
+    _catat('digusur', digusur)
+    return digusur
+
+# ======== Registri Parameter Model (Warm Start) ========
+# Parameter Stan hasil fit terakhir per ticker + konfigurasi model. Fit ulang pada data yang
+# hanya bertambah beberapa hari dimulai dari titik ini sehingga optimizer cepat konvergen.
+def _path_registri(ticker, parameter, cache_dir):
+    konfigurasi = hashlib.sha256(json.dumps(parameter, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, "registri", f"{ticker}_{konfigurasi}.json")
+
+def parameter_awal(model):
+    # Titik awal optimizer dari model yang sudah di-fit (rata-rata sampel bila memakai MCMC)
+    hasil = {}
+    for nama in ('k', 'm', 'sigma_obs'):
+        hasil[nama] = float(model.params[nama].mean())
+    for nama in ('delta', 'beta'):
+        hasil[nama] = model.params[nama].mean(axis=0).tolist()
+    return hasil
+
+def baca_registri(ticker, parameter, cache_dir=DIREKTORI_PRAKIRAAN):
+    try:
+        with open(_path_registri(ticker, parameter, cache_dir), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _simpan_registri(ticker, parameter, model, cache_dir):
+    path = _path_registri(ticker, parameter, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tulis_atomik(path) as tmp:
+        with open(tmp, "w") as f:
+            json.dump(parameter_awal(model), f)
+
+def fit_prakiraan(df, periode_hari, parameter, init=None):
+    model = Prophet(**parameter)
+    if init is not None:
+        try:
+            model.fit(df, init=init)
+        except Exception:
+            # Bentuk parameter tidak cocok (mis. jumlah changepoint berubah): fit dari awal
+            model = Prophet(**parameter)
+            model.fit(df)
+    else:
+        model.fit(df)
+    future = model.make_future_dataframe(periods=periode_hari)
+    return model, model.predict(future)
+
+def prakiraan(hist, periode_hari=30, parameter=None, paksa_fit=False, cache_dir=DIREKTORI_PRAKIRAAN, ticker=None):
+    # -> (df input ds/y, forecast, dari_cache). Dengan ticker, fit memakai warm start dari registri.
+    if not PROPHET_ENABLED:
+        raise ImportError("Prophet tidak terinstall (pip install prophet)")
+    parameter = dict(PARAMETER_DEFAULT if parameter is None else parameter)
+    df = siapkan_data(hist)
+    kunci = sidik_jari(df, parameter, periode_hari)
+    path = _path(kunci, cache_dir)
+
+    if not paksa_fit:
+        _, forecast = _baca(path)
+        if forecast is not None:
+            _catat('hit')
+            return df, forecast, True
+    _catat('miss')
+
+    def fit():
+        init = baca_registri(ticker, parameter, cache_dir) if ticker else None
+        model, forecast = fit_prakiraan(df, periode_hari, parameter, init)
+        _catat('fit')
+        if init is not None:
+            _catat('warm_start')
+        _tulis(path, model, forecast, parameter, periode_hari)
+        if ticker:
+            _simpan_registri(ticker, parameter, model, cache_dir)
+        bersihkan(cache_dir)
+        return forecast
+
+    # Klik ganda / beberapa sesi dengan data yang sama hanya memicu satu fit
+    forecast = _SINGLE_FLIGHT.jalankan(kunci, fit)
+    return df, forecast, False
+
+def muat_model(hist, periode_hari=30, parameter=None, cache_dir=DIREKTORI_PRAKIRAAN):
+    # Model Prophet dari cache (mis. untuk prediksi tanggal lain), None jika belum pernah di-fit
+    parameter = dict(PARAMETER_DEFAULT if parameter is None else parameter)
+    df = siapkan_data(hist)
+    data, _ = _baca(_path(sidik_jari(df, parameter, periode_hari), cache_dir))
+    return model_from_json(data['model']) if data else None
+
+# ======== Prakiraan Banyak Ticker Paralel ========
+def ringkasan(ticker, df, forecast, periode_hari):
+    # Satu baris tabel gabungan: harga terakhir dan prakiraan di ujung horizon
+    akhir = forecast.iloc[-1]
+    terakhir = float(df['y'].iloc[-1])
+    return {
+        'Saham': ticker,
+        'Harga Terakhir': terakhir,
+        'Tanggal Prakiraan': akhir['ds'],
+        'Prakiraan': float(akhir['yhat']),
+        # Tanpa sampling ketidakpastian (mode cepat) Prophet tidak menghasilkan interval
+        'Batas Bawah': float(akhir['yhat_lower']) if 'yhat_lower' in akhir else None,
+        'Batas Atas': float(akhir['yhat_upper']) if 'yhat_upper' in akhir else None,
+        'Perubahan (%)': (float(akhir['yhat']) / terakhir - 1) * 100 if terakhir else None,
+    }
+
+def _kerja_prakiraan(ticker, hist, periode_hari, parameter, paksa_fit, cache_dir):
+    # Dijalankan di proses pekerja; harus fungsi tingkat modul agar bisa di-pickle
+    df, forecast, dari_cache = prakiraan(hist, periode_hari, parameter, paksa_fit, cache_dir, ticker)
+    return ticker, df, forecast, dari_cache
+
+_POOL = None
+_KUNCI_POOL = threading.Lock()
+
+def _pool(maks_proses):
+    # Pool dipakai ulang antar klik agar biaya start proses + import Prophet dibayar sekali.
+    # "spawn" dipakai karena fork dari server Streamlit yang multithread tidak aman.
+    global _POOL
+    with _KUNCI_POOL:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=maks_proses, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+def _reset_pool():
+    global _POOL
+    with _KUNCI_POOL:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+def prakiraan_banyak(data, periode_hari=30, parameter=None, paksa_fit=False,
+                     cache_dir=DIREKTORI_PRAKIRAAN, maks_proses=MAKS_PROSES):
+    # data: {ticker: riwayat}. Generator (ticker, df, forecast, dari_cache, galat) sesuai urutan
+    # selesai, sehingga UI bisa menampilkan hasil begitu satu ticker rampung.
+    if not PROPHET_ENABLED:
+        raise ImportError("Prophet tidak terinstall (pip install prophet)")
+    parameter = dict(PARAMETER_DEFAULT if parameter is None else parameter)
+
+    perlu_fit = {}
+    for ticker, hist in data.items():
+        if hist is None or hist.empty:
+            yield ticker, None, None, False, "Data historis kosong"
+            continue
+        df = siapkan_data(hist)
+        # Cache hit dilayani langsung tanpa mengirim data ke proses pekerja
+        _, forecast = (None, None) if paksa_fit else _baca(_path(sidik_jari(df, parameter, periode_hari), cache_dir))
+        if forecast is not None:
+            _catat('hit')
+            yield ticker, df, forecast, True, None
+        else:
+            perlu_fit[ticker] = hist
+    if not perlu_fit:
+        return
+
+    if maks_proses <= 1 or len(perlu_fit) == 1:
+        for ticker, hist in perlu_fit.items():
+            try:
+                yield _kerja_prakiraan(ticker, hist, periode_hari, parameter, paksa_fit, cache_dir) + (None,)
+            except Exception as e:
+                yield ticker, None, None, False, str(e)
+        return
+
+    registri_awal = {t for t in perlu_fit if baca_registri(t, parameter, cache_dir) is not None}
+    pool = _pool(maks_proses)
+    futures = {
+        pool.submit(_kerja_prakiraan, ticker, hist, periode_hari, parameter, paksa_fit, cache_dir): ticker
+        for ticker, hist in perlu_fit.items()
+    }
+    for future in as_completed(futures):
+        ticker = futures[future]
+        try:
+            hasil = future.result()
+        except BrokenProcessPool as e:
+            _reset_pool()
+            yield ticker, None, None, False, f"Proses pekerja berhenti: {e}"
+            continue
+        except Exception as e:
+            yield ticker, None, None, False, str(e)
+            continue
+        # Statistik proses pekerja tidak terlihat di sini, jadi dicatat ulang di proses induk
+        _catat('miss')
+        _catat('fit')
+        if ticker in registri_awal:
+            _catat('warm_start')
+        yield hasil + (None,)
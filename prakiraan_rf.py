@@ -0,0 +1,133 @@
+import os
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+import impor_malas
+import indikator
+
+# scikit-learn baru di-import saat model pertama dilatih, lihat impor_malas.py
+SKLEARN_ENABLED = impor_malas.tersedia("sklearn")
+RandomForestRegressor = impor_malas.atribut("sklearn.ensemble", "RandomForestRegressor")
+
+# ======== Konfigurasi Forecaster Random Forest ========
+# Satu model gabungan untuk semua ticker: fitur berupa return, volatilitas dan indikator
+# yang sudah dinormalisasi sehingga skala harga antar ticker tidak berpengaruh.
+HORIZON = (1, 5, 10, 20)            # Dalam bar (hari bursa)
+LAG_RETURN = (1, 2, 3, 5, 10, 20)
+JENDELA_VOLATILITAS = 20
+PARAMETER_RF = {
+    "n_estimators": int(os.environ.get("RF_N_ESTIMATORS", "100")),
+    "max_depth": 8,
+    "max_samples": 0.3,         # Tiap pohon cukup 30% baris: latih jauh lebih cepat, galat hampir sama
+    "min_samples_leaf": 20,
+    "max_features": 0.5,
+    "n_jobs": -1,
+    "random_state": 0,
+}
+
+STATISTIK = {'latih': 0, 'cache': 0}
+_KUNCI = threading.Lock()
+_MODEL = {}     # sidik jari data latih -> model
+
+def _geser(nilai, k):
+    # nilai k bar sebelumnya (k > 0) atau sesudahnya (k < 0) pada array rapat tanggal × ticker
+    hasil = np.full_like(nilai, np.nan)
+    if k > 0:
+        hasil[k:] = nilai[:-k]
+    elif k < 0:
+        hasil[:k] = nilai[-k:]
+    else:
+        hasil[:] = nilai
+    return hasil
+
+def fitur_rapat(data):
+    # -> (tickers, close rapat, {nama_fitur: array tanggal × ticker}); baris terakhir = bar terbaru
+    panel = indikator.panel_harga(data)
+    if panel.empty:
+        return [], np.empty((0, 0)), {}
+    close, nilai, _ = indikator.indikator_rapat(panel, indikator.kehadiran(data, panel))
+    log_close = np.log(close)
+    fitur = {f"ret_{k}": log_close - _geser(log_close, k) for k in LAG_RETURN}
+
+    # Volatilitas bergulir dari return harian lewat jumlah kumulatif, tanpa loop per ticker
+    ret = fitur["ret_1"]
+    valid = ~np.isnan(ret)
+    r = np.where(valid, ret, 0.0)
+    n = JENDELA_VOLATILITAS
+    jumlah = np.cumsum(r, axis=0) - _geser(np.cumsum(r, axis=0), n)
+    jumlah_kuadrat = np.cumsum(r * r, axis=0) - _geser(np.cumsum(r * r, axis=0), n)
+    cukup = np.cumsum(valid, axis=0) >= n
+    varians = (jumlah_kuadrat - jumlah * jumlah / n) / (n - 1)
+    fitur["volatilitas"] = np.where(cukup, np.sqrt(np.maximum(varians, 0.0)), np.nan)
+
+    fitur["rsi"] = nilai['RSI_14'] / 100
+    fitur["macd"] = nilai['MACD'] / close
+    fitur["macd_hist"] = (nilai['MACD'] - nilai['MACD_signal']) / close
+    fitur["jarak_ma50"] = close / nilai['MA_50'] - 1
+    return list(panel.columns), close, fitur
+
+def target_rapat(close, horizon=HORIZON):
+    # Log return ke depan untuk setiap horizon: array tanggal × ticker × horizon
+    log_close = np.log(close)
+    return np.stack([_geser(log_close, -h) - log_close for h in horizon], axis=-1)
+
+def _matriks(fitur):
+    return np.stack(list(fitur.values()), axis=-1)
+
+def sidik_jari(data):
+    h = hashlib.sha256()
+    for ticker in sorted(data):
+        close = data[ticker]["Close"]
+        h.update(ticker.encode())
+        h.update(np.asarray(close, dtype="float64").tobytes())
+    h.update(repr((HORIZON, LAG_RETURN, sorted(PARAMETER_RF.items()))).encode())
+    return h.hexdigest()[:32]
+
+def latih(data, horizon=HORIZON):
+    # Satu model multi-output untuk semua ticker; baris tanpa fitur/target lengkap dibuang
+    if not SKLEARN_ENABLED:
+        raise ImportError("scikit-learn tidak terinstall (pip install scikit-learn)")
+    _, close, fitur = fitur_rapat(data)
+    if not fitur:
+        raise ValueError("Tidak ada data harga untuk dilatih")
+    X = _matriks(fitur).reshape(-1, len(fitur))
+    Y = target_rapat(close, horizon).reshape(-1, len(horizon))
+    baris = np.isfinite(X).all(axis=1) & np.isfinite(Y).all(axis=1)
+    if baris.sum() < 100:
+        raise ValueError("Data terlalu pendek untuk melatih model")
+    model = RandomForestRegressor(**PARAMETER_RF)
+    model.fit(X[baris], Y[baris])
+    with _KUNCI:
+        STATISTIK['latih'] += 1
+    return model
+
+def model_untuk(data):
+    # Model dipakai ulang selama data latih tidak berubah (per proses)
+    kunci = sidik_jari(data)
+    with _KUNCI:
+        model = _MODEL.get(kunci)
+        if model is not None:
+            STATISTIK['cache'] += 1
+            return model
+    model = latih(data)
+    with _KUNCI:
+        _MODEL.clear()      # Hanya model terbaru yang disimpan; data lama tidak dipakai lagi
+        _MODEL[kunci] = model
+    return model
+
+def prediksi(data, model=None, horizon=HORIZON):
+    # -> DataFrame ticker × horizon berisi prediksi harga, satu panggilan predict untuk semua ticker
+    tickers, close, fitur = fitur_rapat(data)
+    if not tickers:
+        return pd.DataFrame()
+    model = model if model is not None else model_untuk(data)
+    X = _matriks(fitur)[-1]
+    terakhir = close[-1]
+    hasil = np.full((len(tickers), len(horizon)), np.nan)
+    lengkap = np.isfinite(X).all(axis=1)
+    if lengkap.any():
+        hasil[lengkap] = terakhir[lengkap, None] * np.exp(model.predict(X[lengkap]))
+    return pd.DataFrame(hasil, index=pd.Index(tickers, name="Ticker"), columns=[f"H+{h}" for h in horizon])
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+# ======== Mesin Proyeksi Investasi (Bentuk Tertutup) ========
+# Semua fungsi menerima skalar atau array NumPy dan mengikuti aturan broadcasting, sehingga
+# satu panggilan bisa menghitung seluruh grid tingkat bunga × jangka waktu × setoran.
+
+def nilai_masa_depan(modal_awal, tingkat_tahunan, tahun, setoran=0.0, periode_per_tahun=12):
+    # Nilai akhir dengan bunga majemuk per periode dan setoran di akhir setiap periode:
+    #   FV = P(1+i)^n + C((1+i)^n - 1)/i, dengan i = tingkat/periode, n = tahun × periode
+    # tingkat_tahunan dalam persen; setoran per periode (bulanan jika periode_per_tahun=12)
+    i = np.asarray(tingkat_tahunan, dtype="float64") / 100 / periode_per_tahun
+    n = np.asarray(tahun, dtype="float64") * periode_per_tahun
+    faktor = np.power(1 + i, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        anuitas = np.where(i == 0, n, (faktor - 1) / np.where(i == 0, 1, i))
+    return modal_awal * faktor + np.asarray(setoran, dtype="float64") * anuitas
+
+def bunga_majemuk(modal_awal, tingkat_tahunan, tahun):
+    # Majemuk tahunan tanpa setoran
+    return nilai_masa_depan(modal_awal, tingkat_tahunan, tahun, 0.0, periode_per_tahun=1)
+
+def jalur_tahunan(modal_awal, tingkat_tahunan, tahun, setoran_bulanan=0.0):
+    # Nilai di akhir tahun 1..tahun dengan majemuk + setoran bulanan -> DataFrame Tahun/Nilai
+    tahun_ke = np.arange(1, int(tahun) + 1)
+    return pd.DataFrame({
+        'Tahun': tahun_ke,
+        'Nilai': nilai_masa_depan(modal_awal, tingkat_tahunan, tahun_ke, setoran_bulanan),
+    })
+
+def pertumbuhan_tahunan(nilai_awal, cagr, tahun, imbal_dividen=0.0, reinvestasi=True):
+    # Proyeksi CAGR (persen) dengan dividen (rasio, mis. 0.03) yang opsional diinvestasikan ulang
+    laju = cagr / 100 + (imbal_dividen if reinvestasi else 0.0)
+    return nilai_awal * np.power(1 + laju, np.arange(1, int(tahun) + 1))
+
+def grid_sensitivitas(modal_awal, tingkat_tahunan, tahun, setoran_bulanan=(0.0,)):
+    # -> array [tingkat, tahun, setoran]; setiap sumbu boleh berisi banyak nilai
+    tingkat = np.asarray(tingkat_tahunan, dtype="float64")[:, None, None]
+    jangka = np.asarray(tahun, dtype="float64")[None, :, None]
+    setoran = np.asarray(setoran_bulanan, dtype="float64")[None, None, :]
+    return nilai_masa_depan(modal_awal, tingkat, jangka, setoran)
+
+def tabel_sensitivitas(modal_awal, tingkat_tahunan, tahun, setoran_bulanan=0.0):
+    # Irisan 2D grid untuk satu nilai setoran: baris = tingkat (%), kolom = tahun
+    nilai = grid_sensitivitas(modal_awal, tingkat_tahunan, tahun, [setoran_bulanan])[:, :, 0]
+    return pd.DataFrame(nilai, index=pd.Index(tingkat_tahunan, name="Tingkat (%)"),
+                        columns=pd.Index(tahun, name="Tahun"))
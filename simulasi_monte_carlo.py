@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import indikator
+
+# ======== Simulasi Monte Carlo Portofolio ========
+# Jalur nilai portofolio (beli dan tahan) disimulasikan dari distribusi return historis
+# saham yang benar-benar dipegang. Langkah simulasi bulanan (21 hari bursa):
+#   - "cholesky": return log bulanan ~ N(21μ, 21Σ), berkorelasi lewat faktor Cholesky Σ
+#   - "bootstrap": blok return 21 hari historis diambil acak (korelasi & ekor gemuk terjaga)
+# Jalur diproses per chunk agar memori tetap terbatas berapa pun jumlah jalurnya.
+HARI_PER_BULAN = 21
+JUMLAH_JALUR = int(os.environ.get("MC_JUMLAH_JALUR", "10000"))
+# Status per chunk (jalur × saham float32) cukup kecil untuk tetap di cache L2 CPU
+UKURAN_CHUNK = int(os.environ.get("MC_UKURAN_CHUNK", "4096"))
+# Jumlah vektor return normal di kolam metode "cholesky", lihat _kolam_cholesky. Kolam kecil
+# muat di cache CPU; 8192 baris sudah memberi persentil dalam batas galat Monte Carlo
+UKURAN_KOLAM = int(os.environ.get("MC_UKURAN_KOLAM", "8192"))
+PERSENTIL = (5, 25, 50, 75, 95)
+
+def panel_return(data):
+    # {ticker: riwayat} -> DataFrame return log harian, hanya tanggal saat semua ticker punya harga
+    panel = indikator.panel_harga(data)
+    if panel.empty:
+        return panel
+    return np.log(panel.ffill()).diff().dropna(how="any")
+
+def _faktor(kovarians):
+    # Faktor Cholesky atas; jitter kecil di diagonal agar matriks hampir singular tetap jalan
+    jitter = 1e-12 * max(float(np.trace(kovarians)), 1e-12)
+    return np.linalg.cholesky(kovarians + jitter * np.eye(len(kovarians))).T
+
+# Setiap metode menghasilkan kolam return log bulanan (baris × saham); setiap bulan setiap jalur
+# mengambil satu baris kolam secara acak
+def _kolam_cholesky(ret, acak, ukuran_kolam=UKURAN_KOLAM):
+    # Membangkitkan normal baru untuk setiap jalur × bulan × saham (180 juta angka untuk
+    # 100k jalur, 30 saham, 5 tahun) memakan waktu beberapa detik. Sebagai gantinya dibangkitkan
+    # satu kolam vektor N(0, I) yang rata-rata dan kovariansnya dipaskan tepat (moment
+    # matching), diubah menjadi N(21μ, 21Σ), lalu setiap bulan baris kolam diambil acak
+    # seperti metode bootstrap
+    k = ret.shape[1]
+    mu = ret.mean(axis=0) * HARI_PER_BULAN
+    kovarians = np.cov(ret, rowvar=False).reshape(k, k) * HARI_PER_BULAN
+    normal = acak.standard_normal((max(ukuran_kolam, 2 * k), k))
+    normal -= normal.mean(axis=0)
+    normal = np.linalg.solve(_faktor(np.cov(normal, rowvar=False).reshape(k, k)), normal.T).T
+    return mu + normal @ _faktor(kovarians)
+
+def _kolam_bootstrap(ret, acak):
+    # Jumlah bergulir 21 hari = return log bulanan historis (blok tumpang tindih)
+    kumulatif = np.vstack([np.zeros((1, ret.shape[1])), np.cumsum(ret, axis=0)])
+    bulanan = kumulatif[HARI_PER_BULAN:] - kumulatif[:-HARI_PER_BULAN]
+    if len(bulanan) == 0:
+        raise ValueError(f"Bootstrap butuh minimal {HARI_PER_BULAN + 1} hari riwayat bersama")
+    return bulanan
+
+METODE = {"cholesky": _kolam_cholesky, "bootstrap": _kolam_bootstrap}
+
+def _persentil(nilai, persentil):
+    # Setara np.percentile(nilai, persentil, axis=1).T (interpolasi linear), tetapi lewat sort
+    # float32 yang tervektorisasi SIMD: ±5x lebih cepat dari partisi np.percentile
+    urut = np.sort(nilai, axis=1)
+    posisi = np.asarray(persentil, dtype="float64") / 100 * (urut.shape[1] - 1)
+    bawah = np.floor(posisi).astype(int)
+    atas = np.minimum(bawah + 1, urut.shape[1] - 1)
+    bawah_nilai = urut[:, bawah].astype("float64")
+    return bawah_nilai + (urut[:, atas] - bawah_nilai) * (posisi - bawah)
+
+def simulasikan(data, nilai_posisi, tahun=5, jumlah_jalur=JUMLAH_JALUR, metode="cholesky",
+                ukuran_chunk=UKURAN_CHUNK, persentil=PERSENTIL, seed=None):
+    # data: {ticker: riwayat}, nilai_posisi: {ticker: nilai sekarang (Rp)}
+    # -> dict: 'persentil' (DataFrame bulan × persentil), 'akhir' (nilai akhir tiap jalur),
+    #          'tickers' (yang ikut disimulasikan), 'dilewati' (tanpa riwayat)
+    tickers = [t for t in nilai_posisi if t in data and data[t] is not None and not data[t].empty]
+    dilewati = [t for t in nilai_posisi if t not in tickers]
+    if not tickers:
+        raise ValueError("Tidak ada saham dengan riwayat harga untuk disimulasikan")
+    ret = panel_return({t: data[t] for t in tickers})[tickers].to_numpy(dtype="float64")
+    if len(ret) < 2:
+        raise ValueError("Riwayat harga bersama terlalu pendek")
+
+    acak = np.random.default_rng(seed)
+    # Faktor pertumbuhan exp(return) dihitung sekali per baris kolam, sehingga setiap langkah
+    # cukup satu perkalian alih-alih penjumlahan log + exp untuk setiap jalur × saham
+    pertumbuhan = np.exp(METODE[metode](ret, acak)).astype("float32")
+    nilai_awal = np.array([nilai_posisi[t] for t in tickers], dtype="float64")
+    langkah = int(round(tahun * 12))
+
+    # Nilai portofolio disimpan float32 (langkah × jalur) untuk menghitung persentil di akhir;
+    # status per saham (jalur × saham, float32) hanya hidup selama satu chunk
+    nilai = np.empty((langkah + 1, jumlah_jalur), dtype="float32")
+    nilai[0] = nilai_awal.sum()
+    bobot = nilai_awal.astype("float32")
+    for mulai in range(0, jumlah_jalur, ukuran_chunk):
+        jumlah = min(ukuran_chunk, jumlah_jalur - mulai)
+        harga = np.ones((jumlah, len(tickers)), dtype="float32")
+        ambil = np.empty_like(harga)
+        for bulan in range(1, langkah + 1):
+            # np.take jauh lebih cepat dari indeks fancy untuk mengambil baris
+            np.take(pertumbuhan, acak.integers(0, len(pertumbuhan), size=jumlah), axis=0, out=ambil)
+            harga *= ambil
+            np.dot(harga, bobot, out=nilai[bulan, mulai:mulai + jumlah])
+
+    pita = _persentil(nilai, persentil)
+    return {
+        'persentil': pd.DataFrame(pita, index=pd.RangeIndex(langkah + 1, name="Bulan"),
+                                  columns=[f"P{p}" for p in persentil]),
+        'akhir': nilai[-1],
+        'tickers': tickers,
+        'dilewati': dilewati,
+    }
+
+def ringkasan_akhir(hasil):
+    akhir = hasil['akhir'].astype("float64")
+    awal = float(hasil['persentil'].iloc[0, 0])
+    return {
+        'Median': float(np.median(akhir)),
+        'Rata-rata': float(akhir.mean()),
+        'Peluang Rugi (%)': float((akhir < awal).mean() * 100),
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import penyedia_data
+
+    parser = argparse.ArgumentParser(description="Benchmark simulasi Monte Carlo portofolio")
+    parser.add_argument("--saham", type=int, default=30)
+    parser.add_argument("--jalur", type=int, default=JUMLAH_JALUR)
+    parser.add_argument("--tahun", type=float, default=5)
+    parser.add_argument("--metode", default="cholesky", choices=list(METODE))
+    args = parser.parse_args()
+
+    sintetis = penyedia_data.PenyediaSintetis()
+    data = {f"T{i:03d}.JK": sintetis.riwayat(f"T{i:03d}.JK") for i in range(args.saham)}
+    posisi = {t: 10_000_000.0 for t in data}
+
+    mulai = time.perf_counter()
+    hasil = simulasikan(data, posisi, args.tahun, args.jalur, args.metode, seed=0)
+    durasi = time.perf_counter() - mulai
+    print(f"{args.saham} saham, {args.jalur} jalur, {args.tahun} tahun ({args.metode}): {durasi:.2f} s")
+    print(hasil['persentil'].iloc[::12].round(0).to_string())
+    print(ringkasan_akhir(hasil))
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# ======== Single-Flight dalam Satu Proses ========
+class _Panggilan:
+    def __init__(self):
+        self.selesai = threading.Event()
+        self.hasil = None
+        self.galat = None
+
+class SingleFlight:
+    # Hanya satu pemanggilan per kunci yang berjalan; pemanggil lain menunggu dan
+    # menerima hasil (atau galat) yang sama tanpa mengulang pekerjaan.
+    def __init__(self):
+        self._kunci = threading.Lock()
+        self._berjalan = {}
+        self.statistik = {'eksekusi': 0, 'digabung': 0}
+
+    def jalankan(self, kunci, fungsi):
+        with self._kunci:
+            panggilan = self._berjalan.get(kunci)
+            if panggilan is not None:
+                self.statistik['digabung'] += 1
+                pemilik = False
+            else:
+                panggilan = self._berjalan[kunci] = _Panggilan()
+                self.statistik['eksekusi'] += 1
+                pemilik = True
+
+        if not pemilik:
+            panggilan.selesai.wait()
+            if panggilan.galat is not None:
+                raise panggilan.galat
+            return panggilan.hasil
+
+        try:
+            panggilan.hasil = fungsi()
+            return panggilan.hasil
+        except BaseException as e:
+            panggilan.galat = e
+            raise
+        finally:
+            with self._kunci:
+                self._berjalan.pop(kunci, None)
+            panggilan.selesai.set()
+
+# ======== Kunci File Antar Proses ========
+class KunciTimeout(Exception):
+    pass
+
+def _coba_kunci(f):
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _lepas_kunci(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def kunci_file(path, batas_waktu=60, jeda=0.05):
+    # Kunci eksklusif berbasis flock (POSIX) / msvcrt (Windows) agar beberapa proses
+    # worker Streamlit di satu host tidak menulis file cache yang sama bersamaan.
+    with open(path, "a+") as f:
+        mulai = time.monotonic()
+        while not _coba_kunci(f):
+            if time.monotonic() - mulai > batas_waktu:
+                raise KunciTimeout(f"Gagal mendapatkan kunci {path} dalam {batas_waktu} detik")
+            time.sleep(jeda)
+        try:
+            yield
+        finally:
+            _lepas_kunci(f)
+
+# ======== Penulisan Atomik ========
+@contextmanager
+def tulis_atomik(path):
+    # Tulis ke file sementara di direktori yang sama lalu os.replace, sehingga pembaca
+    # tidak pernah melihat file yang baru setengah tertulis.
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
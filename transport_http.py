@@ -0,0 +1,276 @@
+import os
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, urlunsplit, parse_qs
+
+try:
+    from curl_cffi import requests as curl_requests
+    CURL_CFFI_ENABLED = True
+except ImportError:
+    curl_requests = None
+    CURL_CFFI_ENABLED = False
+
+# ======== Konfigurasi Transport ========
+TIMEOUT_CONNECT = float(os.environ.get("TRANSPORT_TIMEOUT_CONNECT", "5"))
+TIMEOUT_READ = float(os.environ.get("TRANSPORT_TIMEOUT_READ", "20"))
+MAKS_ULANG = int(os.environ.get("TRANSPORT_MAKS_ULANG", "4"))
+BACKOFF_DASAR_DETIK = float(os.environ.get("TRANSPORT_BACKOFF_DETIK", "0.5"))
+BACKOFF_MAKS_DETIK = 30.0
+LAJU_PER_DETIK = float(os.environ.get("TRANSPORT_RPS", "5"))
+KAPASITAS_BURST = int(os.environ.get("TRANSPORT_BURST", "10"))
+# Arahkan semua permintaan *.yahoo.com ke server stub lokal, mis. http://127.0.0.1:8765
+STUB_URL = os.environ.get("TRANSPORT_STUB_URL", "")
+STATUS_ULANG = {429, 500, 502, 503, 504}
+
+# ======== Pembatas Laju Token Bucket ========
+class TokenBucket:
+    def __init__(self, laju_per_detik=LAJU_PER_DETIK, kapasitas=KAPASITAS_BURST):
+        self.laju = laju_per_detik
+        self.kapasitas = kapasitas
+        self._token = float(kapasitas)
+        self._waktu = time.monotonic()
+        self._kunci = threading.Lock()
+
+    def ambil(self, jumlah=1):
+        # Blok sampai token tersedia; kembalikan lama menunggu (detik)
+        if self.laju <= 0:
+            return 0.0
+        total_tunggu = 0.0
+        while True:
+            with self._kunci:
+                sekarang = time.monotonic()
+                self._token = min(self.kapasitas, self._token + (sekarang - self._waktu) * self.laju)
+                self._waktu = sekarang
+                if self._token >= jumlah:
+                    self._token -= jumlah
+                    return total_tunggu
+                tunggu = (jumlah - self._token) / self.laju
+            time.sleep(tunggu)
+            total_tunggu += tunggu
+
+def jeda_backoff(percobaan, retry_after=None):
+    # Exponential backoff dengan full jitter; hormati header Retry-After bila ada
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAKS_DETIK)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAKS_DETIK, BACKOFF_DASAR_DETIK * 2 ** percobaan))
+
+# ======== Sesi HTTP Bersama ========
+if CURL_CFFI_ENABLED:
+    class SesiTransport(curl_requests.Session):
+        # yfinance >= 0.2.58 hanya menerima sesi curl_cffi, jadi transport dibangun di atasnya.
+        # curl_cffi memakai handle curl per thread sehingga koneksi keep-alive dipakai ulang.
+        def __init__(self, timeout_connect=TIMEOUT_CONNECT, timeout_read=TIMEOUT_READ, maks_ulang=MAKS_ULANG,
+                     pembatas=None, stub_url=STUB_URL, **kwargs):
+            kwargs.setdefault("impersonate", "chrome")
+            super().__init__(**kwargs)
+            self.timeout_connect = timeout_connect
+            self.timeout_read = timeout_read
+            self.maks_ulang = maks_ulang
+            self.pembatas = pembatas or TokenBucket()
+            self.stub_url = stub_url.rstrip("/")
+            self.statistik = {'permintaan': 0, 'ulang': 0, 'galat': 0, 'tunggu_laju_detik': 0.0}
+            self._kunci_statistik = threading.Lock()
+
+        def _catat(self, nama, jumlah=1):
+            with self._kunci_statistik:
+                self.statistik[nama] += jumlah
+
+        def _alihkan_stub(self, url):
+            if not self.stub_url:
+                return url
+            bagian = urlsplit(url)
+            if not bagian.hostname or not bagian.hostname.endswith("yahoo.com"):
+                return url
+            stub = urlsplit(self.stub_url)
+            return urlunsplit((stub.scheme, stub.netloc, bagian.path or "/", bagian.query, ""))
+
+        def request(self, method, url, *args, **kwargs):
+            url = self._alihkan_stub(url)
+            # Atribut session.timeout diabaikan oleh requests; di sini timeout connect/read
+            # benar-benar diteruskan ke curl untuk setiap permintaan.
+            timeout = kwargs.pop("timeout", None)
+            if not isinstance(timeout, tuple):
+                timeout = (self.timeout_connect, timeout if isinstance(timeout, (int, float)) else self.timeout_read)
+
+            percobaan = 0
+            while True:
+                self._catat('tunggu_laju_detik', self.pembatas.ambil())
+                self._catat('permintaan')
+                try:
+                    resp = super().request(method, url, *args, timeout=timeout, **kwargs)
+                except curl_requests.exceptions.RequestException:
+                    if percobaan >= self.maks_ulang:
+                        self._catat('galat')
+                        raise
+                    time.sleep(jeda_backoff(percobaan))
+                else:
+                    if resp.status_code not in STATUS_ULANG or percobaan >= self.maks_ulang:
+                        if resp.status_code in STATUS_ULANG:
+                            self._catat('galat')
+                        return resp
+                    time.sleep(jeda_backoff(percobaan, resp.headers.get("Retry-After")))
+                percobaan += 1
+                self._catat('ulang')
+else:
+    SesiTransport = None
+
+_SESI = None
+_KUNCI_SESI = threading.Lock()
+
+def sesi_bersama():
+    # Satu sesi (pool koneksi, pembatas laju, statistik) untuk semua jalur unduh di proses ini.
+    # None berarti curl_cffi tidak tersedia dan yfinance memakai sesi bawaannya.
+    global _SESI
+    if not CURL_CFFI_ENABLED:
+        return None
+    with _KUNCI_SESI:
+        if _SESI is None:
+            _SESI = SesiTransport()
+        return _SESI
+
+# ======== Server Stub Lokal ========
+def _respons_chart(simbol, query):
+    akhir = datetime.now(timezone.utc)
+    if "period1" in query:
+        mulai = datetime.fromtimestamp(int(query["period1"][0]), timezone.utc)
+        if "period2" in query:
+            akhir = datetime.fromtimestamp(int(query["period2"][0]), timezone.utc)
+    else:
+        rentang = {"1d": 1, "5d": 7, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 365, "2y": 730, "5y": 1826}
+        mulai = akhir - timedelta(days=rentang.get(query.get("range", ["1y"])[0], 365))
+    from penyedia_data import bar_sintetis
+
+    baris = bar_sintetis(simbol, mulai, akhir)
+    tz = "Asia/Jakarta" if simbol.endswith(".JK") else "America/New_York"
+    terakhir = baris[-1][4] if baris else None
+    return {"chart": {"error": None, "result": [{
+        "meta": {
+            "currency": "IDR" if simbol.endswith(".JK") else "USD", "symbol": simbol,
+            "exchangeName": "STUB", "instrumentType": "EQUITY", "gmtoffset": 25200 if tz == "Asia/Jakarta" else -14400,
+            "timezone": "WIB", "exchangeTimezoneName": tz, "regularMarketPrice": terakhir,
+            "chartPreviousClose": baris[0][4] if baris else None, "priceHint": 2, "dataGranularity": "1d",
+            "range": "", "validRanges": ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "max"],
+        },
+        "timestamp": [b[0] for b in baris],
+        "indicators": {
+            "quote": [{"open": [b[1] for b in baris], "high": [b[2] for b in baris], "low": [b[3] for b in baris],
+                       "close": [b[4] for b in baris], "volume": [b[5] for b in baris]}],
+            "adjclose": [{"adjclose": [b[4] for b in baris]}],
+        },
+    }]}}
+
+def buat_server_stub(port=8765, laju_galat=0.0, latensi_ms=0.0):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class PenanganStub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, agar pool koneksi ikut teruji
+
+        def log_message(self, *args):
+            pass
+
+        def _kirim(self, status, isi, tipe="application/json", header=None):
+            data = isi.encode() if isinstance(isi, str) else isi
+            self.send_response(status)
+            self.send_header("Content-Type", tipe)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Set-Cookie", "A3=stub; Path=/")
+            for kunci, nilai in (header or {}).items():
+                self.send_header(kunci, nilai)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if latensi_ms:
+                time.sleep(random.expovariate(1000.0 / latensi_ms))
+            if laju_galat and random.random() < laju_galat:
+                if random.random() < 0.5:
+                    return self._kirim(429, '{"error":"Too Many Requests"}', header={"Retry-After": "0"})
+                return self._kirim(503, '{"error":"Service Unavailable"}')
+
+            bagian = urlsplit(self.path)
+            if bagian.path.endswith("/getcrumb"):
+                return self._kirim(200, "stubcrumb", tipe="text/plain")
+            if bagian.path.startswith("/v8/finance/chart/"):
+                simbol = bagian.path.rsplit("/", 1)[-1]
+                return self._kirim(200, json.dumps(_respons_chart(simbol, parse_qs(bagian.query))))
+            return self._kirim(200, "{}")
+
+    return ThreadingHTTPServer(("127.0.0.1", port), PenanganStub)
+
+def jalankan_stub_latar(port=0, **kwargs):
+    # Jalankan stub di thread daemon; port=0 memilih port bebas. Kembalikan (server, url)
+    server = buat_server_stub(port, **kwargs)
+    threading.Thread(target=server.serve_forever, name="stub-yahoo", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# ======== Uji Beban ========
+def uji_beban(sesi, url, jumlah=500, paralel=16):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def satu(_):
+        mulai = time.perf_counter()
+        try:
+            ok = sesi.get(url).status_code == 200
+        except Exception:
+            ok = False
+        return time.perf_counter() - mulai, ok
+
+    mulai = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=paralel) as pool:
+        hasil = list(pool.map(satu, range(jumlah)))
+    durasi = time.perf_counter() - mulai
+    latensi = sorted(h[0] * 1000 for h in hasil)
+
+    def persentil(p):
+        return latensi[min(len(latensi) - 1, int(p / 100 * len(latensi)))]
+
+    return {
+        'target': jumlah,
+        'sukses': sum(1 for h in hasil if h[1]),
+        'durasi_detik': round(durasi, 3),
+        'throughput_rps': round(jumlah / durasi, 1),
+        'p50_ms': round(persentil(50), 2),
+        'p95_ms': round(persentil(95), 2),
+        'p99_ms': round(persentil(99), 2),
+        **sesi.statistik,
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Transport HTTP bersama untuk yfinance")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+    stub = sub.add_parser("stub", help="Jalankan server stub Yahoo lokal")
+    stub.add_argument("--port", type=int, default=8765)
+    stub.add_argument("--laju-galat", type=float, default=0.0, help="Proporsi respons 429/503 (0-1)")
+    stub.add_argument("--latensi-ms", type=float, default=0.0)
+    beban = sub.add_parser("uji-beban", help="Uji beban transport terhadap server stub")
+    beban.add_argument("--url", default="", help="URL stub; kosong = jalankan stub di proses ini")
+    beban.add_argument("--permintaan", type=int, default=500)
+    beban.add_argument("--paralel", type=int, default=16)
+    beban.add_argument("--rps", type=float, default=0, help="Batas laju token bucket (0 = tanpa batas)")
+    beban.add_argument("--laju-galat", type=float, default=0.1)
+    beban.add_argument("--latensi-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.perintah == "stub":
+        server = buat_server_stub(args.port, args.laju_galat, args.latensi_ms)
+        print(f"Stub Yahoo berjalan di http://127.0.0.1:{args.port} (TRANSPORT_STUB_URL)")
+        server.serve_forever()
+    elif args.perintah == "uji-beban":
+        if not CURL_CFFI_ENABLED:
+            raise SystemExit("curl_cffi tidak terinstall (pip install curl_cffi)")
+        url = args.url
+        if not url:
+            _, url = jalankan_stub_latar(laju_galat=args.laju_galat, latensi_ms=args.latensi_ms)
+        sesi = SesiTransport(pembatas=TokenBucket(args.rps, max(1, int(args.rps))), stub_url=url)
+        hasil = uji_beban(sesi, "https://query2.finance.yahoo.com/v8/finance/chart/BBCA.JK?range=1y&interval=1d",
+                          args.permintaan, args.paralel)
+        for kunci, nilai in hasil.items():
+            print(f"{kunci:>20}: {nilai}")